@@ -0,0 +1,76 @@
+"""
+Compare the startup time of an ahead-of-time built executable with running
+the same program through the JIT.
+
+Run from the repository root:
+
+    python benchmarks/aot_benchmark.py
+
+Each variant is started `--runs` times as a fresh process, which is what a
+user running the program pays: the JIT variants include interpreter start,
+llvmlite initialization and (without the cache) the whole frontend.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STELLAR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar")
+
+
+def generate_program(statements):
+    lines = ["a: int = 1;", "b: int = 2;"]
+    for i in range(statements):
+        lines.append(f"a = (a + b) * {i % 5 + 1} - {i};")
+        lines.append("b = a / 3 + b;")
+    lines.append("print(a);")
+    lines.append("print(b);")
+    return "\n".join(lines)
+
+
+def time_command(command, runs, env=None):
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, env=env)
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--statements", type=int, default=500)
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "program.stl")
+        executable_path = os.path.join(directory, "program")
+        with open(source_path, "w") as f:
+            f.write(generate_program(args.statements))
+
+        opt_flag = f"-O{args.opt_level}"
+        build = [sys.executable, STELLAR, "build", source_path, opt_flag]
+        start = time.perf_counter()
+        subprocess.run(build + ["-o", executable_path], check=True)
+        build_time = time.perf_counter() - start
+
+        env = dict(os.environ, STELLAR_CACHE_DIR=os.path.join(directory, "cache"))
+        run = [sys.executable, STELLAR, "run", source_path, opt_flag]
+        # Fill the cache once so the cached variant never compiles
+        subprocess.run(run, check=True, stdout=subprocess.DEVNULL, env=env)
+
+        results = {
+            "aot executable": time_command([executable_path], args.runs),
+            "jit, cached": time_command(run, args.runs, env),
+            "jit, no cache": time_command(run + ["--no-cache"], args.runs, env),
+        }
+
+    print(f"build: {build_time * 1000:8.1f} ms (once)")
+    for name, seconds in results.items():
+        print(f"{name + ':':<15} {seconds * 1000:8.2f} ms per start")
+
+
+if __name__ == "__main__":
+    main()
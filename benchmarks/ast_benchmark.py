@@ -0,0 +1,133 @@
+"""
+Compare the slotted AST node classes against the old dict representation.
+
+Run from the repository root:
+
+    python benchmarks/ast_benchmark.py
+
+The benchmark parses a program of long arithmetic expressions, converts the
+tree to the dict layout the parser used to emit, and reports the memory held
+by each representation and the time to walk it.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import st_ast  # noqa: E402
+import st_lexer  # noqa: E402
+import st_parser  # noqa: E402
+
+
+def generate_program(statements, terms):
+    lines = ["a: int = 1;"]
+    for i in range(statements):
+        expression = " + ".join(f"a * {i + j}" for j in range(terms))
+        lines.append(f"a = {expression};")
+    return "\n".join(lines)
+
+
+def to_dict(node):
+    if isinstance(node, list):
+        return [to_dict(el) for el in node]
+    if isinstance(node, st_ast.Literal):
+        return {"node_type": node.value_type, "value": node.value}
+    if isinstance(node, st_ast.Variable):
+        return {"node_type": "variable", "name": node.name}
+    if isinstance(node, st_ast.BinaryOperation):
+        return {
+            "node_type": "binary_operation",
+            "operator": node.operator,
+            "left_operand": to_dict(node.left_operand),
+            "right_operand": to_dict(node.right_operand),
+        }
+    if isinstance(node, st_ast.VariableDeclaration):
+        return {
+            "node_type": "variable_declaration",
+            "variable_name": node.variable_name,
+            "variable_type": node.variable_type,
+            "expression": to_dict(node.expression),
+        }
+    if isinstance(node, st_ast.AssignmentStatement):
+        return {
+            "node_type": "assignment_statement",
+            "variable_name": node.variable_name,
+            "expression": to_dict(node.expression),
+        }
+    raise TypeError(node)
+
+
+def to_nodes(node):
+    if isinstance(node, list):
+        return [to_nodes(el) for el in node]
+    if isinstance(node, st_ast.BinaryOperation):
+        return st_ast.BinaryOperation(
+            node.operator, to_nodes(node.left_operand), to_nodes(node.right_operand)
+        )
+    if isinstance(node, st_ast.VariableDeclaration):
+        return st_ast.VariableDeclaration(
+            node.variable_name, node.variable_type, to_nodes(node.expression)
+        )
+    if isinstance(node, st_ast.AssignmentStatement):
+        return st_ast.AssignmentStatement(node.variable_name, to_nodes(node.expression))
+    return type(node)(*(getattr(node, name) for name in node.__slots__))
+
+
+BinaryOperation = st_ast.BinaryOperation
+STATEMENTS = (st_ast.VariableDeclaration, st_ast.AssignmentStatement)
+
+
+def walk_nodes(node):
+    node_class = type(node)
+    if node_class is BinaryOperation:
+        return 1 + walk_nodes(node.left_operand) + walk_nodes(node.right_operand)
+    if node_class in STATEMENTS:
+        return 1 + walk_nodes(node.expression)
+    return 1
+
+
+def walk_dicts(node):
+    if node["node_type"] == "binary_operation":
+        return 1 + walk_dicts(node["left_operand"]) + walk_dicts(node["right_operand"])
+    if "expression" in node.keys():
+        return 1 + walk_dicts(node["expression"])
+    return 1
+
+
+def measure(ast, build, walk):
+    tracemalloc.start()
+    tree = build(ast)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    nodes = sum(walk(statement) for statement in tree)
+    elapsed = time.perf_counter() - start
+    return nodes, size, elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--statements", type=int, default=10_000)
+    arg_parser.add_argument("--terms", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    tokens = st_lexer.Lexer(generate_program(args.statements, args.terms)).parse()
+    ast = st_parser.Parser(tokens).parse()
+
+    for name, build, walk in (
+        ("dict", to_dict, walk_dicts),
+        ("slots", to_nodes, walk_nodes),
+    ):
+        nodes, size, elapsed = measure(ast, build, walk)
+        print(
+            f"{name:>5}: {nodes} nodes {size / 2**20:8.2f} MiB "
+            f"{size / nodes:6.1f} B/node walk {nodes / elapsed / 1e6:6.2f} Mnodes/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
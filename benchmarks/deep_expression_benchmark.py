@@ -0,0 +1,144 @@
+"""
+Stress the expression phases with very deep expressions.
+
+Run from the repository root:
+
+    python benchmarks/deep_expression_benchmark.py
+
+Left-nested chains like `x + 1 - x + ...` come from source and are compiled
+and run with `stellar run`, checking the printed value. The parser reads
+parentheses recursively, so a right-nested `x - (x - (x - ...))` is built
+as an AST directly and goes through the semantic analyzer, the constant
+folder and the code generator in process. Each phase is timed.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STELLAR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar")
+sys.path.insert(0, STELLAR)
+
+import llvm_code_generator  # noqa: E402
+import st_ast  # noqa: E402
+import st_lexer  # noqa: E402
+import st_optimizer  # noqa: E402
+import st_parser  # noqa: E402
+import st_semantics  # noqa: E402
+
+INT_TERMS = (("+", "x * 2"), ("-", "x"), ("+", "1"), ("-", "3"))
+FLOAT_TERMS = (("+", "x * 2.0"), ("-", "x"), ("+", "0.5"), ("-", "x / 4.0"))
+
+
+def generate_chain(depth, value_type, initial):
+    """A program printing `x <op> <term> <op> <term> ...` with `depth` operators."""
+    terms = INT_TERMS if value_type == "int" else FLOAT_TERMS
+    chain = " ".join(
+        f"{terms[i % len(terms)][0]} {terms[i % len(terms)][1]}" for i in range(depth)
+    )
+    return f"x: {value_type} = {initial};\ny: {value_type} = x {chain};\nprint(y);\n"
+
+
+def expected_chain(depth, value_type, x):
+    terms = INT_TERMS if value_type == "int" else FLOAT_TERMS
+    value = x
+    for i in range(depth):
+        operator, term = terms[i % len(terms)]
+        operand = eval(term, {"x": x})
+        value = value + operand if operator == "+" else value - operand
+    if value_type == "int":
+        return str(value)
+    return f"{value:f}"
+
+
+def timed(timings, name, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    timings[name] = time.perf_counter() - start
+    return result
+
+
+def frontend(code):
+    """Run the frontend on `code` and return the AST and the time of each phase."""
+    timings = {}
+    tokens = timed(timings, "lex", lambda: st_lexer.Lexer(code).parse())
+    ast = timed(timings, "parse", lambda: st_parser.Parser(tokens).parse())
+    timed(timings, "analyze", st_semantics.SemanticAnalyzer(ast).analyze)
+    timed(timings, "fold", st_optimizer.ConstantFolder(ast).optimize)
+    timed(
+        timings, "codegen", lambda: str(llvm_code_generator.LlvmGenerator(ast).module)
+    )
+    return ast, timings
+
+
+def run_chain(depth, value_type, initial, opt_level):
+    code = generate_chain(depth, value_type, initial)
+    _, timings = frontend(code)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "deep.stl")
+        with open(source_path, "w") as f:
+            f.write(code)
+        command = [sys.executable, STELLAR, "run", source_path, f"-O{opt_level}"]
+        start = time.perf_counter()
+        result = subprocess.run(
+            command + ["--no-cache"], check=True, capture_output=True, text=True
+        )
+        timings["stellar run"] = time.perf_counter() - start
+
+    expected = expected_chain(depth, value_type, initial)
+    if result.stdout.strip() != expected:
+        raise AssertionError(
+            f"printed {result.stdout.strip()!r}, expected {expected!r}"
+        )
+    return timings
+
+
+def run_right_nested(depth):
+    """Analyze, fold and generate `y = x - (x - (x - ... - 1.5))` from an AST."""
+    ast = st_parser.Parser(st_lexer.Lexer("x: float = 2.5;").parse()).parse()
+    symbol = ast[0].symbol
+
+    expression = st_ast.Literal("FLOAT", "1.5")
+    for _ in range(depth):
+        variable = st_ast.Variable(symbol.name, symbol)
+        expression = st_ast.BinaryOperation("MINUS", variable, expression)
+    ast.append(st_ast.AssignmentStatement(symbol.name, expression, symbol))
+
+    timings = {}
+    timed(timings, "analyze", st_semantics.SemanticAnalyzer(ast).analyze)
+    if expression.value_type != "FLOAT":
+        raise AssertionError(f"resolved type {expression.value_type}, expected FLOAT")
+    timed(timings, "fold", st_optimizer.ConstantFolder(ast).optimize)
+    generator = timed(timings, "codegen", llvm_code_generator.LlvmGenerator, ast)
+
+    instructions = str(generator.module).count(" = fsub double")
+    if instructions != depth:
+        raise AssertionError(f"generated {instructions} fsub, expected {depth}")
+    return timings
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--depth", type=int, default=100_000)
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    results = {
+        "int chain": run_chain(args.depth, "int", 3, args.opt_level),
+        "float chain": run_chain(args.depth, "float", 1.25, args.opt_level),
+        "right nested": run_right_nested(args.depth),
+    }
+
+    print(f"depth: {args.depth}, ms per phase")
+    for name, timings in results.items():
+        phases = ", ".join(
+            f"{phase} {seconds * 1000:.1f}" for phase, seconds in timings.items()
+        )
+        print(f"{name + ':':<14} {phases}")
+
+
+if __name__ == "__main__":
+    main()
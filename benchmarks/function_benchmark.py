@@ -0,0 +1,83 @@
+"""
+Compare recursive calls of stellar functions with CPython.
+
+Run from the repository root:
+
+    python benchmarks/function_benchmark.py
+
+The naive recursive fibonacci makes about 2 * fib(n) calls. The stellar
+program is run with `stellar run --no-cache` at each optimization level and
+its execute phase is compared with the same function timed in CPython.
+Stellar functions are internal and use the fast calling convention, so at
+-O2 LLVM can inline the recursion into itself and drop the frame overhead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STELLAR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar")
+
+FIB = """\
+def fib(n: int) -> int {{
+    if n < 2 {{
+        return n;
+    }}
+    return fib(n - 1) + fib(n - 2);
+}}
+
+print(fib({n}));
+"""
+
+
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+def run(code, opt_level):
+    """Run `code` and return its output and the wall time of each phase."""
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "fib.stl")
+        profile_path = os.path.join(directory, "profile.json")
+        with open(source_path, "w") as f:
+            f.write(code)
+        command = [sys.executable, STELLAR, "run", source_path, f"-O{opt_level}"]
+        command += ["--no-cache", "--profile-json", profile_path]
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        with open(profile_path) as f:
+            phases = json.load(f)["phases"]
+    return result.stdout.strip(), {
+        phase["name"]: phase["wall_time"] for phase in phases
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-n", type=int, default=30, help="fibonacci number")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    expected = fib(args.n)
+    python_time = time.perf_counter() - start
+
+    print(f"fib({args.n}) = {expected}, ms")
+    print(f"{'':<12} {'jit':>8} {'execute':>9} {'speedup':>8}")
+    print(f"{'cpython':<12} {'':>8} {python_time * 1000:>9.1f} {1:>7.1f}x")
+    for opt_level in (0, 2):
+        output, times = run(FIB.format(n=args.n), opt_level)
+        if output != str(expected):
+            raise AssertionError(f"-O{opt_level} printed {output}, expected {expected}")
+        execute = times["execute"]
+        print(
+            f"{'stellar -O' + str(opt_level):<12} {times['jit'] * 1000:>8.1f} "
+            f"{execute * 1000:>9.1f} {python_time / execute:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare the frontend latency after a one-line edit with and without
+incremental recompilation.
+
+Run from the repository root:
+
+    python benchmarks/incremental_benchmark.py
+
+Each round changes the literal of one statement in the middle of the file,
+then either compiles it from scratch or updates an IncrementalCompiler that
+compiled the previous version. Code generation covers producing IR text.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import llvm_code_generator  # noqa: E402
+import st_incremental  # noqa: E402
+import st_lexer  # noqa: E402
+import st_optimizer  # noqa: E402
+import st_parser  # noqa: E402
+import st_semantics  # noqa: E402
+
+
+def generate_program(statements, edit):
+    lines = ["a: int = 1;", "b: int = 2;"]
+    for i in range(statements):
+        value = edit if i == statements // 2 else i
+        lines.append(f"a = (a + b) * {value % 7 + 1} - {value};")
+        lines.append("b = a / 3 + b;")
+        lines.append("print(a);")
+    return "\n".join(lines)
+
+
+def full_frontend(code):
+    ast = st_parser.Parser(st_lexer.Lexer(code).parse()).parse()
+    st_semantics.SemanticAnalyzer(ast).analyze()
+    st_optimizer.ConstantFolder(ast).optimize()
+    return ast
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--statements", type=int, default=20_000)
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    versions = [
+        generate_program(args.statements, 1000 + edit)
+        for edit in range(args.rounds + 1)
+    ]
+
+    compiler = st_incremental.IncrementalCompiler()
+    compiler.update(versions[0])
+    compiler.generate_module()
+
+    full_time = {"frontend": 0.0, "codegen": 0.0}
+    incremental_time = {"frontend": 0.0, "codegen": 0.0}
+    for code in versions[1:]:
+        start = time.perf_counter()
+        full_ast = full_frontend(code)
+        middle = time.perf_counter()
+        str(llvm_code_generator.LlvmGenerator(full_ast).module)
+        full_time["frontend"] += middle - start
+        full_time["codegen"] += time.perf_counter() - middle
+
+        start = time.perf_counter()
+        incremental_ast = compiler.update(code)
+        middle = time.perf_counter()
+        compiler.generate_module()
+        incremental_time["frontend"] += middle - start
+        incremental_time["codegen"] += time.perf_counter() - middle
+        assert incremental_ast == full_ast
+
+    rounds = len(versions) - 1
+    print(f"statements: {len(full_ast)}, ms per edit")
+    print(f"{'':<12} {'frontend':>10} {'codegen':>10}")
+    for name, times in (("full", full_time), ("incremental", incremental_time)):
+        print(
+            f"{name:<12} {times['frontend'] / rounds * 1000:>10.1f} "
+            f"{times['codegen'] / rounds * 1000:>10.1f}"
+        )
+    print(
+        f"incremental: relexed {compiler.relexed} statements, "
+        f"generated {compiler.generator.generated} IR fragments"
+    )
+
+
+if __name__ == "__main__":
+    main()
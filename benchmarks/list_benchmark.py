@@ -0,0 +1,131 @@
+"""
+Compare stellar's native int lists with Python lists.
+
+Run from the repository root:
+
+    python benchmarks/list_benchmark.py
+
+The benchmark drives the list runtime from IR rather than from a stellar
+program, so each operation is timed on its own and the list can be read
+back here: `fill` appends 0..n-1 to an empty list one element at a time,
+going through the doubling growth, and `total` sums it by index with
+bounds checked reads. Both are compiled by the JIT next to the runtime
+functions of an otherwise empty module, which can inline them.
+`loop_benchmark.py` times list loops written in stellar.
+"""
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import llvm_code_generator  # noqa: E402
+import st_compiler  # noqa: E402
+from llvm_code_generator import int32, int64  # noqa: E402
+from llvmlite import ir  # noqa: E402
+
+
+def counted_loop(builder, function, count, body):
+    """Emit `for (i = 0; i < count; i++) body(builder, i)`."""
+    entry_block = builder.block
+    loop_block = function.append_basic_block("loop")
+    body_block = function.append_basic_block("body")
+    done_block = function.append_basic_block("done")
+    builder.branch(loop_block)
+
+    builder.position_at_end(loop_block)
+    index = builder.phi(int32)
+    index.add_incoming(int32(0), entry_block)
+    builder.cbranch(builder.icmp_signed("<", index, count), body_block, done_block)
+
+    builder.position_at_end(body_block)
+    body(builder, index)
+    index.add_incoming(builder.add(index, int32(1)), builder.block)
+    builder.branch(loop_block)
+
+    builder.position_at_end(done_block)
+
+
+def build_module():
+    generator = llvm_code_generator.LlvmGenerator([])
+    module, lists = generator.module, generator.lists
+    list_pointer = lists.pointer_type("INT")
+
+    # list* fill(i32 n)
+    fill = ir.Function(module, ir.FunctionType(list_pointer, [int32]), name="fill")
+    builder = ir.IRBuilder(fill.append_basic_block("entry"))
+    pointer = builder.call(lists.new_function("INT"), [int32(0)])
+    append = lists.append_function("INT")
+    counted_loop(builder, fill, fill.args[0], lambda b, i: b.call(append, [pointer, i]))
+    builder.ret(pointer)
+
+    # i64 total(list*)
+    total = ir.Function(module, ir.FunctionType(int64, [list_pointer]), name="total")
+    builder = ir.IRBuilder(total.append_basic_block("entry"))
+    accumulator = builder.alloca(int64)
+    builder.store(int64(0), accumulator)
+    get = lists.get_function("INT")
+
+    def add_element(b, i):
+        value = b.sext(b.call(get, [total.args[0], i]), int64)
+        b.store(b.add(b.load(accumulator), value), accumulator)
+
+    counted_loop(builder, total, lists.length(builder, total.args[0]), add_element)
+    builder.ret(builder.load(accumulator))
+    return str(module)
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--elements", type=int, default=10_000_000)
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = arg_parser.parse_args()
+    n = args.elements
+
+    session = st_compiler.JitSession(args.opt_level)
+    session.add_module(build_module())
+    fill = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_int32)(
+        session.engine.get_function_address("fill")
+    )
+    total = ctypes.CFUNCTYPE(ctypes.c_int64, ctypes.c_void_p)(
+        session.engine.get_function_address("total")
+    )
+
+    pointer, stellar_fill = time_call(fill, n)
+    stellar_sum, stellar_total = time_call(total, pointer)
+    # The header is {i32 length, i32 capacity, i32* data}
+    capacity = ctypes.cast(pointer, ctypes.POINTER(ctypes.c_int32))[1]
+
+    def python_fill(n):
+        values = []
+        for i in range(n):
+            values.append(i)
+        return values
+
+    values, python_fill_time = time_call(python_fill, n)
+    python_sum, python_total = time_call(sum, values)
+    python_bytes = sys.getsizeof(values) + sum(map(sys.getsizeof, values[256:]))
+
+    assert stellar_sum == python_sum, (stellar_sum, python_sum)
+    print(f"elements: {n}, -O{args.opt_level}")
+    print(f"{'':<8} {'append ms':>10} {'sum ms':>10} {'bytes':>12}")
+    print(
+        f"{'stellar':<8} {stellar_fill * 1000:>10.1f} {stellar_total * 1000:>10.1f} "
+        f"{capacity * 4:>12}"
+    )
+    print(
+        f"{'python':<8} {python_fill_time * 1000:>10.1f} "
+        f"{python_total * 1000:>10.1f} {python_bytes:>12}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare loops with the straight-line code a generator script had to
+produce before the language had them.
+
+Run from the repository root:
+
+    python benchmarks/loop_benchmark.py
+
+Each program is run with `stellar run --no-cache` and its per-phase
+profile: the frontend covers lexing to IR generation, jit the LLVM
+optimization and machine code generation. Summing 1..N with a loop lets
+LLVM's loop passes replace it with a closed form at -O2, the list sum is
+vectorized instead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+STELLAR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar")
+INT32_MIN = -(2**31)
+
+
+def wrap_int32(value):
+    return (value - INT32_MIN) % 2**32 + INT32_MIN
+
+
+def unrolled_sum(n):
+    lines = ["total: int = 0;"]
+    lines.extend(f"total = total + {i};" for i in range(1, n + 1))
+    lines.append("print(total);")
+    return "\n".join(lines) + "\n"
+
+
+def loop_sum(n):
+    return (
+        "total: int = 0;\n"
+        f"for i in range(1, {n} + 1) {{\n"
+        "    total = total + i;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def loop_list_sum(n):
+    return (
+        "values: list[int] = [];\n"
+        f"for i in range({n}) {{\n"
+        "    values.append(i);\n"
+        "}\n"
+        "total: int = 0;\n"
+        "for i in range(len(values)) {\n"
+        "    total = total + values[i] * 3;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def run(code, opt_level):
+    """Run `code` and return its output and the wall time of each phase."""
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "program.stl")
+        profile_path = os.path.join(directory, "profile.json")
+        with open(source_path, "w") as f:
+            f.write(code)
+        command = [sys.executable, STELLAR, "run", source_path, f"-O{opt_level}"]
+        command += ["--no-cache", "--profile-json", profile_path]
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        with open(profile_path) as f:
+            phases = json.load(f)["phases"]
+
+    times = {"frontend": 0.0, "jit": 0.0, "execute": 0.0}
+    for phase in phases:
+        name = phase["name"] if phase["name"] in times else "frontend"
+        times[name] += phase["wall_time"]
+    return result.stdout.strip(), times
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--unrolled", type=int, default=20_000, help="N of the straight-line sum"
+    )
+    arg_parser.add_argument(
+        "--elements", type=int, default=100_000_000, help="N of the loops"
+    )
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = arg_parser.parse_args()
+
+    small, large = args.unrolled, args.elements
+    variants = [
+        (f"unrolled sum, N={small}", unrolled_sum(small), small * (small + 1) // 2),
+        (f"loop sum, N={small}", loop_sum(small), small * (small + 1) // 2),
+        (f"loop sum, N={large}", loop_sum(large), large * (large + 1) // 2),
+        (
+            f"list sum, N={large // 10}",
+            loop_list_sum(large // 10),
+            3 * (large // 10) * (large // 10 - 1) // 2,
+        ),
+    ]
+
+    print(f"-O{args.opt_level}, ms")
+    print(f"{'':<26} {'source B':>10} {'frontend':>9} {'jit':>8} {'execute':>9}")
+    for name, code, expected in variants:
+        output, times = run(code, args.opt_level)
+        if output != str(wrap_int32(expected)):
+            raise AssertionError(f"{name}: printed {output}, expected {expected}")
+        print(
+            f"{name:<26} {len(code):>10} {times['frontend'] * 1000:>9.1f} "
+            f"{times['jit'] * 1000:>8.1f} {times['execute'] * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare compile latency and run time of the -O0 to -O3 pipelines.
+
+Run from the repository root:
+
+    python benchmarks/opt_level_benchmark.py
+
+Compile time covers IR parsing, the optimization passes and machine code
+generation. Run time is the generated `main` called `--runs` times.
+"""
+import argparse
+import os
+import sys
+import time
+from ctypes import CFUNCTYPE, c_int
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import llvm_code_generator  # noqa: E402
+import st_compiler  # noqa: E402
+import st_lexer  # noqa: E402
+import st_parser  # noqa: E402
+import st_semantics  # noqa: E402
+
+
+def generate_program(statements):
+    lines = ["a: int = 1;", "b: int = 2;", "c: int = 3;"]
+    for i in range(statements):
+        lines.append(f"a = (a + b) * c - {i};")
+        lines.append("b = a / (c + 1) + b;")
+        lines.append(f"c = c * {i % 7 + 1} - a;")
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--statements", type=int, default=2_000)
+    arg_parser.add_argument("--runs", type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    tokens = st_lexer.Lexer(generate_program(args.statements)).parse()
+    ast = st_parser.Parser(tokens).parse()
+    st_semantics.SemanticAnalyzer(ast).analyze()
+    llvm_ir = str(llvm_code_generator.LlvmGenerator(ast).module)
+
+    for opt_level in st_compiler.OPT_LEVELS:
+        session = st_compiler.JitSession(opt_level)
+
+        start = time.perf_counter()
+        _, entry_name = session.add_module(llvm_ir)
+        compile_time = time.perf_counter() - start
+
+        cfunc = CFUNCTYPE(c_int)(session.engine.get_function_address(entry_name))
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            cfunc()
+        run_time = time.perf_counter() - start
+
+        print(
+            f"-O{opt_level}: compile {compile_time * 1000:8.1f} ms "
+            f"run {run_time / args.runs * 1e6:8.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
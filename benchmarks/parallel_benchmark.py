@@ -0,0 +1,63 @@
+"""
+Compare serial and parallel compilation of a directory of stellar files.
+
+Run from the repository root:
+
+    python benchmarks/parallel_benchmark.py --jobs 4
+
+Generates `--files` programs in a temporary directory and times building
+all of them to object code with one process and with `--jobs` processes.
+Nothing is read from or written to the compilation cache.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import st_build  # noqa: E402
+
+
+def generate_program(seed, statements):
+    lines = ["a: int = 1;", "b: int = 2;"]
+    for i in range(statements):
+        lines.append(f"a = a * {seed} + (b - {i}) / 3;")
+        lines.append(f"b = b + a * {i % 5 + 1};")
+    lines.append("print(a);")
+    return "\n".join(lines)
+
+
+def build(file_paths, opt_level, jobs):
+    start = time.perf_counter()
+    for result in st_build.build_parallel(file_paths, opt_level, jobs):
+        if result.error:
+            raise RuntimeError(f"{result.file_path}: {result.error}")
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--files", type=int, default=64)
+    arg_parser.add_argument("--statements", type=int, default=500)
+    arg_parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(args.files):
+            with open(os.path.join(directory, f"program_{i}.stl"), "w") as file:
+                file.write(generate_program(i, args.statements))
+        file_paths = st_build.find_sources(directory)
+
+        serial = build(file_paths, args.opt_level, 1)
+        parallel = build(file_paths, args.opt_level, args.jobs)
+
+    print(f"serial:   {serial:7.2f}s")
+    print(f"jobs={args.jobs:<3} {parallel:7.2f}s")
+    print(f"speedup:  {serial / parallel:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Time `Parser.parse` on generated programs of increasing size.
+
+Run from the repository root:
+
+    python benchmarks/parser_benchmark.py
+    python benchmarks/parser_benchmark.py --stellar-dir path/to/old/stellar
+
+Pointing `--stellar-dir` at another checkout compares parsers across commits.
+Tokens are always produced by that checkout's lexer before timing starts.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def generate_program(statements):
+    lines = ["a: int = 1;", "b: int = 2;"]
+    for i in range(statements - 2):
+        if i % 2:
+            lines.append(f"b = a * (b + {i}) - 3;")
+        else:
+            lines.append(f"a = a + {i} * 2;")
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--stellar-dir", default=os.path.join(ROOT, "stellar"))
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    args = arg_parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.stellar_dir))
+    import st_lexer
+    import st_parser
+
+    for size in args.sizes:
+        tokens = st_lexer.Lexer(generate_program(size)).parse()
+        token_count = len(tokens)
+        # Older trees keep declarations in a module-level dict
+        getattr(st_parser, "variables", {}).clear()
+
+        start = time.perf_counter()
+        st_parser.Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>8} statements {token_count:>9} tokens {elapsed:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
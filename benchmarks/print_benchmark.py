@@ -0,0 +1,96 @@
+"""
+Measure how fast compiled programs print, by value type.
+
+Run from the repository root:
+
+    python benchmarks/print_benchmark.py
+
+Each program prints `-n` values in a loop and is run with `stellar run
+--no-cache`, its output going to a pipe. The execute phase of its profile
+is compared with CPython printing the same lines to a file. A mixed run of
+adjacent prints shows the effect of writing them to the buffer together.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STELLAR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar")
+
+PROGRAMS = {
+    "int": ("for i in range({n}) {{\n    print(i);\n}}\n", lambda i: [i]),
+    "float": (
+        "x: float = 0.5;\n"
+        "for i in range({n}) {{\n    print(x);\n    x = x + 1.0;\n}}\n",
+        lambda i: ["%f" % (i + 0.5)],
+    ),
+    "str": (
+        's: str = "a string of some length";\n'
+        "for i in range({n}) {{\n    print(s);\n}}\n",
+        lambda i: ["a string of some length"],
+    ),
+    "mixed": (
+        's: str = "value";\n'
+        "for i in range({n}) {{\n"
+        '    print("i =");\n    print(i);\n    print(s);\n    print(2.5);\n'
+        "}}\n",
+        lambda i: ["i =", i, "value", "2.500000"],
+    ),
+}
+
+
+def run(code, opt_level):
+    """Run `code` and return its output and the wall time of each phase."""
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "program.stl")
+        profile_path = os.path.join(directory, "profile.json")
+        with open(source_path, "w") as f:
+            f.write(code)
+        command = [sys.executable, STELLAR, "run", source_path, f"-O{opt_level}"]
+        command += ["--no-cache", "--profile-json", profile_path]
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        with open(profile_path) as f:
+            phases = json.load(f)["phases"]
+    return result.stdout, {phase["name"]: phase["wall_time"] for phase in phases}
+
+
+def python_print(lines, n):
+    """Time CPython printing the same lines to a file."""
+    with tempfile.TemporaryFile("w") as f:
+        start = time.perf_counter()
+        for i in range(n):
+            for line in lines(i):
+                print(line, file=f)
+        f.flush()
+        return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-n", type=int, default=1_000_000, help="iterations")
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=2)
+    args = arg_parser.parse_args()
+
+    print(f"-O{args.opt_level}, {args.n} iterations, ms")
+    print(
+        f"{'':<8} {'lines':>9} {'MB':>7} {'cpython':>9} {'execute':>9} {'speedup':>8}"
+    )
+    for name, (template, lines) in PROGRAMS.items():
+        output, times = run(template.format(n=args.n), args.opt_level)
+        expected = "".join(f"{line}\n" for i in range(3) for line in lines(i))
+        if not output.startswith(expected):
+            raise AssertionError(f"{name}: printed {output[:80]!r}")
+        python_time = python_print(lines, args.n)
+        execute = times["execute"]
+        print(
+            f"{name:<8} {output.count(chr(10)):>9} {len(output) / 2**20:>7.1f} "
+            f"{python_time * 1000:>9.1f} {execute * 1000:>9.1f} "
+            f"{python_time / execute:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Synthetic stellar programs for the benchmarks.
+
+    from program_generator import generate_program
+    code = generate_program(statements=10_000, depth=8, string_length=32)
+
+Programs are straight-line code over a few int, float and str variables:
+assignments of arithmetic expressions with `depth` operators, string
+assignments of `string_length` characters and prints. `print_density` is
+the fraction of statements that print. The same arguments and `seed` give
+the same program, so timings of different commits are comparable.
+"""
+import random
+import string
+
+INT_VARIABLES = ("a", "b", "c")
+FLOAT_VARIABLES = ("x", "y")
+STR_VARIABLES = ("s", "t")
+# Division only by literals, which are never zero
+OPERATORS = ("+", "-", "*")
+CHARACTERS = string.ascii_letters + string.digits + " ;{}()+-*/"
+
+
+def generate_expression(rng, depth, value_type):
+    variables = INT_VARIABLES if value_type == "int" else FLOAT_VARIABLES
+
+    def operand():
+        if rng.random() < 0.5:
+            return rng.choice(variables)
+        if value_type == "int":
+            return str(rng.randint(0, 99))
+        return f"{rng.randint(0, 99)}.{rng.randint(0, 9)}"
+
+    parts = [operand()]
+    for i in range(depth):
+        if i % 4 == 3:
+            # Some parentheses and divisions, so every parser level is used
+            divisor = rng.randint(1, 9)
+            divisor_literal = str(divisor) if value_type == "int" else f"{divisor}.0"
+            parts = ["(", *parts, ")", "/", divisor_literal]
+        else:
+            parts += [rng.choice(OPERATORS), operand()]
+    return " ".join(parts)
+
+
+def generate_string(rng, length):
+    # No quotes or backslashes, which would need escaping
+    return "".join(rng.choice(CHARACTERS) for _ in range(length))
+
+
+def generate_program(
+    statements: int,
+    depth: int = 4,
+    string_length: int = 16,
+    print_density: float = 0.1,
+    seed: int = 0,
+) -> str:
+    """A program of `statements` statements, declarations included."""
+    rng = random.Random(seed)
+    lines = [f"{name}: int = {i + 1};" for i, name in enumerate(INT_VARIABLES)]
+    lines += [f"{name}: float = {i + 1}.5;" for i, name in enumerate(FLOAT_VARIABLES)]
+    lines += [
+        f'{name}: str = "{generate_string(rng, string_length)}";'
+        for name in STR_VARIABLES
+    ]
+
+    while len(lines) < statements:
+        if rng.random() < print_density:
+            variable = rng.choice(INT_VARIABLES + FLOAT_VARIABLES + STR_VARIABLES)
+            lines.append(f"print({variable});")
+            continue
+        kind = rng.random()
+        if kind < 0.6:
+            variable = rng.choice(INT_VARIABLES)
+            lines.append(f"{variable} = {generate_expression(rng, depth, 'int')};")
+        elif kind < 0.9:
+            variable = rng.choice(FLOAT_VARIABLES)
+            lines.append(f"{variable} = {generate_expression(rng, depth, 'float')};")
+        else:
+            variable = rng.choice(STR_VARIABLES)
+            lines.append(f'{variable} = "{generate_string(rng, string_length)}";')
+    return "\n".join(lines[:statements]) + "\n"
@@ -0,0 +1,213 @@
+"""
+Measure how each compiler phase scales with the size of the program and
+catch throughput regressions between commits.
+
+Run from the repository root:
+
+    python benchmarks/scaling_benchmark.py --save baseline.json
+    # ... change the compiler ...
+    python benchmarks/scaling_benchmark.py --compare baseline.json
+
+Programs come from `program_generator` for each of `--sizes` statements.
+Every phase runs in isolation on the output of the previous one, and the
+whole pipeline from source to executed program runs once more end to end.
+Each measurement is the best of `--repeat` runs. Throughput is reported in
+the unit that phase works on: tokens, statements or IR instructions per
+second. A phase whose throughput drops with the size scales superlinearly.
+
+`--compare` exits with status 1 if any phase is slower than the baseline by
+more than `--threshold`, 0.2 meaning 20% less throughput.
+"""
+import argparse
+import ctypes
+import json
+import os
+import sys
+import time
+
+from program_generator import generate_program
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "stellar"))
+
+import llvm_code_generator  # noqa: E402
+import st_compiler  # noqa: E402
+import st_frontend  # noqa: E402
+import st_lexer  # noqa: E402
+import st_optimizer  # noqa: E402
+import st_parser  # noqa: E402
+import st_semantics  # noqa: E402
+from st_profiler import Profiler  # noqa: E402
+
+libc = ctypes.CDLL(None)
+
+
+class SilencedStdout:
+    """Send what the compiled program prints to /dev/null."""
+
+    def __enter__(self):
+        sys.stdout.flush()
+        self.saved = os.dup(1)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.close(devnull)
+
+    def __exit__(self, *exc_info):
+        libc.fflush(None)
+        os.dup2(self.saved, 1)
+        os.close(self.saved)
+
+
+def best_time(function, repeat):
+    """The result of `function` and its fastest time of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def jit(ir_text, opt_level):
+    """Compile and run the module, returning its jit and execute times."""
+    profiler = Profiler(enabled=True)
+    with SilencedStdout():
+        st_compiler.StellarCompiler(ir_text, opt_level).compile(profiler=profiler)
+    return {stats.name: stats.wall_time for stats in profiler.phases}
+
+
+def end_to_end(code, opt_level):
+    jit(str(st_frontend.generate_module(code)), opt_level)
+
+
+def measure(code, opt_level, repeat):
+    """Time and throughput of each phase on the program `code`."""
+    statements = code.count("\n")
+    results = {}
+
+    def record(phase, seconds, items, unit):
+        results[phase] = {
+            "seconds": seconds,
+            "items": items,
+            "unit": unit,
+            "throughput": items / seconds if seconds else float("inf"),
+        }
+
+    tokens, seconds = best_time(lambda: st_lexer.Lexer(code).parse(), repeat)
+    record("lexer", seconds, len(tokens), "tokens/s")
+
+    ast, seconds = best_time(lambda: st_parser.Parser(tokens).parse(), repeat)
+    record("parser", seconds, statements, "statements/s")
+
+    # Analysis and folding change the AST in place, so each run gets its own
+    asts = [st_parser.Parser(tokens).parse() for _ in range(repeat)]
+    _, seconds = best_time(
+        lambda: st_semantics.SemanticAnalyzer(asts.pop()).analyze(), repeat
+    )
+    record("semantics", seconds, statements, "statements/s")
+
+    asts = [st_parser.Parser(tokens).parse() for _ in range(repeat)]
+    for ast in asts:
+        st_semantics.SemanticAnalyzer(ast).analyze()
+    ast, seconds = best_time(
+        lambda: st_optimizer.ConstantFolder(asts.pop()).optimize(), repeat
+    )
+    record("optimizer", seconds, statements, "statements/s")
+
+    def generate():
+        generator = llvm_code_generator.LlvmGenerator(ast)
+        return generator, str(generator.module)
+
+    (generator, ir_text), seconds = best_time(generate, repeat)
+    instructions = generator.instruction_count()
+    record("codegen", seconds, instructions, "instructions/s")
+
+    jit_times = [jit(ir_text, opt_level) for _ in range(repeat)]
+    record(
+        "compiler",
+        min(times["jit"] for times in jit_times),
+        instructions,
+        "instructions/s",
+    )
+    record(
+        "execute",
+        min(times["execute"] for times in jit_times),
+        statements,
+        "statements/s",
+    )
+
+    _, seconds = best_time(lambda: end_to_end(code, opt_level), repeat)
+    record("end_to_end", seconds, statements, "statements/s")
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Print the throughput change of each phase, return the regressions."""
+    regressions = []
+    print(f"\nagainst baseline, regression threshold {threshold:.0%}")
+    for size, phases in current.items():
+        for phase, stats in phases.items():
+            before = baseline.get(size, {}).get(phase)
+            if before is None:
+                continue
+            change = stats["throughput"] / before["throughput"] - 1
+            flag = ""
+            if change < -threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, phase, change))
+            print(f"{size:>10} {phase:<12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 4_000, 16_000]
+    )
+    arg_parser.add_argument("--depth", type=int, default=4, help="operators")
+    arg_parser.add_argument("--string-length", type=int, default=16)
+    arg_parser.add_argument("--print-density", type=float, default=0.1)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("-O", dest="opt_level", type=int, default=0)
+    arg_parser.add_argument("--save", metavar="FILE", help="write the results")
+    arg_parser.add_argument("--compare", metavar="FILE", help="baseline to check")
+    arg_parser.add_argument("--threshold", type=float, default=0.2)
+    args = arg_parser.parse_args()
+
+    config = {
+        "depth": args.depth,
+        "string_length": args.string_length,
+        "print_density": args.print_density,
+        "seed": args.seed,
+        "opt_level": args.opt_level,
+    }
+    results = {}
+    for size in args.sizes:
+        code = generate_program(
+            size, args.depth, args.string_length, args.print_density, args.seed
+        )
+        results[str(size)] = measure(code, args.opt_level, args.repeat)
+
+    print(f"{'statements':>10} {'phase':<12} {'ms':>10} {'throughput':>14}")
+    for size, phases in results.items():
+        for phase, stats in phases.items():
+            print(
+                f"{size:>10} {phase:<12} {stats['seconds'] * 1000:>10.1f} "
+                f"{stats['throughput']:>14,.0f} {stats['unit']}"
+            )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            print(f"warning: the baseline was measured with {baseline['config']}")
+        if compare(baseline["results"], results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,209 @@
-import os
+import argparse
 import sys
-from pprint import pprint
+from typing import Optional
 
-import llvm_code_generator
+import st_cache
 import st_compiler
-import st_lexer
-import st_parser
-import st_semantics
+import st_driver
+import st_profiler
+import st_server
+
+
+def create_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        prog="stellar",
+        description="Compile and run stellar programs. Without a mode, runs them.",
+    )
+    modes = arg_parser.add_subparsers(dest="mode", metavar="mode")
+
+    # Options shared by every mode
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "path", help="stellar file or directory, or a compiled .ll or .bc module"
+    )
+    common.add_argument(
+        "--stream",
+        action="store_true",
+        help="lex, parse and generate IR statement by statement, "
+        "without dead store elimination",
+    )
+    common.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        choices=st_compiler.OPT_LEVELS,
+        default=0,
+        help="LLVM optimization level (default: 0)",
+    )
+    common.add_argument(
+        "--profile",
+        action="store_true",
+        help="print time, memory and counts of each compiler phase to stderr",
+    )
+    common.add_argument(
+        "--profile-json",
+        metavar="FILE",
+        help="write the per-phase profile as JSON to FILE",
+    )
+
+    run = modes.add_parser(
+        st_driver.RUN, parents=[common], help="compile and run (default)"
+    )
+    run.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="compile the files of a directory on this many processes",
+    )
+    run.add_argument(
+        "--save-ll",
+        action="store_true",
+        help="also write the generated module to output.ll",
+    )
+    run.add_argument(
+        "--save-bc",
+        action="store_true",
+        help="also write the generated module to output.bc",
+    )
+    run.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always recompile instead of reusing cached object code",
+    )
+
+    build = modes.add_parser(
+        st_driver.BUILD, parents=[common], help="link a native executable"
+    )
+    build.add_argument(
+        "-o",
+        "--output",
+        help="executable path, the source path without its suffix by default",
+    )
+    build.add_argument(
+        "--cpu",
+        default="",
+        help="target CPU, e.g. x86-64-v3, or 'native' for the host (default: generic)",
+    )
+    build.add_argument(
+        "--features",
+        default="",
+        help="target CPU features, e.g. +avx2,+fma (default: those of --cpu)",
+    )
+    build.add_argument(
+        "--save-ll",
+        action="store_true",
+        help="also write the generated module to output.ll",
+    )
+    build.add_argument(
+        "--save-bc",
+        action="store_true",
+        help="also write the generated module to output.bc",
+    )
+
+    modes.add_parser(
+        st_driver.WATCH,
+        parents=[common],
+        help="run a file again each time it is saved, recompiling only what changed",
+    )
+
+    for mode, help_text in (
+        (st_driver.EMIT_IR, "write the optimized LLVM IR (.ll)"),
+        (st_driver.EMIT_BC, "write the optimized LLVM bitcode (.bc)"),
+        (st_driver.EMIT_OBJ, "write a native object file (.o)"),
+    ):
+        emit = modes.add_parser(mode, parents=[common], help=help_text)
+        emit.add_argument(
+            "-o",
+            "--output",
+            help="output file, next to the source with the mode's suffix by default",
+        )
+
+    modes.add_parser(st_driver.DUMP_TOKENS, parents=[common], help="print the tokens")
+    modes.add_parser(st_driver.DUMP_AST, parents=[common], help="print the AST")
+
+    serve = modes.add_parser(
+        st_server.SERVE,
+        help="keep the compiler loaded and run the commands of stellar/st_client.py",
+    )
+    serve.add_argument(
+        "--socket",
+        help="Unix socket to listen on (default: $STELLAR_SOCKET, "
+        "or stellar.sock in $XDG_RUNTIME_DIR)",
+    )
+    return arg_parser
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    # `stellar file.stl` is short for `stellar run file.stl`
+    commands = (*st_driver.MODES, st_server.SERVE, "-h", "--help")
+    if argv and argv[0] not in commands:
+        argv = [st_driver.RUN, *argv]
+
+    arg_parser = create_arg_parser()
+    args = arg_parser.parse_args(argv)
+    if args.mode is None:
+        arg_parser.error("Please provide a file or directory path as an argument.")
+    return args
 
 
-def process_file(file_path):
-    with open(file_path, "r") as file:
-        code = file.read()
-
-        lexer = st_lexer.Lexer(code)
-        tokens = lexer.parse()
-        print("\n\nLexer:\n")
-        pprint(tokens, sort_dicts=False)
-
-        parser = st_parser.Parser(tokens)
-        ast = parser.parse()
-        print("\n\nParser:\n")
-        pprint(ast, sort_dicts=False)
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.mode == st_server.SERVE:
+        serve(args)
+    else:
+        run_command(args)
 
-        semantic_analyzer = st_semantics.SemanticAnalyzer(ast)
-        semantic_analyzer.analyze()
 
-        llvm_generator = llvm_code_generator.LlvmGenerator(ast)
-        print("\n\nCompiler:\n")
-        print(llvm_generator.module)
+def serve(args: argparse.Namespace) -> None:
+    sessions = st_server.warm_sessions()
 
-        print("\nResult:")
-        stellar_compiler = st_compiler.StellarCompiler(str(llvm_generator.module))
-        stellar_compiler.compile()
+    def handle(argv: list[str]) -> None:
+        request = parse_args(argv)
+        if request.mode in (st_driver.WATCH, st_server.SERVE):
+            raise SystemExit(f"stellar: {request.mode} does not run on the server")
+        run_command(request, sessions[request.opt_level])
 
+    st_server.CompileServer(handle, args.socket).serve_forever()
 
-def process_directory(directory_path):
-    for root, _, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith(".stl"):
-                file_path = os.path.join(root, file)
-                process_file(file_path)
 
+def run_command(
+    args: argparse.Namespace, session: Optional[st_compiler.JitSession] = None
+) -> None:
+    profiler = st_profiler.Profiler(enabled=args.profile or bool(args.profile_json))
+    profiler.start()
 
-def main():
-    # Check the command-line arguments
-    if len(sys.argv) < 2:
-        print("Please provide a file or directory path as an argument.")
-        return
-
-    path = sys.argv[1]
-
-    if os.path.isfile(path):
-        # If the provided path is a file, process it
-        if path.endswith(".stl"):
-            process_file(path)
-        else:
-            raise Exception("Not a stellar file.")
-    elif os.path.isdir(path):
-        # TODO
-        # If the provided path is a directory, process all files within it
-        process_directory(path)
+    use_cache = args.mode == st_driver.RUN and not args.no_cache
+    cache = st_cache.CompilationCache() if use_cache else None
+    if session is None:
+        # One JIT engine is shared by every file compiled in this run
+        session = st_compiler.JitSession(args.opt_level, cache)
     else:
-        print("Invalid path. Please provide a valid file or directory path.")
+        # A warm session of the server, in the process of this request
+        session.cache = cache
+
+    driver = st_driver.Driver(
+        session,
+        mode=args.mode,
+        stream=args.stream,
+        jobs=getattr(args, "jobs", 1),
+        output=getattr(args, "output", None),
+        profiler=profiler,
+        save_assembly=getattr(args, "save_ll", False),
+        save_bitcode=getattr(args, "save_bc", False),
+        cpu=getattr(args, "cpu", ""),
+        features=getattr(args, "features", ""),
+    )
+    driver.process_path(args.path)
+
+    profiler.stop()
+    if args.profile:
+        print(profiler.report(), file=sys.stderr)
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            f.write(profiler.to_json())
+    if driver.status:
+        sys.exit(driver.status)
 
 
 if __name__ == "__main__":
@@ -11,3 +11,19 @@ class SyntaxError(Exception):
         {code.splitlines()[line_number]}"
 
         super().__init__(self.message)
+
+
+class UnexpectedTokenError(Exception):
+    def __init__(self, token, expected=None) -> None:
+        self.token = token
+        self.expected = expected
+        if token is None:
+            self.message = "Unexpected end of input"
+        else:
+            self.message = (
+                f"Unexpected token '{token.pattern}' on line {token.line_number}"
+            )
+        if expected:
+            self.message += f", expected {expected}"
+
+        super().__init__(self.message)
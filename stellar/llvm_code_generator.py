@@ -1,10 +1,34 @@
 from abc import ABC, abstractmethod
 
 from llvmlite import ir
+from st_ast import (
+    AppendStatement,
+    AssignmentStatement,
+    BinaryOperation,
+    Comparison,
+    ExpressionStatement,
+    ForStatement,
+    FunctionCall,
+    FunctionDeclaration,
+    IfStatement,
+    IndexAssignmentStatement,
+    IndexOperation,
+    LengthOperation,
+    ListLiteral,
+    Literal,
+    PrintStatement,
+    ReturnStatement,
+    Variable,
+    VariableDeclaration,
+    WhileStatement,
+    element_type,
+)
+from st_symbols import FunctionSymbol, Symbol
 
 bool_t = ir.IntType(1)
 int8 = ir.IntType(8)
 int32 = ir.IntType(32)
+int64 = ir.IntType(64)
 flt32 = ir.FloatType()
 flt64 = ir.DoubleType()
 void_pointer = ir.IntType(8).as_pointer()
@@ -14,11 +38,48 @@ false_bit = bool_t(0)
 true_byte = int8(1)
 false_byte = int8(0)
 
-PRINT_MAP = {
-    "INT": "%d",
-    "STR": "%s",
-    "FLOAT": "%f",
-    # TODO list
+# Predicate of each comparison operator, for icmp and fcmp
+COMPARISON_PREDICATES = {
+    "EQUAL": "==",
+    "NOT_EQUAL": "!=",
+    "LESS": "<",
+    "LESS_EQUAL": "<=",
+    "GREATER": ">",
+    "GREATER_EQUAL": ">=",
+}
+
+# How values are stored, by type. Lists are pointers to their header.
+VALUE_TYPES = {
+    "INT": int32,
+    "STR": void_pointer,
+    "FLOAT": flt64,
+    "BOOL": bool_t,
+    "VOID": ir.VoidType(),
+}
+
+# How the elements of a list are stored and printed, by element type
+ELEMENT_TYPES = {
+    "INT": int32,
+    "FLOAT": flt64,
+    "STR": void_pointer,
+}
+# Printed around each element of a list, by element type
+ELEMENT_QUOTES = {
+    "INT": "",
+    "STR": "'",
+    "FLOAT": "",
+}
+
+# Instruction of each arithmetic operator, by operand type
+ARITHMETIC_INSTRUCTIONS = {
+    ("INT", "PLUS"): ir.IRBuilder.add,
+    ("INT", "MINUS"): ir.IRBuilder.sub,
+    ("INT", "MULTIPLY"): ir.IRBuilder.mul,
+    ("INT", "DIVIDE"): ir.IRBuilder.sdiv,
+    ("FLOAT", "PLUS"): ir.IRBuilder.fadd,
+    ("FLOAT", "MINUS"): ir.IRBuilder.fsub,
+    ("FLOAT", "MULTIPLY"): ir.IRBuilder.fmul,
+    ("FLOAT", "DIVIDE"): ir.IRBuilder.fdiv,
 }
 
 
@@ -29,123 +90,384 @@ class LlvmGenerator:
         # Create a new LLVM module
         self.module = ir.Module()
 
-        # Define a dictionary to store variable values
-        self.variables: dict = {}
-
         # Create a new LLVM function
-        self.function_type = ir.FunctionType(ir.VoidType(), [])
-        self.function = ir.Function(self.module, self.function_type, name="main")
+        # The program returns an exit code, `main` calls it and returns it,
+        # so compiled programs can be linked as is
+        self.function_type = ir.FunctionType(int32, [])
+        self.function = ir.Function(
+            self.module, self.function_type, name="stellar.program"
+        )
+        self.function.linkage = "internal"
+        self.main = None
         self.block = self.function.append_basic_block(name="entry")
 
         # Create a new LLVM builder
         self.builder = ir.IRBuilder(self.block)
 
-        # Load the printf function
-        self.printf_func = ir.Function(
-            self.module,
-            ir.FunctionType(int32, [void_pointer], var_arg=True),
-            name="printf",
-        )
+        self.strings = StringPool(self.module)
+        self.output = PrintRuntime(self.module, self.strings)
+        self.errors = ErrorRuntime(self.module, self.strings)
+        self.lists = ListRuntime(self.module, self.strings, self.output, self.errors)
+
+        self.statement_generators = {
+            VariableDeclaration: self.generate_variable_declaration,
+            AssignmentStatement: self.generate_assignment,
+            IndexAssignmentStatement: self.generate_index_assignment,
+            AppendStatement: self.generate_append,
+            IfStatement: self.generate_if,
+            WhileStatement: self.generate_while,
+            ForStatement: self.generate_for,
+            FunctionDeclaration: self.generate_function,
+            ReturnStatement: self.generate_return,
+            ExpressionStatement: self.generate_expression_statement,
+        }
 
         self.generate_llvm_ir(self.ast)
 
-        self.builder.ret_void()
+        if self.output.used:
+            self.builder.call(self.output.flush_function(), [])
+        self.builder.ret(int32(0))
+        self.generate_main()
 
-    def printf(self, expression):
-        if not len(expression):
-            # TODO, print \n
-            pass
+    def generate_main(self) -> None:
+        """
+        Define `main`, calling the program. If the program can raise a
+        runtime error, `main` returns the error's exit status instead.
+        """
+        if self.main is None:
+            self.main = ir.Function(self.module, self.function_type, name="main")
+        else:
+            self.main.blocks.clear()
+        builder = ir.IRBuilder(self.main.append_basic_block("entry"))
+        if self.errors.used:
+            self.errors.catch(builder, self.function)
+        else:
+            builder.ret(builder.call(self.function, []))
 
-        elif expression["node_type"] == "variable":
-            variable_name = expression["name"]
-            variable = self.variables[variable_name]
-            variable_type = variable["type"]
+    def instruction_count(self) -> int:
+        return sum(
+            len(block.instructions)
+            for function in self.module.functions
+            for block in function.blocks
+        )
 
-            format_str = f"{PRINT_MAP[variable_type]}\n"
+    def generate_prints(self, nodes: list[PrintStatement]):
+        """
+        Write adjacent print statements into the output buffer together.
 
-            format_str_ptr = Str(self.builder, format_str).get()
+        Literals are formatted here and merged with the newlines around
+        them into one constant, so a run of prints becomes a single copy of
+        that text between the appends of the values only known at runtime.
+        """
+        text = ""
+        for node in nodes:
+            expression = node.expression
+            if expression is None:
+                # TODO, print \n
+                continue
+            if type(expression) is Literal:
+                text += format_literal(expression) + "\n"
+                continue
+            # The expression may call a function that prints too
+            if text:
+                self.output.write_text(self.builder, text)
+            self.write_value(expression)
+            text = "\n"
+        if text:
+            self.output.write_text(self.builder, text)
 
-            self.builder.call(
-                self.printf_func, [format_str_ptr, self.builder.load(variable["var"])]
+    def write_value(self, expression):
+        value = self.parse_node(expression)
+        value_type = expression.value_type
+        list_element_type = element_type(value_type)
+        if list_element_type is not None:
+            print_list = self.lists.print_function(list_element_type)
+            self.builder.call(print_list, [value])
+            return
+        if value_type == "BOOL":
+            value = self.builder.select(
+                value, self.strings.get("true"), self.strings.get("false")
             )
-        elif expression["node_type"] in PRINT_MAP:
-            format_str = f"{PRINT_MAP[expression['node_type']]}\n"
-            format_str_ptr = Str(self.builder, format_str).get()
-
-            value = VariableGeneratorFactory.create_generator(self.builder, expression)
-
-            self.builder.call(self.printf_func, [format_str_ptr, value.get()])
-
-    def parse_node(self, node):
-        if node["node_type"] == "binary_operation":
-            operator = node["operator"]
-            left_operand = node["left_operand"]
-            right_operand = node["right_operand"]
-
-            # Generate LLVM IR code for the left and right operands
-            left_value = self.parse_node(left_operand)
-
-            right_value = self.parse_node(right_operand)
-            # Perform the binary operation based on the operator
-            if operator == "PLUS":
-                result = self.builder.add(left_value, right_value)
-            elif operator == "MINUS":
-                result = self.builder.sub(left_value, right_value)
-            elif operator == "MULTIPLY":
-                result = self.builder.mul(left_value, right_value)
-            elif operator == "DIVIDE":
-                result = self.builder.sdiv(left_value, right_value)
-            else:
-                raise ValueError(f"Invalid operator: {operator}")
-        elif node["node_type"] in PRINT_MAP.keys():
-            value = VariableGeneratorFactory.create_generator(self.builder, node)
-            return value.get()
-        elif node["node_type"] == "variable":
-            return self.builder.load(self.variables[node["name"]]["var"])
-        else:
-            result = None
-        return result
+            value_type = "STR"
+        self.builder.call(self.output.write_function(value_type), [value])
 
-    def generate_llvm_ir(self, tree):
-        for node in tree:
-            node_type = node["node_type"]
-            if node_type == "variable_declaration":
-                variable_name = node["variable_name"]
-                variable_type = node["variable_type"]
-                expression = node["expression"]
-                # TODO types
-                if variable_type == "INT":
-                    variable = self.builder.alloca(int32, name=variable_name)
-                elif variable_type == "STR":
-                    variable = self.builder.alloca(void_pointer, name=variable_name)
-                elif variable_type == "FLOAT":
-                    variable = self.builder.alloca(flt64, name=variable_name)
-                elif variable_type == "LIST":
-                    # TODO
+    def parse_node(self, root):
+        """
+        Generate the code of the expression `root` and return its value.
+
+        The semantic analyzer annotated every node with its type, so the
+        operations are lowered in one post-order walk over an explicit stack.
+        """
+        values = []
+        # (node, whether its operands were already generated)
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            node_class = type(node)
+            if node_class is BinaryOperation:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.right_operand, False))
+                    stack.append((node.left_operand, False))
+                    continue
+                instruction = ARITHMETIC_INSTRUCTIONS.get(
+                    (node.value_type, node.operator)
+                )
+                if instruction is None:
+                    raise ValueError(
+                        f"Invalid operator: {node.operator} for {node.value_type}"
+                    )
+                right_value = values.pop()
+                left_value = values.pop()
+                values.append(instruction(self.builder, left_value, right_value))
+            elif node_class is Comparison:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.right_operand, False))
+                    stack.append((node.left_operand, False))
                     continue
-                else:
-                    variable = None
+                right_value = values.pop()
+                left_value = values.pop()
+                values.append(self.compare(node, left_value, right_value))
+            elif node_class is IndexOperation:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.index, False))
+                    stack.append((node.target, False))
+                    continue
+                index = values.pop()
+                target = values.pop()
+                get = self.lists.get_function(node.value_type)
+                values.append(self.builder.call(get, [target, index]))
+            elif node_class is LengthOperation:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.target, False))
+                    continue
+                values.append(self.lists.length(self.builder, values.pop()))
+            elif node_class is Literal:
+                value = VariableGeneratorFactory.create_generator(self.strings, node)
+                values.append(value.get())
+            elif node_class is Variable:
+                values.append(self.builder.load(node.symbol.value))
+            elif node_class is ListLiteral:
+                elements = [self.parse_node(el) for el in node.elements]
+                value = List(self.lists, self.builder, node.value_type, elements)
+                values.append(value.get())
+            elif node_class is FunctionCall:
+                if not operands_done:
+                    stack.append((node, True))
+                    for argument in reversed(node.arguments):
+                        stack.append((argument, False))
+                    continue
+                first = len(values) - len(node.arguments)
+                arguments = values[first:]
+                del values[first:]
+                values.append(
+                    self.builder.call(node.symbol.value, arguments, cconv="fastcc")
+                )
+            else:
+                values.append(None)
+        return values.pop()
+
+    def compare(self, node: Comparison, left_value, right_value):
+        predicate = COMPARISON_PREDICATES[node.operator]
+        if node.left_operand.value_type == "INT":
+            return self.builder.icmp_signed(predicate, left_value, right_value)
+        # Like Python, only != holds for NaN
+        if node.operator == "NOT_EQUAL":
+            return self.builder.fcmp_unordered(predicate, left_value, right_value)
+        return self.builder.fcmp_ordered(predicate, left_value, right_value)
 
-                if expression:
-                    result = self.parse_node(expression)
-                    self.builder.store(result, variable)
-                self.variables[variable_name] = {
-                    "type": variable_type,
-                    "var": variable,
-                }
+    def llvm_type(self, value_type: str):
+        """LLVM type of values of `value_type`, None for unsupported types."""
+        list_element_type = element_type(value_type)
+        if list_element_type is not None:
+            return self.lists.pointer_type(list_element_type)
+        return VALUE_TYPES.get(value_type)
 
-            elif node_type == "assignment_statement":
-                variable_name = node["variable_name"]
-                expression = node["expression"]
+    def allocate(self, symbol: Symbol):
+        """Storage for the variable `symbol`, in the entry block of its function."""
+        # Allocas outside the entry block would not be promoted to registers
+        with self.builder.goto_entry_block():
+            return self._alloca(symbol.name, symbol.variable_type)
 
-                # Generate LLVM IR code for the expression
-                result = self.parse_node(expression)
+    def _alloca(self, variable_name: str, variable_type: str):
+        value_type = self.llvm_type(variable_type)
+        if value_type is None or variable_type == "VOID":
+            return None
+        return self.builder.alloca(value_type, name=variable_name)
 
-                # Create a new LLVM variable
-                self.builder.store(result, self.variables[variable_name]["var"])
-            elif node_type == "print_statement":
-                expression = node["expression"]
-                self.printf(expression)
+    def declare_function(self, symbol: FunctionSymbol) -> ir.Function:
+        """
+        The `ir.Function` of `symbol`. Functions are internal and use the
+        fast calling convention, LLVM sees all their calls and is free to
+        inline them or change how arguments are passed.
+        """
+        function_type = ir.FunctionType(
+            self.llvm_type(symbol.return_type),
+            [self.llvm_type(parameter) for parameter in symbol.parameter_types],
+        )
+        # Prefixed, so functions cannot clash with `main` or the C library
+        name = self.module.get_unique_name(f"stellar.fn.{symbol.name}")
+        function = ir.Function(self.module, function_type, name=name)
+        function.linkage = "internal"
+        function.calling_convention = "fastcc"
+        symbol.value = function
+        return function
+
+    def start_block(self, block: ir.Block) -> None:
+        """Continue generating in `block`, placed after all blocks so far."""
+        blocks = self.builder.function.blocks
+        blocks.remove(block)
+        blocks.append(block)
+        self.builder.position_at_end(block)
+
+    def branch_if_open(self, target: ir.Block) -> None:
+        if not self.builder.block.is_terminated:
+            self.builder.branch(target)
+
+    def generate_variable_declaration(self, node: VariableDeclaration):
+        # The variable's storage is kept on its symbol for all later uses
+        symbol = node.symbol
+        symbol.value = self.allocate(symbol)
+
+        if node.expression:
+            result = self.parse_node(node.expression)
+            self.builder.store(result, symbol.value)
+
+    def generate_assignment(self, node: AssignmentStatement):
+        # Generate LLVM IR code for the expression
+        result = self.parse_node(node.expression)
+
+        # Create a new LLVM variable
+        self.builder.store(result, node.symbol.value)
+
+    def generate_index_assignment(self, node: IndexAssignmentStatement):
+        target = self.parse_node(node.target)
+        index = self.parse_node(node.index)
+        value = self.parse_node(node.expression)
+        set_function = self.lists.set_function(node.expression.value_type)
+        self.builder.call(set_function, [target, index, value])
+
+    def generate_append(self, node: AppendStatement):
+        target = self.parse_node(node.target)
+        value = self.parse_node(node.expression)
+        append = self.lists.append_function(node.expression.value_type)
+        self.builder.call(append, [target, value])
+
+    def generate_if(self, node: IfStatement):
+        function = self.builder.function
+        then_block = function.append_basic_block("if.then")
+        end_block = function.append_basic_block("if.end")
+        else_block = function.append_basic_block("if.else") if node.orelse else None
+
+        condition = self.parse_node(node.condition)
+        self.builder.cbranch(condition, then_block, else_block or end_block)
+
+        self.start_block(then_block)
+        self.generate_llvm_ir(node.body)
+        self.branch_if_open(end_block)
+
+        if else_block is not None:
+            self.start_block(else_block)
+            self.generate_llvm_ir(node.orelse)
+            self.branch_if_open(end_block)
+
+        self.start_block(end_block)
+
+    def generate_while(self, node: WhileStatement):
+        function = self.builder.function
+        condition_block = function.append_basic_block("while.cond")
+        body_block = function.append_basic_block("while.body")
+        end_block = function.append_basic_block("while.end")
+        self.builder.branch(condition_block)
+
+        self.start_block(condition_block)
+        condition = self.parse_node(node.condition)
+        self.builder.cbranch(condition, body_block, end_block)
+
+        self.start_block(body_block)
+        self.generate_llvm_ir(node.body)
+        self.branch_if_open(condition_block)
+
+        self.start_block(end_block)
+
+    def generate_for(self, node: ForStatement):
+        """
+        Lower the loop in the canonical shape LLVM's loop passes expect: the
+        bounds are computed in the preheader, the header only compares the
+        counter and the latch increments it. Once the counter is promoted to
+        a register it is a phi of the header.
+        """
+        function = self.builder.function
+        condition_block = function.append_basic_block("for.cond")
+        body_block = function.append_basic_block("for.body")
+        step_block = function.append_basic_block("for.step")
+        end_block = function.append_basic_block("for.end")
+
+        counter = node.symbol.value = self.allocate(node.symbol)
+        self.builder.store(self.parse_node(node.start), counter)
+        stop = self.parse_node(node.stop)
+        self.builder.branch(condition_block)
+
+        self.start_block(condition_block)
+        more = self.builder.icmp_signed("<", self.builder.load(counter), stop)
+        self.builder.cbranch(more, body_block, end_block)
+
+        self.start_block(body_block)
+        self.generate_llvm_ir(node.body)
+        self.branch_if_open(step_block)
+
+        self.start_block(step_block)
+        step = self.builder.add(self.builder.load(counter), int32(1))
+        self.builder.store(step, counter)
+        self.builder.branch(condition_block)
+
+        self.start_block(end_block)
+
+    def generate_function(self, node: FunctionDeclaration):
+        function = self.declare_function(node.symbol)
+        # The body goes into its own function, then `main` continues
+        main_builder = self.builder
+        self.builder = ir.IRBuilder(function.append_basic_block("entry"))
+        for argument, parameter in zip(function.args, node.parameters):
+            parameter.value = self.allocate(parameter)
+            self.builder.store(argument, parameter.value)
+
+        self.generate_llvm_ir(node.body)
+        if not self.builder.block.is_terminated:
+            if node.return_type == "VOID":
+                self.builder.ret_void()
+            else:
+                # The semantic analyzer checked that every path returns
+                self.builder.unreachable()
+        self.builder = main_builder
+
+    def generate_return(self, node: ReturnStatement):
+        if node.expression is None:
+            self.builder.ret_void()
+        else:
+            self.builder.ret(self.parse_node(node.expression))
+
+    def generate_expression_statement(self, node: ExpressionStatement):
+        self.parse_node(node.expression)
+
+    def generate_llvm_ir(self, tree):
+        prints: list[PrintStatement] = []
+        for node in tree:
+            # Statements after a return are never reached
+            if self.builder.block.is_terminated:
+                break
+            if type(node) is PrintStatement:
+                prints.append(node)
+                continue
+            if prints:
+                self.generate_prints(prints)
+                prints = []
+            self.statement_generators[type(node)](node)
+        if prints:
+            self.generate_prints(prints)
 
 
 class LLVMGenerator(ABC):
@@ -154,48 +476,68 @@ class LLVMGenerator(ABC):
         ...
 
 
+def format_literal(literal: Literal) -> str:
+    """A literal the way it is printed at runtime."""
+    if literal.value_type == "INT":
+        # Wrapped like the i32 constant it would be
+        return str((int(literal.value) + 2**31) % 2**32 - 2**31)
+    if literal.value_type == "FLOAT":
+        return "%f" % float(literal.value)
+    return literal.value
+
+
 class VariableGeneratorFactory:
     @staticmethod
-    def create_generator(builder, expression):
-        if expression["node_type"] == "STR":
-            return Str(builder, expression["value"])
-        elif expression["node_type"] == "INT":
-            return Int(expression["value"])
-        elif expression["node_type"] == "FLOAT":
-            return Float(expression["value"])
+    def create_generator(strings: "StringPool", expression: Literal):
+        if expression.value_type == "STR":
+            return Str(strings, expression.value)
+        elif expression.value_type == "INT":
+            return Int(expression.value)
+        elif expression.value_type == "FLOAT":
+            return Float(expression.value)
         else:
             # TODO
-            raise ValueError(f"Unsupported node type: {expression['node_type']}")
+            raise ValueError(f"Unsupported node type: {expression.value_type}")
 
 
-class Str(LLVMGenerator):
-    def __init__(self, builder: ir.IRBuilder, string: str) -> None:
-        self.builder = builder
-        self.string = string
+class StringPool:
+    """
+    Interned, null terminated string constants of a module.
 
-    def get(self):
-        # Create a local format string
-        format_type = ir.ArrayType(int8, len(self.string) + 1)  # +1 for null terminator
-        format_variable = self.builder.alloca(
-            format_type
-        )  # Allocate memory for the format string
-        # Store each character of the format string in the allocated memory
-        for i, char in enumerate(self.string):
-            # Get the pointer to the i-th character in the format string
-            ptr = self.builder.gep(
-                format_variable, [ir.Constant(int32, 0), ir.Constant(int32, i)]
+    Every distinct string is emitted once as a private global and all uses
+    share a constant i8* pointer to its first character.
+    """
+
+    def __init__(self, module: ir.Module) -> None:
+        self.module = module
+        self._pointers: dict[str, ir.Constant] = {}
+
+    def get(self, string: str) -> ir.Constant:
+        pointer = self._pointers.get(string)
+        if pointer is None:
+            data = bytearray(string.encode("utf-8")) + b"\0"
+            initializer = ir.Constant(ir.ArrayType(int8, len(data)), data)
+
+            variable = ir.GlobalVariable(
+                self.module, initializer.type, name=f".str.{len(self._pointers)}"
             )
-            # Store the ASCII value of the character in the memory location
-            self.builder.store(ir.Constant(int8, ord(char)), ptr)
+            variable.linkage = "private"
+            variable.global_constant = True
+            variable.unnamed_addr = True
+            variable.initializer = initializer
 
-        # Add a null terminator to the end of the format string
-        ptr = self.builder.gep(
-            format_variable,
-            [ir.Constant(int32, 0), ir.Constant(int32, len(self.string))],
-        )
-        self.builder.store(ir.Constant(int8, 0), ptr)
-        # Bitcast the format string variable to an i8* type and return it
-        return self.builder.bitcast(format_variable, void_pointer)
+            pointer = variable.gep([int32(0), int32(0)])
+            self._pointers[string] = pointer
+        return pointer
+
+
+class Str(LLVMGenerator):
+    def __init__(self, strings: StringPool, string: str) -> None:
+        self.strings = strings
+        self.string = string
+
+    def get(self) -> ir.Constant:
+        return self.strings.get(self.string)
 
 
 class Float(LLVMGenerator):
@@ -203,7 +545,7 @@ class Float(LLVMGenerator):
         self.flt = flt
 
     def get(self) -> ir.Constant:
-        return ir.Constant(flt64, self.flt)
+        return ir.Constant(flt64, float(self.flt))
 
 
 class Int(LLVMGenerator):
@@ -211,12 +553,658 @@ class Int(LLVMGenerator):
         self.integer = integer
 
     def get(self) -> ir.Constant:
-        return ir.Constant(int32, self.integer)
+        return ir.Constant(int32, int(self.integer))
 
 
 class List(LLVMGenerator):
-    def get(self):
-        pass
+    """A new list holding the already generated `elements`."""
+
+    def __init__(
+        self,
+        lists: "ListRuntime",
+        builder: ir.IRBuilder,
+        list_type: str,
+        elements: list,
+    ) -> None:
+        self.lists = lists
+        self.builder = builder
+        self.element_type = element_type(list_type)
+        self.elements = elements
+
+    def get(self) -> ir.Value:
+        builder = self.builder
+        capacity = int32(len(self.elements))
+        new_list = self.lists.new_function(self.element_type)
+        pointer = builder.call(new_list, [capacity])
+
+        # Store the elements straight into the buffer, no appends needed
+        data = builder.load(self.lists.field(builder, pointer, ListRuntime.DATA))
+        for index, element in enumerate(self.elements):
+            builder.store(element, builder.gep(data, [int32(index)]))
+        builder.store(capacity, self.lists.field(builder, pointer, ListRuntime.LENGTH))
+        return pointer
+
+
+class Runtime:
+    """
+    Functions of the generated program's runtime, emitted into a module
+    on first use.
+
+    All functions have internal linkage, so every module carries its own
+    copy and the optimizer can inline them into their callers.
+    """
+
+    def __init__(self, module: ir.Module, strings: StringPool) -> None:
+        self.module = module
+        self.strings = strings
+        self._functions: dict[str, ir.Function] = {}
+
+    @property
+    def used(self) -> bool:
+        return bool(self._functions)
+
+    def _function(self, name, return_type, argument_types, define) -> ir.Function:
+        function = self._functions.get(name)
+        if function is None:
+            function_type = ir.FunctionType(return_type, argument_types)
+            function = ir.Function(self.module, function_type, name=name)
+            function.linkage = "internal"
+            self._functions[name] = function
+            define(function)
+        return function
+
+    def _libc(self, name: str, return_type, argument_types, var_arg=False):
+        function = self.module.globals.get(name)
+        if function is None:
+            function_type = ir.FunctionType(return_type, argument_types, var_arg)
+            function = ir.Function(self.module, function_type, name=name)
+        return function
+
+
+class ListRuntime(Runtime):
+    """
+    The functions operating on lists, emitted into a module on first use.
+
+    A list is a pointer to a header `{i32 length, i32 capacity, T* data}`.
+    Elements are stored unboxed in one contiguous malloc'd buffer, whose
+    capacity doubles whenever an append finds it full. Lists are never
+    freed, they live until the program exits.
+
+    An index out of range is reported on stderr and raised as an error
+    with exit status 1.
+    """
+
+    # Fields of the header
+    LENGTH = 0
+    CAPACITY = 1
+    DATA = 2
+
+    INITIAL_CAPACITY = 4
+
+    INDEX_ERROR_STATUS = 1
+
+    def __init__(
+        self,
+        module: ir.Module,
+        strings: StringPool,
+        output: "PrintRuntime",
+        errors: "ErrorRuntime",
+    ) -> None:
+        super().__init__(module, strings)
+        self.output = output
+        self.errors = errors
+
+    @staticmethod
+    def pointer_type(element: str) -> ir.PointerType:
+        element_pointer = ELEMENT_TYPES[element].as_pointer()
+        return ir.LiteralStructType([int32, int32, element_pointer]).as_pointer()
+
+    @staticmethod
+    def field(builder: ir.IRBuilder, pointer: ir.Value, field: int) -> ir.Value:
+        return builder.gep(pointer, [int32(0), int32(field)], inbounds=True)
+
+    def length(self, builder: ir.IRBuilder, pointer: ir.Value) -> ir.Value:
+        return builder.load(self.field(builder, pointer, self.LENGTH))
+
+    def new_function(self, element: str) -> ir.Function:
+        """`T* new(i32 capacity)`, an empty list with room for `capacity`."""
+        return self._function(
+            f"stellar.list.{element}.new",
+            self.pointer_type(element),
+            [int32],
+            lambda function: self._define_new(function, element),
+        )
+
+    def append_function(self, element: str) -> ir.Function:
+        """`void append(list, T value)`"""
+        element_type = ELEMENT_TYPES[element]
+        return self._function(
+            f"stellar.list.{element}.append",
+            ir.VoidType(),
+            [self.pointer_type(element), element_type],
+            lambda function: self._define_append(function, element),
+        )
+
+    def get_function(self, element: str) -> ir.Function:
+        """`T get(list, i32 index)`, bounds checked."""
+        return self._function(
+            f"stellar.list.{element}.get",
+            ELEMENT_TYPES[element],
+            [self.pointer_type(element), int32],
+            self._define_get,
+        )
+
+    def set_function(self, element: str) -> ir.Function:
+        """`void set(list, i32 index, T value)`, bounds checked."""
+        return self._function(
+            f"stellar.list.{element}.set",
+            ir.VoidType(),
+            [self.pointer_type(element), int32, ELEMENT_TYPES[element]],
+            self._define_set,
+        )
+
+    def print_function(self, element: str) -> ir.Function:
+        """`void print(list)`, writing it like `[1, 2, 3]` to the output."""
+        return self._function(
+            f"stellar.list.{element}.print",
+            ir.VoidType(),
+            [self.pointer_type(element)],
+            lambda function: self._define_print(function, element),
+        )
+
+    @staticmethod
+    def _size_of(type_: ir.Type) -> ir.Constant:
+        """Size of `type_` in bytes as a constant expression."""
+        null = ir.Constant(type_.as_pointer(), None)
+        return null.gep([int32(1)]).ptrtoint(int64)
+
+    def _buffer_size(self, builder: ir.IRBuilder, element: str, capacity):
+        capacity = builder.zext(capacity, int64)
+        return builder.mul(capacity, self._size_of(ELEMENT_TYPES[element]))
+
+    def _define_new(self, function: ir.Function, element: str) -> None:
+        malloc = self._libc("malloc", void_pointer, [int64])
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        (capacity,) = function.args
+        list_type = function.return_value.type
+
+        header = builder.call(malloc, [self._size_of(list_type.pointee)])
+        pointer = builder.bitcast(header, list_type)
+        buffer = builder.call(malloc, [self._buffer_size(builder, element, capacity)])
+        data = builder.bitcast(buffer, ELEMENT_TYPES[element].as_pointer())
+
+        builder.store(int32(0), self.field(builder, pointer, self.LENGTH))
+        builder.store(capacity, self.field(builder, pointer, self.CAPACITY))
+        builder.store(data, self.field(builder, pointer, self.DATA))
+        builder.ret(pointer)
+
+    def _define_append(self, function: ir.Function, element: str) -> None:
+        realloc = self._libc("realloc", void_pointer, [void_pointer, int64])
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        grow_block = function.append_basic_block("grow")
+        store_block = function.append_basic_block("store")
+        pointer, value = function.args
+
+        length = builder.load(self.field(builder, pointer, self.LENGTH))
+        capacity_field = self.field(builder, pointer, self.CAPACITY)
+        capacity = builder.load(capacity_field)
+        full = builder.icmp_unsigned("==", length, capacity)
+        builder.cbranch(full, grow_block, store_block)
+
+        # Double the buffer, so appends take amortized constant time
+        builder.position_at_end(grow_block)
+        is_empty = builder.icmp_unsigned("==", capacity, int32(0))
+        doubled = builder.shl(capacity, int32(1))
+        new_capacity = builder.select(is_empty, int32(self.INITIAL_CAPACITY), doubled)
+        data_field = self.field(builder, pointer, self.DATA)
+        buffer = builder.bitcast(builder.load(data_field), void_pointer)
+        size = self._buffer_size(builder, element, new_capacity)
+        new_buffer = builder.call(realloc, [buffer, size])
+        data = builder.bitcast(new_buffer, ELEMENT_TYPES[element].as_pointer())
+        builder.store(data, data_field)
+        builder.store(new_capacity, capacity_field)
+        builder.branch(store_block)
+
+        builder.position_at_end(store_block)
+        data = builder.load(self.field(builder, pointer, self.DATA))
+        builder.store(value, builder.gep(data, [length]))
+        new_length = builder.add(length, int32(1))
+        builder.store(new_length, self.field(builder, pointer, self.LENGTH))
+        builder.ret_void()
+
+    def _element_pointer(self, function: ir.Function) -> tuple:
+        """
+        Emit the bounds check of a get or set `function`. Returns a builder
+        positioned after it and the address of the indexed element.
+        """
+        pointer, index = function.args[:2]
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        fail_block = function.append_basic_block("index_error")
+        ok_block = function.append_basic_block("in_bounds")
+
+        length = self.length(builder, pointer)
+        # Negative indices are huge when compared unsigned
+        in_bounds = builder.icmp_unsigned("<", index, length)
+        builder.cbranch(in_bounds, ok_block, fail_block)
+
+        builder.position_at_end(fail_block)
+        builder.call(self._index_error_function(), [index, length])
+        builder.unreachable()
+
+        builder.position_at_end(ok_block)
+        data = builder.load(self.field(builder, pointer, self.DATA))
+        return builder, builder.gep(data, [index])
+
+    def _define_get(self, function: ir.Function) -> None:
+        builder, element_pointer = self._element_pointer(function)
+        builder.ret(builder.load(element_pointer))
+
+    def _define_set(self, function: ir.Function) -> None:
+        builder, element_pointer = self._element_pointer(function)
+        builder.store(function.args[2], element_pointer)
+        builder.ret_void()
+
+    def _index_error_function(self) -> ir.Function:
+        """`void index_error(i32 index, i32 length)`, raises an error."""
+        return self._function(
+            "stellar.list.index_error",
+            ir.VoidType(),
+            [int32, int32],
+            self._define_index_error,
+        )
+
+    def _define_index_error(self, function: ir.Function) -> None:
+        dprintf = self._libc("dprintf", int32, [int32, void_pointer], var_arg=True)
+        function.attributes.add("noreturn")
+        function.attributes.add("cold")
+
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        message = self.strings.get(
+            "IndexError: list index %d out of range for length %d\n"
+        )
+        index, length = function.args
+        # What the program printed so far comes before the error
+        builder.call(self.output.flush_function(), [])
+        # Straight to stderr, the file descriptor needs no stdio globals
+        builder.call(dprintf, [int32(2), message, index, length])
+        status = int32(self.INDEX_ERROR_STATUS)
+        builder.call(self.errors.raise_function(), [status])
+        builder.unreachable()
+
+    def _define_print(self, function: ir.Function, element: str) -> None:
+        entry_block = function.append_basic_block("entry")
+        builder = ir.IRBuilder(entry_block)
+        loop_block = function.append_basic_block("loop")
+        body_block = function.append_basic_block("body")
+        done_block = function.append_basic_block("done")
+        (pointer,) = function.args
+        output = self.output
+
+        quote = ELEMENT_QUOTES[element]
+        first_prefix = self.strings.get(quote)
+        next_prefix = self.strings.get(f", {quote}")
+
+        output.write_text(builder, "[")
+        length = self.length(builder, pointer)
+        data = builder.load(self.field(builder, pointer, self.DATA))
+        builder.branch(loop_block)
+
+        builder.position_at_end(loop_block)
+        index = builder.phi(int32)
+        index.add_incoming(int32(0), entry_block)
+        more = builder.icmp_signed("<", index, length)
+        builder.cbranch(more, body_block, done_block)
+
+        builder.position_at_end(body_block)
+        is_first = builder.icmp_signed("==", index, int32(0))
+        prefix = builder.select(is_first, first_prefix, next_prefix)
+        prefix_size = builder.select(is_first, int64(len(quote)), int64(len(quote) + 2))
+        builder.call(output.bytes_function(), [prefix, prefix_size])
+        value = builder.load(builder.gep(data, [index]))
+        builder.call(output.write_function(element), [value])
+        if quote:
+            output.write_text(builder, quote)
+        index.add_incoming(builder.add(index, int32(1)), body_block)
+        builder.branch(loop_block)
+
+        builder.position_at_end(done_block)
+        output.write_text(builder, "]")
+        builder.ret_void()
+
+
+class ErrorRuntime(Runtime):
+    """
+    Runtime errors, which stop the program.
+
+    `main` saves its context with `setjmp` before it calls the program and
+    raising an error jumps back to it with `longjmp`, so `main` returns the
+    error's exit status wherever the error was raised. The process running
+    the program is not exited, which a JIT host relies on to carry on with
+    the next program. An executable exits with the status `main` returns.
+    """
+
+    # Larger than the jmp_buf of any target, 200 bytes on x86-64 glibc
+    JUMP_BUFFER_SIZE = 512
+
+    def __init__(self, module: ir.Module, strings: StringPool) -> None:
+        super().__init__(module, strings)
+        self._jump_buffer = None
+
+    def raise_function(self) -> ir.Function:
+        """`void raise(i32 status)`, making `main` return `status` != 0."""
+        return self._function(
+            "stellar.error.raise", ir.VoidType(), [int32], self._define_raise
+        )
+
+    def catch(self, builder: ir.IRBuilder, program: ir.Function) -> None:
+        """Return the status of `program`, or of the error it raises."""
+        setjmp = self._libc("_setjmp", int32, [void_pointer])
+        setjmp.attributes.add("returns_twice")
+        run_block = builder.append_basic_block("run")
+        error_block = builder.append_basic_block("error")
+
+        # 0 on the call, the error's status when it returns again
+        status = builder.call(setjmp, [self._buffer_pointer()])
+        raised = builder.icmp_signed("!=", status, int32(0))
+        builder.cbranch(raised, error_block, run_block)
+
+        builder.position_at_end(run_block)
+        builder.ret(builder.call(program, []))
+
+        builder.position_at_end(error_block)
+        builder.ret(status)
+
+    def _buffer_pointer(self) -> ir.Constant:
+        if self._jump_buffer is None:
+            buffer_type = ir.ArrayType(int8, self.JUMP_BUFFER_SIZE)
+            self._jump_buffer = ir.GlobalVariable(
+                self.module, buffer_type, name="stellar.error.jump"
+            )
+            self._jump_buffer.linkage = "internal"
+            self._jump_buffer.align = 16
+            self._jump_buffer.initializer = ir.Constant(buffer_type, None)
+        return self._jump_buffer.bitcast(void_pointer)
+
+    def _define_raise(self, function: ir.Function) -> None:
+        longjmp = self._libc("longjmp", ir.VoidType(), [void_pointer, int32])
+        longjmp.attributes.add("noreturn")
+        function.attributes.add("noreturn")
+        function.attributes.add("cold")
+
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        builder.call(longjmp, [self._buffer_pointer(), function.args[0]])
+        builder.unreachable()
+
+
+class PrintRuntime(Runtime):
+    """
+    Buffered output of the printed values.
+
+    Values are formatted straight into one module-level buffer, which is
+    written to stdout with a single `write` when it is full, when the
+    program returns and before it raises an error. The buffer bypasses
+    C stdio, so printing costs no format string parsing or locking, but
+    output shows up only as it is flushed, also on a terminal.
+    """
+
+    CAPACITY = 1 << 16
+    # Longest "%d" of an i32 and "%f" of a double, -1.8e308 has 309 digits
+    INT_SIZE = 11
+    FLOAT_SIZE = 1 + 309 + 1 + 6
+
+    STDOUT = 1
+
+    def __init__(self, module: ir.Module, strings: StringPool) -> None:
+        super().__init__(module, strings)
+        self._buffer = None
+        self._length = None
+
+    def write_text(self, builder: ir.IRBuilder, text: str) -> None:
+        """Append the constant `text`."""
+        size = len(text.encode("utf-8"))
+        builder.call(self.bytes_function(), [self.strings.get(text), int64(size)])
+
+    def write_function(self, value_type: str) -> ir.Function:
+        """`void write(T value)`, appending an INT, FLOAT or STR value."""
+        define = {
+            "INT": self._define_write_int,
+            "FLOAT": self._define_write_float,
+            "STR": self._define_write_str,
+        }[value_type]
+        return self._function(
+            f"stellar.print.{value_type}",
+            ir.VoidType(),
+            [VALUE_TYPES[value_type]],
+            define,
+        )
+
+    def bytes_function(self) -> ir.Function:
+        """`void bytes(i8* data, i64 size)`, appending `size` bytes."""
+        return self._function(
+            "stellar.print.bytes",
+            ir.VoidType(),
+            [void_pointer, int64],
+            self._define_bytes,
+        )
+
+    def flush_function(self) -> ir.Function:
+        """`void flush()`, writing out and emptying the buffer."""
+        return self._function(
+            "stellar.print.flush", ir.VoidType(), [], self._define_flush
+        )
+
+    def _reserve_function(self) -> ir.Function:
+        """`void reserve(i32 size)`, flushing unless `size` more bytes fit."""
+        return self._function(
+            "stellar.print.reserve",
+            ir.VoidType(),
+            [int32],
+            self._define_reserve,
+        )
+
+    def _write_all_function(self) -> ir.Function:
+        """`void write_all(i8* data, i64 size)`, straight to stdout."""
+        return self._function(
+            "stellar.print.write_all",
+            ir.VoidType(),
+            [void_pointer, int64],
+            self._define_write_all,
+        )
+
+    def _globals(self) -> tuple:
+        """The buffer and the length of its contents."""
+        if self._buffer is None:
+            buffer_type = ir.ArrayType(int8, self.CAPACITY)
+            self._buffer = ir.GlobalVariable(
+                self.module, buffer_type, name="stellar.print.buffer"
+            )
+            self._buffer.linkage = "internal"
+            self._buffer.initializer = ir.Constant(buffer_type, None)
+            self._length = ir.GlobalVariable(
+                self.module, int32, name="stellar.print.length"
+            )
+            self._length.linkage = "internal"
+            self._length.initializer = int32(0)
+        return self._buffer, self._length
+
+    def _end(self, builder: ir.IRBuilder, length: ir.Value) -> ir.Value:
+        """Address of the first free byte of the buffer."""
+        buffer, _ = self._globals()
+        return builder.gep(buffer, [int32(0), length], inbounds=True)
+
+    def _memcpy(self, builder: ir.IRBuilder, target, source, size) -> None:
+        memcpy = self.module.declare_intrinsic(
+            "llvm.memcpy", [void_pointer, void_pointer, int64]
+        )
+        builder.call(memcpy, [target, source, size, false_bit])
+
+    def _define_flush(self, function: ir.Function) -> None:
+        buffer, length_global = self._globals()
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        write_block = function.append_basic_block("write")
+        done_block = function.append_basic_block("done")
+
+        length = builder.load(length_global)
+        is_empty = builder.icmp_unsigned("==", length, int32(0))
+        builder.cbranch(is_empty, done_block, write_block)
+
+        builder.position_at_end(write_block)
+        data = builder.gep(buffer, [int32(0), int32(0)], inbounds=True)
+        size = builder.zext(length, int64)
+        builder.call(self._write_all_function(), [data, size])
+        builder.store(int32(0), length_global)
+        builder.branch(done_block)
+
+        builder.position_at_end(done_block)
+        builder.ret_void()
+
+    def _define_write_all(self, function: ir.Function) -> None:
+        write = self._libc("write", int64, [int32, void_pointer, int64])
+        entry_block = function.append_basic_block("entry")
+        loop_block = function.append_basic_block("loop")
+        body_block = function.append_basic_block("body")
+        done_block = function.append_basic_block("done")
+        builder = ir.IRBuilder(entry_block)
+        builder.branch(loop_block)
+
+        # write() may take less than all of it, e.g. into a full pipe
+        builder.position_at_end(loop_block)
+        data = builder.phi(void_pointer)
+        size = builder.phi(int64)
+        data.add_incoming(function.args[0], entry_block)
+        size.add_incoming(function.args[1], entry_block)
+        more = builder.icmp_signed(">", size, int64(0))
+        builder.cbranch(more, body_block, done_block)
+
+        builder.position_at_end(body_block)
+        written = builder.call(write, [int32(self.STDOUT), data, size])
+        failed = builder.icmp_signed("<=", written, int64(0))
+        data.add_incoming(builder.gep(data, [written]), body_block)
+        size.add_incoming(builder.sub(size, written), body_block)
+        # Output that cannot be written is dropped, like stdio does
+        builder.cbranch(failed, done_block, loop_block)
+
+        builder.position_at_end(done_block)
+        builder.ret_void()
+
+    def _define_reserve(self, function: ir.Function) -> None:
+        _, length_global = self._globals()
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        flush_block = function.append_basic_block("flush")
+        done_block = function.append_basic_block("done")
+
+        length = builder.load(length_global)
+        room = builder.sub(int32(self.CAPACITY), length)
+        full = builder.icmp_unsigned(">", function.args[0], room)
+        builder.cbranch(full, flush_block, done_block)
+
+        builder.position_at_end(flush_block)
+        builder.call(self.flush_function(), [])
+        builder.branch(done_block)
+
+        builder.position_at_end(done_block)
+        builder.ret_void()
+
+    def _define_bytes(self, function: ir.Function) -> None:
+        _, length_global = self._globals()
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        full_block = function.append_basic_block("full")
+        direct_block = function.append_basic_block("direct")
+        copy_block = function.append_basic_block("copy")
+        data, size = function.args
+
+        length = builder.zext(builder.load(length_global), int64)
+        room = builder.sub(int64(self.CAPACITY), length)
+        full = builder.icmp_unsigned(">", size, room)
+        builder.cbranch(full, full_block, copy_block)
+
+        builder.position_at_end(full_block)
+        builder.call(self.flush_function(), [])
+        too_large = builder.icmp_unsigned(">", size, int64(self.CAPACITY))
+        builder.cbranch(too_large, direct_block, copy_block)
+
+        # More than the whole buffer skips it
+        builder.position_at_end(direct_block)
+        builder.call(self._write_all_function(), [data, size])
+        builder.ret_void()
+
+        builder.position_at_end(copy_block)
+        length = builder.load(length_global)
+        self._memcpy(builder, self._end(builder, length), data, size)
+        new_length = builder.add(length, builder.trunc(size, int32))
+        builder.store(new_length, length_global)
+        builder.ret_void()
+
+    def _define_write_str(self, function: ir.Function) -> None:
+        strlen = self._libc("strlen", int64, [void_pointer])
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        (string,) = function.args
+        size = builder.call(strlen, [string])
+        builder.call(self.bytes_function(), [string, size])
+        builder.ret_void()
+
+    def _define_write_int(self, function: ir.Function) -> None:
+        _, length_global = self._globals()
+        entry_block = function.append_basic_block("entry")
+        loop_block = function.append_basic_block("loop")
+        done_block = function.append_basic_block("done")
+        builder = ir.IRBuilder(entry_block)
+        (value,) = function.args
+
+        builder.call(self._reserve_function(), [int32(self.INT_SIZE)])
+        # The digits are produced last first, from the end of a scratch array
+        digits = builder.alloca(ir.ArrayType(int8, self.INT_SIZE), name="digits")
+        # Negated in 64 bits, the magnitude of INT32_MIN does not fit an i32
+        wide = builder.sext(value, int64)
+        is_negative = builder.icmp_signed("<", wide, int64(0))
+        magnitude = builder.select(is_negative, builder.neg(wide), wide)
+        builder.branch(loop_block)
+
+        builder.position_at_end(loop_block)
+        rest = builder.phi(int64)
+        end = builder.phi(int32)
+        rest.add_incoming(magnitude, entry_block)
+        end.add_incoming(int32(self.INT_SIZE), entry_block)
+        start = builder.sub(end, int32(1))
+        digit = builder.trunc(builder.urem(rest, int64(10)), int8)
+        character = builder.add(digit, int8(ord("0")))
+        builder.store(character, builder.gep(digits, [int32(0), start]))
+        next_rest = builder.udiv(rest, int64(10))
+        rest.add_incoming(next_rest, loop_block)
+        end.add_incoming(start, loop_block)
+        more = builder.icmp_unsigned("!=", next_rest, int64(0))
+        builder.cbranch(more, loop_block, done_block)
+
+        # At most 10 digits, so there is always room for the sign
+        builder.position_at_end(done_block)
+        sign = builder.sub(start, int32(1))
+        builder.store(int8(ord("-")), builder.gep(digits, [int32(0), sign]))
+        start = builder.select(is_negative, sign, start)
+        size = builder.sub(int32(self.INT_SIZE), start)
+
+        length = builder.load(length_global)
+        source = builder.gep(digits, [int32(0), start])
+        self._memcpy(
+            builder, self._end(builder, length), source, builder.zext(size, int64)
+        )
+        builder.store(builder.add(length, size), length_global)
+        builder.ret_void()
+
+    def _define_write_float(self, function: ir.Function) -> None:
+        _, length_global = self._globals()
+        snprintf = self._libc(
+            "snprintf", int32, [void_pointer, int64, void_pointer], var_arg=True
+        )
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        (value,) = function.args
+
+        builder.call(self._reserve_function(), [int32(self.FLOAT_SIZE)])
+        length = builder.load(length_global)
+        room = builder.zext(builder.sub(int32(self.CAPACITY), length), int64)
+        target = self._end(builder, length)
+        written = builder.call(snprintf, [target, room, self.strings.get("%f"), value])
+        builder.store(builder.add(length, written), length_global)
+        builder.ret_void()
 
 
 # class Printf:
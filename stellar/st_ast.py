@@ -0,0 +1,341 @@
+from typing import Optional
+
+from st_symbols import FunctionSymbol, Symbol
+
+
+class Node:
+    """Base class for AST nodes.
+
+    Nodes keep their fields in `__slots__`, so they have no per-instance
+    `__dict__` and are compared and printed field by field.
+    """
+
+    __slots__: tuple = ()
+
+    def __eq__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Literal(Node):
+    """Constant value of type `value_type` ("INT", "FLOAT" or "STR")."""
+
+    __slots__ = ("value_type", "value")
+
+    def __init__(self, value_type: str, value: str) -> None:
+        self.value_type = value_type
+        self.value = value
+
+
+class Variable(Node):
+    __slots__ = ("name", "symbol", "value_type")
+
+    def __init__(
+        self,
+        name: str,
+        symbol: Optional[Symbol] = None,
+        value_type: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.symbol = symbol
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class BinaryOperation(Node):
+    __slots__ = ("operator", "left_operand", "right_operand", "value_type")
+
+    def __init__(
+        self,
+        operator: str,
+        left_operand: Node,
+        right_operand: Node,
+        value_type: Optional[str] = None,
+    ) -> None:
+        self.operator = operator
+        self.left_operand = left_operand
+        self.right_operand = right_operand
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class Comparison(Node):
+    """`left_operand <operator> right_operand`, a BOOL."""
+
+    __slots__ = ("operator", "left_operand", "right_operand", "value_type")
+
+    def __init__(
+        self,
+        operator: str,
+        left_operand: Node,
+        right_operand: Node,
+        value_type: Optional[str] = None,
+    ) -> None:
+        self.operator = operator
+        self.left_operand = left_operand
+        self.right_operand = right_operand
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class ListLiteral(Node):
+    __slots__ = ("elements", "value_type")
+
+    def __init__(self, elements: list[Node], value_type: Optional[str] = None) -> None:
+        self.elements = elements
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class IndexOperation(Node):
+    """Element `index` of the list `target`."""
+
+    __slots__ = ("target", "index", "value_type")
+
+    def __init__(
+        self, target: Node, index: Node, value_type: Optional[str] = None
+    ) -> None:
+        self.target = target
+        self.index = index
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class LengthOperation(Node):
+    """`len(target)` of a list."""
+
+    __slots__ = ("target", "value_type")
+
+    def __init__(self, target: Node, value_type: Optional[str] = None) -> None:
+        self.target = target
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class FunctionCall(Node):
+    """`name(arguments)`, of the return type of the function."""
+
+    __slots__ = ("name", "arguments", "symbol", "value_type")
+
+    def __init__(
+        self,
+        name: str,
+        arguments: list[Node],
+        symbol: Optional[FunctionSymbol] = None,
+        value_type: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.arguments = arguments
+        self.symbol = symbol
+        # Set by the semantic analyzer
+        self.value_type = value_type
+
+
+class VariableDeclaration(Node):
+    __slots__ = ("variable_name", "variable_type", "expression", "symbol")
+
+    def __init__(
+        self,
+        variable_name: str,
+        variable_type: str,
+        expression: Optional[Node],
+        symbol: Optional[Symbol] = None,
+    ) -> None:
+        self.variable_name = variable_name
+        self.variable_type = variable_type
+        self.expression = expression
+        self.symbol = symbol
+
+
+class AssignmentStatement(Node):
+    __slots__ = ("variable_name", "expression", "symbol")
+
+    def __init__(
+        self, variable_name: str, expression: Node, symbol: Optional[Symbol] = None
+    ) -> None:
+        self.variable_name = variable_name
+        self.expression = expression
+        self.symbol = symbol
+
+
+class IndexAssignmentStatement(Node):
+    """`target[index] = expression` for a list variable."""
+
+    __slots__ = ("target", "index", "expression")
+
+    def __init__(self, target: Variable, index: Node, expression: Node) -> None:
+        self.target = target
+        self.index = index
+        self.expression = expression
+
+
+class AppendStatement(Node):
+    """`target.append(expression)` for a list variable."""
+
+    __slots__ = ("target", "expression")
+
+    def __init__(self, target: Variable, expression: Node) -> None:
+        self.target = target
+        self.expression = expression
+
+
+class PrintStatement(Node):
+    __slots__ = ("expression",)
+
+    def __init__(self, expression: Optional[Node]) -> None:
+        self.expression = expression
+
+
+class IfStatement(Node):
+    """`if condition { body } else { orelse }`, `orelse` may be empty."""
+
+    __slots__ = ("condition", "body", "orelse")
+
+    def __init__(self, condition: Node, body: list[Node], orelse: list[Node]) -> None:
+        self.condition = condition
+        self.body = body
+        self.orelse = orelse
+
+
+class WhileStatement(Node):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition: Node, body: list[Node]) -> None:
+        self.condition = condition
+        self.body = body
+
+
+class ForStatement(Node):
+    """
+    `for variable in range(start, stop) { body }`. The INT loop variable
+    is the counter, `stop` is evaluated once before the first iteration.
+    """
+
+    __slots__ = ("variable_name", "start", "stop", "body", "symbol")
+
+    def __init__(
+        self,
+        variable_name: str,
+        start: Node,
+        stop: Node,
+        body: list[Node],
+        symbol: Optional[Symbol] = None,
+    ) -> None:
+        self.variable_name = variable_name
+        self.start = start
+        self.stop = stop
+        self.body = body
+        self.symbol = symbol
+
+
+class FunctionDeclaration(Node):
+    """
+    `def name(parameters) -> return_type { body }`, `return_type` is "VOID"
+    for functions returning nothing.
+    """
+
+    __slots__ = ("name", "parameters", "return_type", "body", "symbol")
+
+    def __init__(
+        self,
+        name: str,
+        parameters: list[Symbol],
+        return_type: str,
+        body: list[Node],
+        symbol: Optional[FunctionSymbol] = None,
+    ) -> None:
+        self.name = name
+        self.parameters = parameters
+        self.return_type = return_type
+        self.body = body
+        self.symbol = symbol
+
+
+class ReturnStatement(Node):
+    __slots__ = ("expression",)
+
+    def __init__(self, expression: Optional[Node]) -> None:
+        self.expression = expression
+
+
+class ExpressionStatement(Node):
+    """An expression evaluated for its effects, a call."""
+
+    __slots__ = ("expression",)
+
+    def __init__(self, expression: Node) -> None:
+        self.expression = expression
+
+
+def list_type(element_type: str) -> str:
+    """Type of lists of `element_type`, e.g. "LIST[INT]"."""
+    return f"LIST[{element_type}]"
+
+
+def element_type(value_type: Optional[str]) -> Optional[str]:
+    """Element type of a list type, None for other types and untyped lists."""
+    if value_type and value_type.startswith("LIST["):
+        return value_type[5:-1]
+    return None
+
+
+STATEMENTS = (
+    VariableDeclaration,
+    AssignmentStatement,
+    PrintStatement,
+    ReturnStatement,
+    ExpressionStatement,
+)
+# Fields holding subexpressions, by node class
+CHILDREN = {
+    BinaryOperation: ("left_operand", "right_operand"),
+    Comparison: ("left_operand", "right_operand"),
+    IndexOperation: ("target", "index"),
+    LengthOperation: ("target",),
+    IndexAssignmentStatement: ("target", "index", "expression"),
+    AppendStatement: ("target", "expression"),
+    IfStatement: ("condition",),
+    WhileStatement: ("condition",),
+    ForStatement: ("start", "stop"),
+    FunctionDeclaration: (),
+}
+# Fields holding nested statements, by node class
+BODIES = {
+    IfStatement: ("body", "orelse"),
+    WhileStatement: ("body",),
+    ForStatement: ("body",),
+    FunctionDeclaration: ("body",),
+}
+
+
+def count_nodes(node) -> int:
+    """Count the nodes of an AST, a statement or an expression."""
+    # An explicit stack, so arbitrarily deep expressions can be counted
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if node is None:
+            continue
+        count += 1
+        node_class = type(node)
+        if node_class in CHILDREN:
+            stack.extend(getattr(node, field) for field in CHILDREN[node_class])
+            stack.extend(getattr(node, field) for field in BODIES.get(node_class, ()))
+        elif node_class is ListLiteral:
+            stack.extend(node.elements)
+        elif node_class is FunctionCall:
+            stack.extend(node.arguments)
+        elif node_class in STATEMENTS:
+            stack.append(node.expression)
+    return count
@@ -0,0 +1,100 @@
+import itertools
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import st_cache
+import st_compiler
+import st_frontend
+
+
+@dataclass
+class BuildResult:
+    file_path: str
+    cache_key: str
+    bitcode: Optional[bytes] = None
+    object_code: Optional[bytes] = None
+    error: Optional[str] = None
+
+    @property
+    def entry_name(self) -> str:
+        return st_compiler.cached_entry_name(self.cache_key)
+
+
+def find_sources(directory_path: str) -> list[str]:
+    """Return all stellar files below `directory_path` in a stable order."""
+    file_paths = []
+    for root, _, files in os.walk(directory_path):
+        for file in files:
+            if file.endswith(".stl"):
+                file_paths.append(os.path.join(root, file))
+    return sorted(file_paths)
+
+
+# One session per worker process, created on its first job
+_worker_session: Optional[st_compiler.JitSession] = None
+
+
+def compile_source(
+    file_path: str, code: str, cache_key: str, opt_level: int
+) -> BuildResult:
+    """Compile one source to object code. Runs in a worker process."""
+    global _worker_session
+    if _worker_session is None or _worker_session.opt_level != opt_level:
+        _worker_session = st_compiler.JitSession(opt_level)
+
+    result = BuildResult(file_path, cache_key)
+    try:
+        mod = _worker_session.prepare_module(
+            st_frontend.generate_module(code), result.entry_name
+        )
+        result.bitcode = mod.as_bitcode()
+        result.object_code = _worker_session.target_machine.emit_object(mod)
+    except Exception as error:
+        result.error = "".join(traceback.format_exception_only(type(error), error))
+    return result
+
+
+def build_parallel(
+    file_paths: list[str],
+    opt_level: int,
+    jobs: int,
+    cache: Optional[st_cache.CompilationCache] = None,
+) -> Iterator[BuildResult]:
+    """
+    Compile `file_paths` to object code on a pool of `jobs` processes.
+
+    Results are yielded in the order of `file_paths`. Sources already in
+    `cache` are not compiled again and come back without object code.
+    """
+    jobs_args = []
+    results: list[Optional[BuildResult]] = []
+    for file_path in file_paths:
+        with open(file_path, "r") as file:
+            code = file.read()
+        cache_key = st_cache.source_key(code, opt_level)
+        if cache is not None and cache_key in cache:
+            results.append(BuildResult(file_path, cache_key))
+        else:
+            results.append(None)
+            jobs_args.append((file_path, code, cache_key, opt_level))
+
+    if jobs <= 1 or not jobs_args:
+        # No pool for a single job or when everything is cached
+        compiled = itertools.starmap(compile_source, jobs_args)
+        yield from merge_results(results, compiled)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        compiled = executor.map(compile_source, *zip(*jobs_args))
+        yield from merge_results(results, compiled)
+
+
+def merge_results(
+    results: list[Optional[BuildResult]], compiled: Iterator[BuildResult]
+) -> Iterator[BuildResult]:
+    # Fill the gaps left for uncached sources in their original order
+    for result in results:
+        yield result if result is not None else next(compiled)
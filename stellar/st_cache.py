@@ -0,0 +1,131 @@
+import functools
+import hashlib
+import os
+from typing import Optional
+
+import llvmlite
+import llvmlite.binding as llvm
+
+COMPILER_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stellar")
+DEFAULT_MAX_SIZE = 64 * 2**20
+
+OBJECT_SUFFIX = ".o"
+BITCODE_SUFFIX = ".bc"
+# Written next to the objects by earlier versions of the cache
+IR_SUFFIX = ".ll"
+ENTRY_SUFFIXES = (OBJECT_SUFFIX, BITCODE_SUFFIX, IR_SUFFIX)
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """
+    Digest of the compiler's own sources and of llvmlite's version, so any
+    change to code generation invalidates the objects built before it.
+    """
+    digest = hashlib.sha256(llvmlite.__version__.encode("utf-8"))
+    for name in sorted(os.listdir(COMPILER_DIRECTORY)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8") + b"\0")
+            with open(os.path.join(COMPILER_DIRECTORY, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def source_key(source: str, opt_level: int) -> str:
+    """Hash everything that determines the object code built from `source`."""
+    digest = hashlib.sha256()
+    for part in (
+        compiler_version(),
+        str(opt_level),
+        llvm.get_process_triple(),
+        llvm.get_host_cpu_name(),
+        source,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CompilationCache:
+    """
+    Content-addressed on-disk cache of compiled object code.
+
+    Entries are keyed on the source text, compiler version, optimization
+    level and host target, and hold the object file and the optimized
+    module it was built from, as bitcode. Reading an entry refreshes its
+    modification time, and the least recently used entries are evicted
+    once the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory = directory or os.environ.get(
+            "STELLAR_CACHE_DIR", DEFAULT_CACHE_DIR
+        )
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, source: str, opt_level: int) -> str:
+        return source_key(source, opt_level)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key, OBJECT_SUFFIX))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached object code for `key`, if any."""
+        path = self._path(key, OBJECT_SUFFIX)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        os.utime(path)
+        return data
+
+    def put(self, key: str, object_code: bytes, bitcode: bytes) -> None:
+        # Write to a temporary name first so readers never see partial files
+        for suffix, data in ((BITCODE_SUFFIX, bitcode), (OBJECT_SUFFIX, object_code)):
+            path = self._path(key, suffix)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits."""
+        entries: dict[str, list] = {}
+        total_size = 0
+        for name in os.listdir(self.directory):
+            key, suffix = os.path.splitext(name)
+            if suffix not in ENTRY_SUFFIXES:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # An entry is as recent as the most recent of its files
+            entry = entries.setdefault(key, [0.0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(path)
+            total_size += stat.st_size
+
+        for _, size, paths in sorted(entries.values(), key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
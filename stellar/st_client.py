@@ -0,0 +1,114 @@
+"""
+Thin client of `stellar serve`, taking the same arguments as stellar:
+
+    python stellar serve &
+    python stellar/st_client.py run program.stl -O2
+
+The command runs on the server, which has the compiler and LLVM loaded
+already, so the client only pays for starting Python. It imports nothing
+but the standard library. Its stdin, stdout and stderr are handed to the
+server, so the program's output and diagnostics are written straight to
+them, and it exits with the status of the command. Without a server the
+command runs here, like `python stellar ...` would.
+
+The socket is $STELLAR_SOCKET, by default `stellar.sock` in
+$XDG_RUNTIME_DIR or a private directory in $TMPDIR. Its directory must
+belong to the user and be closed to everyone else, or the command runs
+here, since the client hands its environment and terminal to the server.
+"""
+import json
+import os
+import socket
+import stat
+import sys
+from typing import Optional
+
+# Ready for a request in one read, larger ones are read in pieces
+MAX_MESSAGE_SIZE = 1 << 16
+
+STELLAR = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_socket_path() -> str:
+    path = os.environ.get("STELLAR_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"stellar-{os.getuid()}"
+    )
+    return os.path.join(directory, "stellar.sock")
+
+
+def unsafe_directory(socket_path: str) -> Optional[str]:
+    """
+    Why another user could have put a server at `socket_path`, None if the
+    directory holding it belongs to this user alone.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    status = os.stat(directory)
+    if status.st_uid != os.getuid():
+        return f"{directory} belongs to another user"
+    if stat.S_IMODE(status.st_mode) & 0o077:
+        return f"{directory} is open to other users, its mode must be 0700"
+    return None
+
+
+def connect(socket_path: str) -> Optional[socket.socket]:
+    """A connection to the server, None if there is none to use."""
+    try:
+        reason = unsafe_directory(socket_path)
+    except FileNotFoundError:
+        return None
+    if reason is not None:
+        print(f"stellar: not using the server: {reason}", file=sys.stderr)
+        return None
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        connection.close()
+        return None
+    return connection
+
+
+def send_request(connection: socket.socket, argv: list[str]) -> None:
+    request = {"argv": argv, "cwd": os.getcwd(), "environ": dict(os.environ)}
+    message = json.dumps(request).encode("utf-8") + b"\n"
+    sent = socket.send_fds(connection, [message], [0, 1, 2])
+    connection.sendall(message[sent:])
+
+
+def receive_status(connection: socket.socket) -> int:
+    """Wait for the exit status the server sends once the command is done."""
+    reply = b""
+    while not reply.endswith(b"\n"):
+        chunk = connection.recv(MAX_MESSAGE_SIZE)
+        if not chunk:
+            print("stellar: the server closed the connection", file=sys.stderr)
+            return 1
+        reply += chunk
+    return json.loads(reply)["status"]
+
+
+def main(argv: list[str]) -> int:
+    socket_path = default_socket_path()
+    if argv[:1] == ["--socket"]:
+        socket_path, argv = argv[1], argv[2:]
+
+    connection = connect(socket_path)
+    if connection is None:
+        # No server, run the command in this process instead
+        os.execv(sys.executable, [sys.executable, STELLAR, *argv])
+
+    with connection:
+        try:
+            send_request(connection, argv)
+            return receive_status(connection)
+        except KeyboardInterrupt:
+            # Closing the connection stops the command on the server
+            return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,66 +1,322 @@
-from ctypes import CFUNCTYPE
+import itertools
+import os
+import subprocess
+import tempfile
+from ctypes import CFUNCTYPE, c_int
+from typing import Optional, Union
 
 import llvmlite.binding as llvm
+from llvmlite import ir
+from st_cache import CompilationCache
+from st_profiler import NULL_PROFILER, Profiler
+
+# A module as IR text, bitcode, an llvmlite.ir module or a parsed module
+ModuleSource = Union[str, bytes, ir.Module, llvm.ModuleRef]
 
 
 class StellarCompiler:
-    def __init__(self, llvm_module: str) -> None:
+    """
+    Compile and run one module. `output.ll` and `output.bc` are only
+    written when `save_assembly` or `save_bitcode` is set.
+    """
+
+    def __init__(
+        self,
+        llvm_module: ModuleSource,
+        opt_level: int = 0,
+        save_assembly: bool = False,
+        save_bitcode: bool = False,
+    ) -> None:
         self.llvm_module = llvm_module
+        self.opt_level = opt_level
+        self.save_assembly = save_assembly
+        self.save_bitcode = save_bitcode
+
+    def _save_to_exe(self, module, output_path, cpu="", features="", linker=None):
+        """
+        Compile the module ahead of time for the host triple (or `cpu` and
+        `features`, "native" for the host CPU) and link the relocatable
+        object against libc with the system C compiler driver.
+        """
+        initialize_llvm()
+        if cpu == "native":
+            cpu = llvm.get_host_cpu_name()
+            features = features or llvm.get_host_cpu_features().flatten()
+        target = llvm.Target.from_default_triple()
+        target_machine = target.create_target_machine(
+            cpu=cpu, features=features, opt=self.opt_level, reloc="pic"
+        )
 
-    def _save_to_exe(self, module):
-        target_machine = llvm.Target.from_default_triple().create_target_machine()
-        with open("output.exe", "wb") as f:
-            f.write(target_machine.emit_object(module))
+        module.triple = target_machine.triple
+        module.data_layout = str(target_machine.target_data)
+        if self.opt_level:
+            create_pass_manager(target_machine, self.opt_level).run(module)
+
+        link_executable(target_machine.emit_object(module), output_path, linker)
 
     def _save_to_bitcode(self, module):
         with open("output.bc", "wb") as f:
-            f.write(module.to_bitcode())
+            f.write(module.as_bitcode())
 
     def _save_to_assembly(self, module):
         with open("output.ll", "w") as f:
             f.write(str(module))
 
+    def compile(
+        self,
+        session: Optional["JitSession"] = None,
+        cache_key: Optional[str] = None,
+        profiler: Profiler = NULL_PROFILER,
+    ):
+        if session is None:
+            session = JitSession(self.opt_level)
+
+        # Parsed once here and handed to the session as is
+        module = parse_module(self.llvm_module)
+        if self.save_assembly:
+            self._save_to_assembly(module)
+        if self.save_bitcode:
+            self._save_to_bitcode(module)
+
+        session.run(module, cache_key, profiler)
+
+    def build_executable(
+        self,
+        output_path: str,
+        cpu: str = "",
+        features: str = "",
+        linker: Optional[str] = None,
+    ):
+        module = parse_module(self.llvm_module)
+        if self.save_assembly:
+            self._save_to_assembly(module)
+        if self.save_bitcode:
+            self._save_to_bitcode(module)
+
+        self._save_to_exe(module, output_path, cpu, features, linker)
+
+
+def parse_module(source: ModuleSource) -> llvm.ModuleRef:
+    """
+    Create a LLVM module object from IR text, bitcode or an llvmlite.ir
+    module. Bitcode is read directly, the others as IR text, which for
+    an llvmlite.ir module is serialized here exactly once.
+    """
+    if isinstance(source, llvm.ModuleRef):
+        return source
+    if isinstance(source, bytes):
+        mod = llvm.parse_bitcode(source)
+    else:
+        mod = llvm.parse_assembly(str(source))
+    mod.verify()
+    return mod
+
+
+def create_pass_manager(target_machine, opt_level: int):
+    """
+    Create the module pass pipeline for the optimization level. From -O1
+    on it promotes allocas to registers (mem2reg/SROA) and runs
+    instcombine, -O2 adds GVN, inlining and the loop and SLP vectorizers,
+    -O3 more aggressive inlining.
+    """
+    pass_manager_builder = llvm.create_pass_manager_builder()
+    pass_manager_builder.opt_level = opt_level
+    pass_manager_builder.inlining_threshold = INLINING_THRESHOLDS[opt_level]
+    # Off by default in llvmlite, clang enables both from -O2
+    pass_manager_builder.loop_vectorize = opt_level >= 2
+    pass_manager_builder.slp_vectorize = opt_level >= 2
+
+    pass_manager = llvm.create_module_pass_manager()
+    target_machine.add_analysis_passes(pass_manager)
+    pass_manager_builder.populate(pass_manager)
+    return pass_manager
+
+
+def link_executable(
+    object_code: bytes, output_path: str, linker: Optional[str] = None
+) -> None:
+    """Link object code into an executable with `linker`, $CC or cc."""
+    linker = linker or os.environ.get("CC", "cc")
+    with tempfile.TemporaryDirectory() as directory:
+        object_path = os.path.join(directory, "main.o")
+        with open(object_path, "wb") as f:
+            f.write(object_code)
+
+        result = subprocess.run(
+            [linker, object_path, "-o", output_path],
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode:
+        raise RuntimeError(f"Linking with {linker} failed:\n{result.stderr}")
+
+
+OPT_LEVELS = (0, 1, 2, 3)
+# Same inliner thresholds clang uses for -O0 to -O3
+INLINING_THRESHOLDS = {0: 0, 1: 0, 2: 225, 3: 275}
+
+_llvm_initialized = False
+
+
+def initialize_llvm():
+    """Initialize LLVM and the native target once per process."""
+    global _llvm_initialized
+    if not _llvm_initialized:
+        llvm.initialize()
+        llvm.initialize_native_target()
+        llvm.initialize_native_asmprinter()  # yes, even this one
+        _llvm_initialized = True
+
+
+class JitSession:
+    """
+    A long-lived MCJIT engine that compiles and runs any number of modules.
+
+    LLVM, the host target machine and the engine are set up once. Each
+    module's `main` is renamed to a unique symbol before it is added so
+    modules never clash, and the module is removed again after it ran.
+    Modules are optimized at `opt_level` (0 to 3, like -O0 to -O3).
+
+    With a `cache`, the object code of every compiled module is stored and
+    a later `run_cached` executes it without touching the IR again.
+
+    A program stopped by a runtime error reported it already, the session
+    keeps its exit status in `last_status` and can run the next one.
+    """
+
+    def __init__(
+        self, opt_level: int = 0, cache: Optional[CompilationCache] = None
+    ) -> None:
+        if opt_level not in OPT_LEVELS:
+            raise ValueError(f"Invalid optimization level: {opt_level}")
+        self.opt_level = opt_level
+        self.cache = cache
+
+        initialize_llvm()
+        self.target_machine = self._create_target_machine()
+        self.engine = self._create_execution_engine()
+        self.pass_manager = self._create_pass_manager()
+        self._module_ids = itertools.count()
+        # Entry points of object files loaded from the cache
+        self._loaded_objects: dict[str, int] = {}
+        self.last_object_code: Optional[bytes] = None
+        # Exit status of the program run last, not 0 after a runtime error
+        self.last_status = 0
+
+    def _create_target_machine(self):
+        # Create a target machine representing the host
+        target = llvm.Target.from_default_triple()
+        return target.create_target_machine(opt=self.opt_level)
+
+    def _create_pass_manager(self):
+        return create_pass_manager(self.target_machine, self.opt_level)
+
     def _create_execution_engine(self):
         """
         Create an ExecutionEngine suitable for JIT code generation on
         the host CPU.  The engine is reusable for an arbitrary number of
         modules.
         """
-        # Create a target machine representing the host
-        target = llvm.Target.from_default_triple()
-        target_machine = target.create_target_machine()
         # And an execution engine with an empty backing module
         backing_mod = llvm.parse_assembly("")
-        engine = llvm.create_mcjit_compiler(backing_mod, target_machine)
+        engine = llvm.create_mcjit_compiler(backing_mod, self.target_machine)
+        engine.set_object_cache(notify_func=self._object_compiled)
         return engine
 
-    def _compile_ir(self, engine, llvm_ir):
+    def _object_compiled(self, module, object_code: bytes) -> None:
+        self.last_object_code = object_code
+
+    def prepare_module(
+        self, source: ModuleSource, entry_name: str = "main"
+    ) -> llvm.ModuleRef:
+        """Parse and optimize the module, naming its entry `entry_name`."""
+        mod = parse_module(source)
+
+        mod.get_function("main").name = entry_name
+
+        if self.opt_level:
+            self.pass_manager.run(mod)
+        return mod
+
+    def add_module(
+        self, source: ModuleSource, entry_name: Optional[str] = None
+    ) -> tuple[llvm.ModuleRef, str]:
         """
-        Compile the LLVM IR string with the given engine.
-        The compiled module object is returned.
+        Compile the module and add it to the engine.
+        The compiled module object and its mangled entry symbol are returned.
         """
-        # Create a LLVM module object from the IR
-        mod = llvm.parse_assembly(llvm_ir)
-        mod.verify()
+        if entry_name is None:
+            entry_name = f"__stellar_main_{next(self._module_ids)}"
+        mod = self.prepare_module(source, entry_name)
+
         # Now add the module and make sure it is ready for execution
-        engine.add_module(mod)
-        engine.finalize_object()
-        engine.run_static_constructors()
-        return mod
+        self.engine.add_module(mod)
+        self.engine.finalize_object()
+        self.engine.run_static_constructors()
+        return mod, entry_name
 
-    def compile(self):
-        llvm.initialize()
-        llvm.initialize_native_target()
-        llvm.initialize_native_asmprinter()  # yes, even this one
+    def remove_module(self, mod: llvm.ModuleRef) -> None:
+        self.engine.remove_module(mod)
+
+    def cache_key(self, source: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.key(source, self.opt_level)
 
-        engine = self._create_execution_engine()
+    def run(
+        self,
+        source: ModuleSource,
+        cache_key: Optional[str] = None,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
+        entry_name = cached_entry_name(cache_key) if cache_key else None
+        self.last_object_code = None
+        with profiler.phase("jit") as phase:
+            mod, entry_name = self.add_module(source, entry_name)
+            phase.counts["object_bytes"] = len(self.last_object_code or b"")
+        try:
+            if cache_key and self.cache and self.last_object_code:
+                self.cache.put(cache_key, self.last_object_code, mod.as_bitcode())
+            with profiler.phase("execute"):
+                self._call(self.engine.get_function_address(entry_name))
+        finally:
+            self.remove_module(mod)
 
-        self._compile_ir(engine, self.llvm_module)
+    def run_cached(self, cache_key: Optional[str]) -> bool:
+        """
+        Run the cached object code for `cache_key`, skipping the frontend
+        and LLVM entirely. Returns False if there is no cache entry.
+        """
+        if cache_key is None or self.cache is None:
+            return False
 
-        self._save_to_assembly(self.llvm_module)
+        entry_name = cached_entry_name(cache_key)
+        if entry_name not in self._loaded_objects:
+            object_code = self.cache.get(cache_key)
+            if object_code is None:
+                return False
+            self.run_object(object_code, entry_name)
+        else:
+            self._call(self._loaded_objects[entry_name])
+        return True
 
-        func_ptr = engine.get_function_address("main")
+    def run_object(self, object_code: bytes, entry_name: str) -> None:
+        """Load object code, unless already loaded, and call `entry_name`."""
+        func_ptr = self._loaded_objects.get(entry_name)
+        if func_ptr is None:
+            self.engine.add_object_file(llvm.ObjectFileRef.from_data(object_code))
+            self.engine.finalize_object()
+            func_ptr = self.engine.get_function_address(entry_name)
+            self._loaded_objects[entry_name] = func_ptr
 
+        self._call(func_ptr)
+
+    def _call(self, func_ptr: int) -> None:
         # Run the function via ctypes
-        cfunc = CFUNCTYPE(None)(func_ptr)
-        cfunc()
+        cfunc = CFUNCTYPE(c_int)(func_ptr)
+        self.last_status = cfunc()
+
+
+def cached_entry_name(cache_key: str) -> str:
+    # Derived from the key so the symbol in a cached object file is known
+    return f"__stellar_main_{cache_key[:16]}"
@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import traceback
+from pprint import pprint
+from typing import Optional
+
+import st_build
+import st_compiler
+import st_frontend
+import st_incremental
+import st_profiler
+from llvmlite import ir
+
+RUN = "run"
+BUILD = "build"
+WATCH = "watch"
+EMIT_IR = "emit-ir"
+EMIT_BC = "emit-bc"
+EMIT_OBJ = "emit-obj"
+DUMP_TOKENS = "dump-tokens"
+DUMP_AST = "dump-ast"
+
+MODES = (RUN, BUILD, WATCH, EMIT_IR, EMIT_BC, EMIT_OBJ, DUMP_TOKENS, DUMP_AST)
+
+# File extension of the output of each emit mode
+EMIT_SUFFIXES = {EMIT_IR: ".ll", EMIT_BC: ".bc", EMIT_OBJ: ".o"}
+# Already compiled modules that can be run or emitted without the frontend
+MODULE_SUFFIXES = (".ll", ".bc")
+# Seconds between checks for a new version of a watched file
+WATCH_INTERVAL = 0.2
+
+
+class Driver:
+    """
+    Runs the compiler pipeline over files and directories in one mode.
+
+    `run` compiles and executes programs without formatting any
+    intermediate representation, `build` links them ahead of time into a
+    native executable and `watch` runs a file again on every save. The
+    `emit-*` modes write the optimized
+    module next to the source (or to `output`) and the `dump-*` modes
+    print the tokens or the AST, stopping the pipeline as early as they can.
+    """
+
+    def __init__(
+        self,
+        session: st_compiler.JitSession,
+        mode: str = RUN,
+        stream: bool = False,
+        jobs: int = 1,
+        output: Optional[str] = None,
+        profiler: st_profiler.Profiler = st_profiler.NULL_PROFILER,
+        save_assembly: bool = False,
+        save_bitcode: bool = False,
+        cpu: str = "",
+        features: str = "",
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode}")
+        self.session = session
+        self.mode = mode
+        self.stream = stream
+        self.jobs = jobs
+        self.output = output
+        self.profiler = profiler
+        self.save_assembly = save_assembly
+        self.save_bitcode = save_bitcode
+        self.cpu = cpu
+        self.features = features
+        # Exit status of the command, not 0 once a file failed to compile or run
+        self.status = 0
+
+    def process_path(self, path: str) -> None:
+        if self.mode == WATCH:
+            if not path.endswith(".stl"):
+                raise Exception("Only a single stellar file can be watched.")
+            self.watch(path)
+        elif os.path.isfile(path):
+            # If the provided path is a file, process it
+            if path.endswith((".stl", *MODULE_SUFFIXES)):
+                self.process_file(path)
+            else:
+                raise Exception("Not a stellar file.")
+        elif os.path.isdir(path):
+            # If the provided path is a directory, process all files within it
+            self.process_directory(path)
+        else:
+            print("Invalid path. Please provide a valid file or directory path.")
+
+    def process_directory(self, directory_path: str) -> None:
+        file_paths = st_build.find_sources(directory_path)
+        if self.jobs > 1 and self.mode == RUN:
+            self.process_parallel(file_paths)
+            return
+
+        for file_path in file_paths:
+            self.process_file(file_path)
+
+    def process_file(self, file_path: str) -> None:
+        self.profiler.source = file_path
+        if file_path.endswith(MODULE_SUFFIXES):
+            self.process_module(file_path)
+            return
+
+        with open(file_path, "r") as file:
+            code = file.read()
+
+        if self.mode == DUMP_TOKENS:
+            pprint(list(st_frontend.lex(code, self.profiler)), sort_dicts=False)
+            return
+        if self.mode == DUMP_AST:
+            tokens = st_frontend.lex(code, self.profiler)
+            pprint(st_frontend.parse(tokens, self.profiler), sort_dicts=False)
+            return
+        if self.mode == BUILD:
+            self.build(file_path, self.generate_module(code))
+            return
+        if self.mode != RUN:
+            self.emit(file_path, self.generate_module(code))
+            return
+
+        # Unchanged sources run straight from the cached object code, unless
+        # the module is to be saved, which needs the frontend to run
+        cache_key = self.session.cache_key(code)
+        saving = self.save_assembly or self.save_bitcode
+        if cache_key is not None and not saving:
+            with self.profiler.phase("cached run") as phase:
+                phase.counts["hits"] = int(self.session.run_cached(cache_key))
+            if phase.counts["hits"]:
+                self.record_status()
+                return
+
+        stellar_compiler = st_compiler.StellarCompiler(
+            self.generate_module(code),
+            self.session.opt_level,
+            save_assembly=self.save_assembly,
+            save_bitcode=self.save_bitcode,
+        )
+        stellar_compiler.compile(self.session, cache_key, self.profiler)
+        self.record_status()
+
+    def process_module(self, file_path: str) -> None:
+        """Run or emit a module saved as LLVM IR text or bitcode."""
+        if file_path.endswith(".bc"):
+            with open(file_path, "rb") as file:
+                source = file.read()
+        else:
+            with open(file_path, "r") as file:
+                source = file.read()
+
+        if self.mode == RUN:
+            self.session.run(source, profiler=self.profiler)
+            self.record_status()
+        elif self.mode == BUILD:
+            self.build(file_path, source)
+        elif self.mode in EMIT_SUFFIXES:
+            self.emit(file_path, source)
+        else:
+            raise Exception(f"Cannot {self.mode} a compiled module.")
+
+    def watch(self, file_path: str) -> None:
+        """
+        Run the file, then again each time it changes until interrupted.
+        Only the statements affected by an edit are compiled again.
+        """
+        self.profiler.source = file_path
+        compiler = st_incremental.IncrementalCompiler(self.profiler)
+        modified = None
+        try:
+            while True:
+                stat = os.stat(file_path)
+                if stat.st_mtime_ns != modified:
+                    modified = stat.st_mtime_ns
+                    self.watch_update(compiler, file_path)
+                time.sleep(WATCH_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+
+    def watch_update(
+        self, compiler: st_incremental.IncrementalCompiler, file_path: str
+    ) -> None:
+        with open(file_path, "r") as file:
+            code = file.read()
+        try:
+            compiler.update(code)
+            self.session.run(compiler.generate_module(), profiler=self.profiler)
+        except Exception as error:
+            # Keep watching, the next save may fix it
+            print(
+                "".join(traceback.format_exception_only(type(error), error)),
+                file=sys.stderr,
+            )
+
+    def record_status(self) -> None:
+        # The program reported its error itself, the next files still run
+        if self.session.last_status:
+            self.status = self.session.last_status
+
+    def generate_module(self, code: str) -> ir.Module:
+        """Run the frontend and return the generated module."""
+        if self.stream:
+            return st_frontend.generate_module_stream(code, self.profiler)
+        return st_frontend.generate_module(code, self.profiler)
+
+    def emit(self, file_path: str, source: st_compiler.ModuleSource) -> None:
+        """Write the optimized module in the format of the emit mode."""
+        output_path = self.output or (
+            os.path.splitext(file_path)[0] + EMIT_SUFFIXES[self.mode]
+        )
+
+        with self.profiler.phase(self.mode) as phase:
+            mod = self.session.prepare_module(source)
+            if self.mode == EMIT_IR:
+                data = str(mod).encode("utf-8")
+            elif self.mode == EMIT_BC:
+                data = mod.as_bitcode()
+            else:
+                data = self.session.target_machine.emit_object(mod)
+            phase.counts["bytes"] = len(data)
+
+        with open(output_path, "wb") as f:
+            f.write(data)
+
+    def build(self, file_path: str, source: st_compiler.ModuleSource) -> None:
+        """Compile and link a native executable, named after the source by default."""
+        output_path = self.output or os.path.splitext(file_path)[0]
+
+        with self.profiler.phase(self.mode):
+            stellar_compiler = st_compiler.StellarCompiler(
+                source,
+                self.session.opt_level,
+                save_assembly=self.save_assembly,
+                save_bitcode=self.save_bitcode,
+            )
+            stellar_compiler.build_executable(output_path, self.cpu, self.features)
+
+    def process_parallel(self, file_paths: list[str]) -> None:
+        """
+        Compile all files on a process pool, then run them here one by one in
+        path order. Files that fail to compile are reported and skipped, and
+        fail the command.
+        """
+        session = self.session
+        with self.profiler.phase("build") as phase:
+            builds = list(
+                st_build.build_parallel(
+                    file_paths, session.opt_level, self.jobs, session.cache
+                )
+            )
+            phase.counts["files"] = len(builds)
+            phase.counts["object_bytes"] = sum(
+                len(build.object_code or b"") for build in builds
+            )
+
+        for build in builds:
+            if build.error:
+                print(
+                    f"{build.file_path}: compilation failed\n{build.error}",
+                    file=sys.stderr,
+                )
+                # Fails the command like a compile error without --jobs
+                self.status = 1
+                continue
+
+            self.profiler.source = build.file_path
+            with self.profiler.phase("execute"):
+                if build.object_code is None:
+                    ran = session.run_cached(build.cache_key)
+                else:
+                    if session.cache is not None:
+                        session.cache.put(
+                            build.cache_key, build.object_code, build.bitcode
+                        )
+                    session.run_object(build.object_code, build.entry_name)
+                    ran = True
+            if ran:
+                self.record_status()
+            else:
+                # Evicted from the cache since the build, compiled here
+                self.process_file(build.file_path)
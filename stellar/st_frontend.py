@@ -0,0 +1,78 @@
+"""
+The pipeline from source text to an LLVM module. The driver, the parallel
+builds, the server and the benchmarks all compile through these functions,
+which record each phase in `profiler`.
+"""
+import llvm_code_generator
+import st_ast
+import st_lexer
+import st_optimizer
+import st_parser
+import st_semantics
+from llvmlite import ir
+from st_profiler import NULL_PROFILER, Profiler
+
+
+def lex(code: str, profiler: Profiler = NULL_PROFILER) -> st_lexer.TokenBuffer:
+    with profiler.phase("lexer") as phase:
+        tokens = st_lexer.Lexer(code).parse()
+        phase.counts["tokens"] = len(tokens)
+    return tokens
+
+
+def parse(
+    tokens: st_lexer.TokenBuffer, profiler: Profiler = NULL_PROFILER
+) -> list[st_ast.Node]:
+    with profiler.phase("parser") as phase:
+        ast = st_parser.Parser(tokens).parse()
+        phase.counts["statements"] = len(ast)
+        if profiler.enabled:
+            phase.counts["ast_nodes"] = st_ast.count_nodes(ast)
+    return ast
+
+
+def optimize(
+    ast: list[st_ast.Node], profiler: Profiler = NULL_PROFILER
+) -> list[st_ast.Node]:
+    """Check the AST, then fold constants and remove dead stores in place."""
+    with profiler.phase("semantics"):
+        analyzer = st_semantics.SemanticAnalyzer(ast)
+        analyzer.analyze()
+
+    with profiler.phase("optimizer") as phase:
+        constant_folder = st_optimizer.ConstantFolder(ast)
+        constant_folder.optimize()
+        phase.counts["eliminated_nodes"] = constant_folder.eliminated_nodes
+        eliminator = st_optimizer.DeadStoreEliminator(ast, analyzer.def_use)
+        eliminator.optimize()
+        phase.counts["eliminated_statements"] = eliminator.eliminated_statements
+    return ast
+
+
+def generate_module(code: str, profiler: Profiler = NULL_PROFILER) -> ir.Module:
+    """Run the whole frontend on `code` and return the generated module."""
+    ast = optimize(parse(lex(code, profiler), profiler), profiler)
+    with profiler.phase("codegen") as phase:
+        llvm_generator = llvm_code_generator.LlvmGenerator(ast)
+        if profiler.enabled:
+            phase.counts["ir_instructions"] = llvm_generator.instruction_count()
+    return llvm_generator.module
+
+
+def generate_module_stream(code: str, profiler: Profiler = NULL_PROFILER) -> ir.Module:
+    """
+    Run the frontend as a pipeline of generators: each top-level statement
+    is lexed, parsed, checked and lowered to IR before the next one is read,
+    so neither all the tokens nor the AST are ever held in memory.
+
+    Dead stores are not removed, finding them takes the whole program.
+    """
+    # The phases are interleaved, so they are measured as one
+    with profiler.phase("frontend") as phase:
+        statements = st_parser.Parser(st_lexer.Lexer(code)).statements()
+        checked = st_semantics.SemanticAnalyzer(statements).analyze_stream()
+        optimized = st_optimizer.ConstantFolder(checked).optimize_stream()
+        llvm_generator = llvm_code_generator.LlvmGenerator(optimized)
+        if profiler.enabled:
+            phase.counts["ir_instructions"] = llvm_generator.instruction_count()
+    return llvm_generator.module
@@ -0,0 +1,500 @@
+from array import array
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import llvm_code_generator
+import st_lexer
+import st_optimizer
+import st_parser
+import st_semantics
+from llvm_code_generator import int32
+from llvmlite import ir
+from st_ast import (
+    BODIES,
+    CHILDREN,
+    AssignmentStatement,
+    ForStatement,
+    FunctionCall,
+    FunctionDeclaration,
+    ListLiteral,
+    Node,
+    Variable,
+    VariableDeclaration,
+)
+from st_lexer import Token, TokenBuffer, TokenKind
+from st_profiler import NULL_PROFILER, Profiler
+from st_symbols import FunctionSymbol, Symbol, SymbolTable
+
+# Type and whether a value was assigned, for every variable a statement uses
+Environment = tuple[tuple[str, Optional[str], bool], ...]
+
+
+@dataclass
+class StatementUnit:
+    """
+    One top-level statement and the source before it.
+
+    The unit spans from the end of the previous statement to the end of its
+    own terminating `;` or closing `}`, so units tile the source. Tokens are
+    lexed from the unit's own text and relative to `start` and `line_number`,
+    which lets a unit move without touching them.
+    """
+
+    start: int
+    end: int
+    line_number: int
+    tokens: TokenBuffer
+    # Checked and folded statements, None until parsed
+    nodes: Optional[list[Node]] = None
+    # A `/*` lexed as `/` and `*` because it is not closed. Text added after
+    # the unit can close it and change its tokens.
+    open_comment: bool = False
+    uses: tuple[str, ...] = ()
+    environment: Environment = ()
+    # Label of the first and IR text of all basic blocks generated for `nodes`
+    fragment: Optional[tuple[str, str]] = None
+
+    @property
+    def key(self) -> tuple:
+        """The statement's content, leading whitespace and comments left out."""
+        tokens = self.tokens
+        return (tokens.kinds.tobytes(), tuple(map(tokens.lexeme, range(len(tokens)))))
+
+    def moved(self, delta: int, line_delta: int) -> "StatementUnit":
+        return StatementUnit(
+            self.start + delta,
+            self.end + delta,
+            self.line_number + line_delta,
+            self.tokens,
+            self.nodes,
+            self.open_comment,
+            self.uses,
+            self.environment,
+            self.fragment,
+        )
+
+    def absolute_tokens(self) -> TokenBuffer:
+        return self.tokens.moved(self.start, self.line_number)
+
+
+class IncrementalCompiler:
+    """
+    Keeps the tokens and checked AST of each top-level statement of a file
+    between compilations, for watch and REPL style use.
+
+    `update` diffs the new source against the previous one and re-lexes
+    only the region between their common prefix and suffix. Statements in
+    that region whose content did not change keep their AST. A statement
+    is re-parsed and re-analyzed when it is new or when a variable it uses
+    was declared with another type or lost its value in the meantime.
+    """
+
+    def __init__(self, profiler: Profiler = NULL_PROFILER) -> None:
+        self.profiler = profiler
+        self.code = ""
+        self.units: list[StatementUnit] = []
+        # Statements lexed again by the last update
+        self.relexed = 0
+        self.generator = FragmentGenerator()
+
+    @property
+    def ast(self) -> list[Node]:
+        return [node for unit in self.units for node in unit.nodes]
+
+    def tokens(self) -> Iterator[Token]:
+        for unit in self.units:
+            yield from unit.absolute_tokens()
+
+    def update(self, code: str) -> list[Node]:
+        """
+        Compile the new source and return its checked and folded AST.
+        If it raises, the state of the previous successful update is kept.
+        """
+        with self.profiler.phase("relex") as phase:
+            units = self.relex(code)
+            phase.counts["statements"] = len(units)
+            phase.counts["relexed"] = self.relexed
+
+        with self.profiler.phase("reparse") as phase:
+            phase.counts["reparsed"] = self.reparse(units)
+
+        self.code = code
+        self.units = units
+        return self.ast
+
+    def generate_module(self) -> str:
+        """
+        Return the IR of the program. Only statements without an IR fragment
+        from an earlier call are lowered, the rest is joined as text.
+        """
+        with self.profiler.phase("codegen") as phase:
+            llvm_ir = self.generator.module_text(self.units)
+            phase.counts["generated"] = self.generator.generated
+        return llvm_ir
+
+    def relex(self, code: str) -> list[StatementUnit]:
+        """
+        Build the units of `code`, reusing the previous ones outside the edited
+        region. Re-lexed statements with a known content get that AST back.
+        """
+        old_code, old_units = self.code, self.units
+        prefix = common_prefix(old_code, code)
+        suffix = common_suffix(old_code, code, min(len(old_code), len(code)) - prefix)
+        delta = len(code) - len(old_code)
+
+        # Units ending before the edit are kept as they are. Lexing restarts at
+        # the end of the last of them, since no token spans a `;`. A unit
+        # ending in `}` is lexed again, the edit may add an `else` to it.
+        first = 0
+        while first < len(old_units) and old_units[first].end <= prefix:
+            unit = old_units[first]
+            if unit.open_comment or unit.tokens.kinds[-1] != TokenKind.SEMICOLON:
+                break
+            first += 1
+        units = old_units[:first]
+        start = units[-1].end if units else 0
+        line_number = units[-1].line_number if units else 0
+        if units and units[-1].tokens:
+            line_number += units[-1].tokens.lines[-1]
+
+        # Units starting in the unchanged suffix can be reused as they are
+        suffix_start = len(old_code) - suffix
+        reusable = find_unit(old_units, suffix_start, first)
+        known = {
+            unit.key: unit
+            for unit in old_units[first:reusable]
+            if unit.nodes is not None
+        }
+
+        self.relexed = 0
+        lexer = st_lexer.Lexer(code, start, line_number)
+        scanned = lexer.tokens
+        # Index of the first token of the unit being lexed
+        first = 0
+
+        def close_unit(last: int) -> bool:
+            """End the unit after the token `last`. True once back in step with
+            the old source, when the rest of the old units were added."""
+            nonlocal start, line_number, first
+            end = scanned.ends[last]
+            self.relexed += 1
+            tokens = unit_tokens(scanned, first, last + 1, start, end, line_number)
+            units.append(self.new_unit(start, end, line_number, tokens, known))
+            start, line_number, first = end, scanned.lines[last], last + 1
+
+            index = find_unit(old_units, start - delta, reusable)
+            if index < len(old_units) and old_units[index].start == start - delta:
+                line_delta = line_number - old_units[index].line_number
+                units.extend(
+                    unit.moved(delta, line_delta) for unit in old_units[index:]
+                )
+                return True
+            return False
+
+        # Statements end at a `;` or at the `}` of a block outside any other,
+        # unless an `else` follows it
+        depth = 0
+        closing_brace: Optional[int] = None
+        kinds = scanned.kinds
+        for index in lexer.scan():
+            kind = kinds[index]
+            if closing_brace is not None and kind != TokenKind.ELSE:
+                if close_unit(closing_brace):
+                    return units
+            closing_brace = None
+
+            if kind == TokenKind.LBRACE:
+                depth += 1
+            elif kind == TokenKind.RBRACE:
+                depth = max(depth - 1, 0)
+                if depth == 0:
+                    closing_brace = index
+            elif kind == TokenKind.SEMICOLON and depth == 0:
+                if close_unit(index):
+                    return units
+
+        if closing_brace is not None:
+            close_unit(closing_brace)
+        if first < len(scanned):
+            # An unterminated statement at the end of the file
+            self.relexed += 1
+            end = len(code)
+            tokens = unit_tokens(scanned, first, len(scanned), start, end, line_number)
+            units.append(self.new_unit(start, end, line_number, tokens, known))
+        return units
+
+    @staticmethod
+    def new_unit(start, end, line_number, tokens, known) -> StatementUnit:
+        unit = StatementUnit(start, end, line_number, tokens)
+        kinds, starts = tokens.kinds, tokens.starts
+        unit.open_comment = any(
+            kinds[index] == TokenKind.DIVIDE
+            and kinds[index + 1] == TokenKind.MULTIPLY
+            and starts[index + 1] == starts[index] + 1
+            for index in range(len(kinds) - 1)
+        )
+        previous = known.get(unit.key)
+        if previous is not None:
+            unit.nodes = previous.nodes
+            unit.uses = previous.uses
+            unit.environment = previous.environment
+            unit.fragment = previous.fragment
+        return unit
+
+    def reparse(self, units: list[StatementUnit]) -> int:
+        """
+        Walk the statements in order, tracking the declared variables, and
+        parse, check and fold the new ones and those whose environment
+        changed. Returns how many statements were parsed.
+        """
+        symbols = SymbolTable()
+        reparsed = 0
+        for unit in units:
+            if unit.nodes is not None:
+                environment = get_environment(symbols, unit.uses)
+                if environment == unit.environment:
+                    apply_declarations(symbols, unit.nodes)
+                    continue
+            self.parse_unit(unit, symbols)
+            reparsed += 1
+        return reparsed
+
+    def parse_unit(self, unit: StatementUnit, symbols: SymbolTable) -> None:
+        tokens = unit.absolute_tokens()
+        # Parsing declares the unit's variables, so look the names up first
+        names = {
+            tokens.lexeme(index)
+            for index, kind in enumerate(tokens.kinds)
+            if kind == TokenKind.IDENTIFIER
+        }
+        before = get_environment(symbols, tuple(sorted(names)))
+
+        nodes = st_parser.Parser(tokens, symbols).parse()
+        st_semantics.SemanticAnalyzer(nodes).analyze()
+        st_optimizer.ConstantFolder(nodes).optimize()
+
+        uses = tuple(sorted({symbol.name for symbol in used_symbols(nodes)}))
+        environment = tuple(entry for entry in before if entry[0] in uses)
+        unit.nodes, unit.uses, unit.environment = nodes, uses, environment
+        unit.fragment = None
+
+
+class FragmentGenerator(llvm_code_generator.LlvmGenerator):
+    """
+    Lowers statements one at a time into basic blocks of the program.
+
+    Each statement's blocks are kept as IR text and the statements are
+    chained with branches when the module text is put together. Variables
+    live in allocas of the entry block, one per name, type and scope depth,
+    so a fragment stays valid as long as the variables it uses keep their
+    types. Likewise there is one function per name and signature, whose
+    body is replaced when its declaration is generated again.
+    """
+
+    def __init__(self) -> None:
+        super().__init__([])
+        # The entry block only holds the allocas, the program returns from its own
+        self.builder.remove(self.block.terminator)
+        self.exit_block = self.function.append_basic_block("exit")
+        exit_builder = ir.IRBuilder(self.exit_block)
+        exit_builder.call(self.output.flush_function(), [])
+        exit_builder.ret(int32(0))
+        self.exit_label = f"\n{self.exit_block.name}:\n"
+
+        self.slots: dict[tuple[str, str, int], ir.AllocaInstr] = {}
+        self.functions: dict[tuple[str, str], ir.Function] = {}
+        # Fragments lowered by the last module_text call
+        self.generated = 0
+
+    def allocate(self, symbol: Symbol):
+        # Function bodies are generated as a whole, only the program has slots
+        if self.builder.function is not self.function:
+            return super().allocate(symbol)
+        # Variables of nested scopes must not share the slot of a live
+        # outer variable of the same name
+        key = (symbol.name, symbol.variable_type, symbol.depth)
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = super().allocate(symbol)
+        return slot
+
+    def declare_function(self, symbol: FunctionSymbol) -> ir.Function:
+        # Fragments calling the function keep referring to it by name
+        key = (symbol.name, symbol.variable_type)
+        function = self.functions.get(key)
+        if function is None:
+            function = self.functions[key] = super().declare_function(symbol)
+        else:
+            function.blocks.clear()
+            symbol.value = function
+        return function
+
+    def generate_fragment(self, unit: StatementUnit) -> tuple[str, str]:
+        # Reused statements may still refer to the symbols of an older parse
+        for symbol in used_symbols(unit.nodes, functions=False):
+            if type(symbol) is FunctionSymbol:
+                symbol.value = self.functions[(symbol.name, symbol.variable_type)]
+            else:
+                symbol.value = self.allocate(symbol)
+
+        # Control flow adds blocks, the one generation ends in is the last
+        first = len(self.function.blocks)
+        block = self.function.append_basic_block("statement")
+        self.builder.position_at_end(block)
+        self.generate_llvm_ir(unit.nodes)
+        blocks = self.function.blocks[first:]
+        del self.function.blocks[first:]
+
+        text: list[str] = []
+        for fragment_block in blocks:
+            fragment_block.descr(text)
+        return block.name, "".join(text)
+
+    def module_text(self, units: list[StatementUnit]) -> str:
+        self.generated = 0
+        labels = set()
+        body = []
+        for unit in units:
+            # A fragment is a block and can only be used once
+            if unit.fragment is None or unit.fragment[0] in labels:
+                unit.fragment = self.generate_fragment(unit)
+                self.generated += 1
+            label, text = unit.fragment
+            labels.add(label)
+            body.append(f'  br label %"{label}"\n')
+            body.append(text)
+        body.append(f'  br label %"{self.exit_block.name}"\n')
+        # The new fragments may raise errors the old ones could not
+        self.generate_main()
+
+        # Put the statements between the entry and the exit block
+        module_text = str(self.module)
+        index = module_text.index(self.exit_label) + 1
+        return module_text[:index] + "".join(body) + module_text[index:]
+
+
+def unit_tokens(
+    scanned: TokenBuffer, first: int, stop: int, start: int, end: int, line_number: int
+) -> TokenBuffer:
+    """
+    The tokens `first` to `stop` of `scanned` as a buffer over the unit's
+    text `start:end`, relative to its start and `line_number`.
+    """
+    tokens = TokenBuffer(scanned.source[start:end])
+    tokens.kinds = scanned.kinds[first:stop]
+    tokens.starts = array(
+        "i", [offset - start for offset in scanned.starts[first:stop]]
+    )
+    tokens.ends = array("i", [offset - start for offset in scanned.ends[first:stop]])
+    tokens.lines = array(
+        "i", [line - line_number for line in scanned.lines[first:stop]]
+    )
+    return tokens
+
+
+def find_unit(units: list[StatementUnit], start: int, low: int = 0) -> int:
+    """Index of the first of `units` from `low` on that starts at or after `start`."""
+    high = len(units)
+    while low < high:
+        middle = (low + high) // 2
+        if units[middle].start < start:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Length of the common prefix of `a` and `b`, found by bisection."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of `a` and `b`, at most `limit`."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle : len(a) - low] == b[len(b) - middle : len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def get_environment(symbols: SymbolTable, uses: tuple[str, ...]) -> Environment:
+    environment = []
+    for name in uses:
+        symbol = symbols.lookup(name)
+        if symbol is None:
+            environment.append((name, None, False))
+        else:
+            environment.append((name, symbol.variable_type, symbol.initialized))
+    return tuple(environment)
+
+
+def apply_declarations(symbols: SymbolTable, nodes: list[Node]) -> None:
+    """Declare and assign the variables of parsed statements like the parser."""
+    for node in nodes:
+        node_class = type(node)
+        if node_class is VariableDeclaration:
+            node.symbol.initialized = node.expression is not None
+            symbols.define(node.symbol)
+        elif node_class is FunctionDeclaration:
+            # Its body cannot assign anything outside of it
+            symbols.define(node.symbol)
+        elif node_class is AssignmentStatement:
+            symbols.lookup(node.variable_name).initialized = True
+        elif node_class in BODIES:
+            # Blocks declare in their own scope, but assign outer variables too
+            for field in BODIES[node_class]:
+                symbols.enter_scope()
+                if node_class is ForStatement:
+                    symbols.define(node.symbol)
+                apply_declarations(symbols, getattr(node, field))
+                symbols.exit_scope()
+
+
+def used_symbols(nodes: list[Node], functions: bool = True) -> list[Symbol]:
+    """
+    Symbols of the variables the statements read or assign and of the
+    functions they call. With `functions` false, the bodies of function
+    declarations are left out.
+    """
+    symbols = []
+    stack: list = list(nodes)
+    while stack:
+        node = stack.pop()
+        node_class = type(node)
+        if node_class is Variable:
+            symbols.append(node.symbol)
+        elif node_class is list:
+            stack.extend(node)
+        elif node_class is FunctionDeclaration:
+            if functions:
+                # Declaring a name that is taken is an error, so the
+                # declaration depends on its own name too
+                symbols.append(node.symbol)
+                stack.extend(node.body)
+                symbols.extend(node.parameters)
+        elif node_class is FunctionCall:
+            symbols.append(node.symbol)
+            stack.extend(node.arguments)
+        elif node_class in CHILDREN:
+            stack.extend(getattr(node, field) for field in CHILDREN[node_class])
+            stack.extend(getattr(node, field) for field in BODIES.get(node_class, ()))
+            if node_class is ForStatement:
+                symbols.append(node.symbol)
+        elif node_class is ListLiteral:
+            stack.extend(node.elements)
+        elif node is not None and hasattr(node, "expression"):
+            if node_class is AssignmentStatement:
+                symbols.append(node.symbol)
+            stack.append(node.expression)
+    return symbols
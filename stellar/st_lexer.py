@@ -1,11 +1,17 @@
 import re
+from array import array
+from collections.abc import Iterator
 from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional
 
 import errors
 
 
 @dataclass
 class Token:
+    """One token of a TokenBuffer, made on demand for errors and debugging."""
+
     token_type: str
     pattern: str
     position: int = 0
@@ -14,7 +20,7 @@ class Token:
 
 COMMENTS = [
     Token("COMMENT", r"//.*"),
-    Token("MULTI_LINE_COMMENT", r"(?s)/\\*.*?\\*/"),
+    Token("MULTI_LINE_COMMENT", r"(?s:/\*.*?\*/)"),
 ]
 
 VAR_TYPES = [
@@ -40,6 +46,16 @@ OPEATORS = [
     Token("DIVIDE", r"/(?![/])"),  # Matches '/' not followed by '/'
 ]
 
+# Before EQUALS, and `<=` before `<`
+COMPARISON_OPERATORS = [
+    Token("EQUAL", r"=="),
+    Token("NOT_EQUAL", r"!="),
+    Token("LESS_EQUAL", r"<="),
+    Token("GREATER_EQUAL", r">="),
+    Token("LESS", r"<"),
+    Token("GREATER", r">"),
+]
+
 GROUPING_SYMBOLS = [
     Token("LPAREN", r"\("),
     Token("RPAREN", r"\)"),
@@ -49,9 +65,22 @@ GROUPING_SYMBOLS = [
     Token("RBRACKET", r"\]"),
 ]
 
+# Whole words only, so names like `format` or `index` stay identifiers
+KEYWORDS = [
+    Token("IF", r"if\b"),
+    Token("ELSE", r"else\b"),
+    Token("WHILE", r"while\b"),
+    Token("FOR", r"for\b"),
+    Token("IN", r"in\b"),
+    Token("DEF", r"def\b"),
+    Token("RETURN", r"return\b"),
+]
+
 TOKEN_TYPES = [
     *COMMENTS,
+    Token("ARROW", r"->"),  # Before MINUS
     *OPEATORS,
+    *COMPARISON_OPERATORS,
     *GROUPING_SYMBOLS,
     *VAR_TYPES,
     *VAR_VALUES,
@@ -61,6 +90,7 @@ TOKEN_TYPES = [
     Token("DOT", r"\."),
     Token("COMMA", r","),
     Token("PRINT", r"print"),
+    *KEYWORDS,
     Token("IDENTIFIER", r"[a-zA-Z_]\w*"),
 ]
 
@@ -68,52 +98,151 @@ TOKEN_TYPES = [
 WHITESPACE_PATTERN = r"\s+"
 COMMENT_PATTERN = r"//.*"
 
+SKIPPED_TOKENS = {"WHITESPACE", "COMMENT", "MULTI_LINE_COMMENT"}
+
+
+def _token_groups(token_types: list[Token]) -> dict[str, str]:
+    """
+    Patterns of the groups of the master regex, by token type.
+
+    Alternatives are tried left to right, so the order of `token_types`
+    is the match priority. Duplicate token types keep their first pattern.
+    """
+    groups = {"WHITESPACE": WHITESPACE_PATTERN}
+    for token in token_types:
+        groups.setdefault(token.token_type, token.pattern)
+    return groups
+
+
+TOKEN_GROUPS = _token_groups(TOKEN_TYPES)
+MASTER_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_GROUPS.items())
+)
+
+# Token kinds in match priority order, kept as small ints in token buffers
+TokenKind = IntEnum(  # type: ignore
+    "TokenKind",
+    [name for name in TOKEN_GROUPS if name not in SKIPPED_TOKENS],
+    start=0,
+)
+KIND_NAMES = tuple(kind.name for kind in TokenKind)
+# Kind of the token each group of MASTER_PATTERN matches, by group index.
+# The patterns have no capturing groups of their own, so `match.lastindex`
+# is the index of the alternative that matched.
+GROUP_KINDS: tuple[Optional[TokenKind], ...] = (
+    None,
+    *(
+        None if name in SKIPPED_TOKENS else TokenKind[name]  # type: ignore
+        for name in TOKEN_GROUPS
+    ),
+)
+
+
+class TokenBuffer:
+    """
+    Tokens of `source` as parallel columns: kind, start and end offset and
+    line number. Lexemes stay in the source and are only sliced out when
+    asked for, so a token costs a few bytes instead of an object and a
+    string.
+
+    `offset` and `line_offset` are added to the positions and line numbers
+    of the Token views, for buffers over a part of a larger source.
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "lines", "offset", "line_offset")
+
+    def __init__(self, source: str, offset: int = 0, line_offset: int = 0) -> None:
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.lines = array("i")
+        self.offset = offset
+        self.line_offset = line_offset
+
+    def append(self, kind: int, start: int, end: int, line_number: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line_number)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def lexeme(self, index: int) -> str:
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def token(self, index: int) -> Token:
+        return Token(
+            KIND_NAMES[self.kinds[index]],
+            self.lexeme(index),
+            self.starts[index] + self.offset,
+            self.lines[index] + self.line_offset,
+        )
+
+    def __getitem__(self, index: int) -> Token:
+        return self.token(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        return map(self.token, range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"TokenBuffer({list(self)!r})"
+
+    def discard(self, count: int) -> None:
+        """Drop the first `count` tokens."""
+        for column in (self.kinds, self.starts, self.ends, self.lines):
+            del column[:count]
+
+    def moved(self, offset: int, line_offset: int) -> "TokenBuffer":
+        """The same tokens, with views at another position and line."""
+        tokens = TokenBuffer(self.source, offset, line_offset)
+        tokens.kinds, tokens.starts = self.kinds, self.starts
+        tokens.ends, tokens.lines = self.ends, self.lines
+        return tokens
+
 
 class Lexer:
-    def __init__(self, input_code) -> None:
+    def __init__(self, input_code, position: int = 0, line_number: int = 0) -> None:
+        """Scan `input_code` from `position`, which is on line `line_number`."""
         self.input_code = input_code
-        self.tokens: list[Token] = []
-        self._position = 0
-        self._pattern = None
-        self._line_number = 0
-
-    def parse(self) -> list[Token]:
-        while self._position < len(self.input_code):
-            matched = False
+        self.tokens = TokenBuffer(input_code)
+        self._position = position
+        self._line_number = line_number
 
-            if self.input_code[self._position] == "\n":
-                self._line_number += 1
+    def parse(self) -> TokenBuffer:
+        for _ in self.scan():
+            pass
+        return self.tokens
 
-            # Skip whitespace characters
-            whitespace_match = re.match(
-                WHITESPACE_PATTERN, self.input_code[self._position :]
+    def scan(self) -> Iterator[int]:
+        """
+        Append tokens to `self.tokens` one at a time as the source is
+        scanned, yielding the index of each.
+        """
+        code = self.input_code
+        tokens = self.tokens
+        scanner = MASTER_PATTERN.scanner(code, self._position)
+        count = code.count
+        position, line_number = self._position, self._line_number
+
+        for match in iter(scanner.match, None):
+            kind = GROUP_KINDS[match.lastindex]  # type: ignore
+            start, position = match.span()
+            if kind is not None:
+                tokens.append(kind, start, position, line_number)
+                yield len(tokens) - 1
+            line_number += count("\n", start, position)
+
+        self._position, self._line_number = position, line_number
+        if position < len(code):
+            raise errors.SyntaxError(
+                position=position,
+                code=code,
+                line_number=line_number,
             )
-            if whitespace_match:
-                self._position += whitespace_match.end()
-                continue
-
-            for token in TOKEN_TYPES:
-                regex = re.compile(token.pattern)
-                match = regex.match(self.input_code, self._position)
-
-                if match:
-                    value = match.group(0)
-                    token = Token(
-                        token.token_type, value, self._position, self._line_number
-                    )
-                    if token.token_type not in ["COMMENT", "MULTI_LINE_COMMENT"]:
-                        self.tokens.append(token)
-                    self._position = match.end()
-                    matched = True
-                    break
-
-            if not matched:
-                # TODO
-                raise errors.SyntaxError(
-                    position=self._position,
-                    code=self.input_code,
-                    line_number=self._line_number,
-                )
-
-        # TODO wrong line number
-        return self.tokens
+
+    def tokenize(self) -> Iterator[Token]:
+        """Yield tokens one at a time as the source is scanned."""
+        for index in self.scan():
+            yield self.tokens.token(index)
@@ -0,0 +1,353 @@
+import math
+from typing import Optional
+
+from st_ast import (
+    BODIES,
+    CHILDREN,
+    STATEMENTS,
+    AssignmentStatement,
+    BinaryOperation,
+    ForStatement,
+    FunctionCall,
+    FunctionDeclaration,
+    IfStatement,
+    IndexOperation,
+    ListLiteral,
+    Literal,
+    Node,
+    ReturnStatement,
+    Variable,
+    VariableDeclaration,
+    WhileStatement,
+    count_nodes,
+)
+from st_semantics import DefUseChains
+
+INT32_MIN = -(2**31)
+INT32_MAX = 2**31 - 1
+
+# Right operands that leave the left operand unchanged, e.g. `x - 0`, `x / 1`
+RIGHT_IDENTITIES = {"PLUS": 0, "MINUS": 0, "MULTIPLY": 1, "DIVIDE": 1}
+# Left operands that leave the right operand unchanged, e.g. `0 + x`, `1 * x`
+LEFT_IDENTITIES = {"PLUS": 0, "MULTIPLY": 1}
+
+# Statement fields holding an expression
+FOLDED_FIELDS = ("index", "expression", "condition", "start", "stop")
+
+
+def wrap_int32(value: int) -> int:
+    """Wrap an integer the way i32 arithmetic in the generated code does."""
+    return (value - INT32_MIN) % 2**32 + INT32_MIN
+
+
+class ConstantFolder:
+    """
+    Fold constant subexpressions and simplify arithmetic identities
+    (`x + 0`, `x * 1`, `x * 0`, ...) in place, before IR generation.
+    The number of removed nodes is kept in `eliminated_nodes`.
+    """
+
+    def __init__(self, ast) -> None:
+        self.ast = ast
+        self.eliminated_nodes = 0
+
+    def optimize(self):
+        for node in self.ast:
+            self.optimize_statement(node)
+        return self.ast
+
+    def optimize_stream(self):
+        for node in self.ast:
+            yield self.optimize_statement(node)
+
+    def optimize_statement(self, node: Node) -> Node:
+        for field in FOLDED_FIELDS:
+            expression = getattr(node, field, None)
+            if expression is not None:
+                before = count_nodes(expression)
+                folded = self.fold(expression)
+                setattr(node, field, folded)
+                self.eliminated_nodes += before - count_nodes(folded)
+        for field in BODIES.get(type(node), ()):
+            for statement in getattr(node, field):
+                self.optimize_statement(statement)
+        return node
+
+    def fold(self, root: Node) -> Node:
+        """
+        Return the folded form of the expression `root`.
+
+        Operations are folded bottom up from an explicit stack, so deep
+        expressions do not hit the recursion limit.
+        """
+        # Folded operands, in the order the operations consume them
+        results: list[Node] = []
+        # (node, whether its operands were already folded)
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            node_class = type(node)
+            if node_class in CHILDREN:
+                fields = CHILDREN[node_class]
+                if not operands_done:
+                    stack.append((node, True))
+                    for field in reversed(fields):
+                        stack.append((getattr(node, field), False))
+                    continue
+                for field in reversed(fields):
+                    setattr(node, field, results.pop())
+                if node_class is BinaryOperation:
+                    results.append(self.fold_operation(node))
+                else:
+                    results.append(node)
+            elif node_class is ListLiteral:
+                node.elements = [self.fold(el) for el in node.elements]
+                results.append(node)
+            elif node_class is FunctionCall:
+                node.arguments = [self.fold(el) for el in node.arguments]
+                results.append(node)
+            else:
+                results.append(node)
+        return results.pop()
+
+    def fold_operation(self, node: BinaryOperation) -> Node:
+        left = node.left_operand
+        right = node.right_operand
+        operator = node.operator
+
+        if type(left) is Literal and type(right) is Literal:
+            folded = self.fold_literals(operator, left, right)
+            if folded is not None:
+                return folded
+
+        if is_identity(right, operator, RIGHT_IDENTITIES):
+            return left
+        if is_identity(left, operator, LEFT_IDENTITIES):
+            return right
+
+        # x * 0 is only safe to drop for integers, floats may be nan or inf,
+        # and only if x has no effects, a call or an index out of range
+        if operator == "MULTIPLY":
+            for operand, other in ((left, right), (right, left)):
+                if (
+                    is_number(operand, 0)
+                    and operand.value_type == "INT"
+                    and not has_effects(other)
+                ):
+                    return operand
+
+        return node
+
+    @staticmethod
+    def fold_literals(operator: str, left: Literal, right: Literal):
+        value_type = left.value_type
+        if value_type != right.value_type or value_type not in ("INT", "FLOAT"):
+            return None
+
+        cast = int if value_type == "INT" else float
+        left_value, right_value = cast(left.value), cast(right.value)
+
+        if operator == "PLUS":
+            value = left_value + right_value
+        elif operator == "MINUS":
+            value = left_value - right_value
+        elif operator == "MULTIPLY":
+            value = left_value * right_value
+        elif operator == "DIVIDE":
+            if right_value == 0:
+                # Leave division by zero to the runtime
+                return None
+            if value_type == "INT":
+                if left_value == INT32_MIN and right_value == -1:
+                    return None
+                # sdiv truncates towards zero
+                value = abs(left_value) // abs(right_value)
+                if (left_value < 0) != (right_value < 0):
+                    value = -value
+            else:
+                value = left_value / right_value
+        else:
+            return None
+
+        if value_type == "INT":
+            value = wrap_int32(value)
+        return Literal(value_type, repr(value))
+
+
+class DeadStoreEliminator:
+    """
+    Remove the stores no statement reads before the variable is assigned
+    again or the program ends, then the declarations of the variables
+    nothing reads any more, in place, before IR generation. A variable
+    declared again is a new variable, so this also drops redeclared
+    variables whose last value is never read.
+
+    Liveness is computed backwards over each statement list. Everything a
+    loop reads is taken to be live throughout its body. Stores whose value
+    has effects, a call or an index that may be out of range, are kept.
+    The number of removed statements is kept in `eliminated_statements`.
+    """
+
+    def __init__(self, ast, def_use: DefUseChains) -> None:
+        self.ast = ast
+        self.def_use = def_use
+        self.eliminated_statements = 0
+        # Ids of the statements whose stored value was dropped
+        self.dead: set[int] = set()
+
+    def optimize(self):
+        self.eliminate(self.ast, set())
+        unused = self.unused_declarations()
+        if unused:
+            self.remove(self.ast, unused)
+        return self.ast
+
+    def eliminate(self, body: list[Node], live: set[int]) -> set[int]:
+        """
+        Drop the dead stores of the statements `body` given the ids of the
+        symbols live after them and return the ones live before them.
+        """
+        live = set(live)
+        kept = []
+        for node in reversed(body):
+            node_class = type(node)
+            if node_class is AssignmentStatement or node_class is VariableDeclaration:
+                symbol = id(node.symbol)
+                if (
+                    node.expression is not None
+                    and symbol not in live
+                    and not has_effects(node.expression)
+                ):
+                    self.dead.add(id(node))
+                    if node_class is AssignmentStatement:
+                        self.eliminated_statements += 1
+                        continue
+                    # The declaration still allocates, it may be assigned later
+                    node.expression = None
+                live.discard(symbol)
+                if node.expression is not None:
+                    live |= read_symbols(node.expression)
+            elif node_class is ReturnStatement:
+                # Nothing of the function is read after it returns
+                live = read_symbols(node.expression)
+            elif node_class is IfStatement:
+                live = (
+                    self.eliminate(node.body, live)
+                    | self.eliminate(node.orelse, live)
+                    | read_symbols(node.condition)
+                )
+            elif node_class is WhileStatement or node_class is ForStatement:
+                live |= read_symbols(node)
+                if node_class is ForStatement:
+                    # Read by the increment after each iteration
+                    live.add(id(node.symbol))
+                self.eliminate(node.body, live)
+            elif node_class is FunctionDeclaration:
+                # Functions see no outer variables, so `live` is unchanged
+                self.eliminate(node.body, set())
+            else:
+                live |= read_symbols(node)
+            kept.append(node)
+        kept.reverse()
+        body[:] = kept
+        return live
+
+    def unused_declarations(self) -> set[int]:
+        """Ids of the declarations of variables no remaining statement reads."""
+        dead = self.dead
+        unused = set()
+        for symbol, definitions in self.def_use.definitions.items():
+            uses = self.def_use.uses.get(symbol, ())
+            if any(id(statement) not in dead for statement in uses):
+                continue
+            # Assignments left are kept for their effects and need the storage
+            if all(
+                (
+                    type(statement) is VariableDeclaration
+                    and statement.expression is None
+                )
+                or (type(statement) is AssignmentStatement and id(statement) in dead)
+                for statement in definitions
+            ):
+                unused.update(
+                    id(statement)
+                    for statement in definitions
+                    if type(statement) is VariableDeclaration
+                )
+        return unused
+
+    def remove(self, body: list[Node], unused: set[int]) -> None:
+        kept = []
+        for node in body:
+            if id(node) in unused:
+                self.eliminated_statements += 1
+                continue
+            for field in BODIES.get(type(node), ()):
+                self.remove(getattr(node, field), unused)
+            kept.append(node)
+        body[:] = kept
+
+
+def is_number(node: Node, number) -> bool:
+    if number is None or type(node) is not Literal:
+        return False
+    if node.value_type not in ("INT", "FLOAT"):
+        return False
+    return float(node.value) == number
+
+
+def is_identity(node: Node, operator: str, identities: dict[str, int]) -> bool:
+    if not is_number(node, identities.get(operator)):
+        return False
+    if node.value_type == "INT":
+        return True
+    # -0.0 + 0.0 is +0.0 and x - -0.0 is x + 0.0, so for floats zero is
+    # only an identity when it is +0.0 and subtracted
+    return operator != "PLUS" and math.copysign(1.0, float(node.value)) > 0
+
+
+def has_effects(root: Node) -> bool:
+    """Whether evaluating `root` can do more than compute a value."""
+    # Calls may print, indexing out of range ends the program
+    return contains(root, (FunctionCall, IndexOperation))
+
+
+def contains(root: Node, node_classes: tuple) -> bool:
+    """Whether the expression `root` contains a node of `node_classes`."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node_class = type(node)
+        if node_class in node_classes:
+            return True
+        if node_class in CHILDREN:
+            stack.extend(getattr(node, field) for field in CHILDREN[node_class])
+        elif node_class is ListLiteral:
+            stack.extend(node.elements)
+        elif node_class is FunctionCall:
+            stack.extend(node.arguments)
+    return False
+
+
+def read_symbols(root: Optional[Node]) -> set[int]:
+    """Ids of the symbols of the variables read in `root` and its statements."""
+    symbols = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        node_class = type(node)
+        if node_class is Variable:
+            symbols.add(id(node.symbol))
+        elif node_class in CHILDREN:
+            stack.extend(getattr(node, field) for field in CHILDREN[node_class])
+            stack.extend(getattr(node, field) for field in BODIES.get(node_class, ()))
+        elif node_class is ListLiteral:
+            stack.extend(node.elements)
+        elif node_class is FunctionCall:
+            stack.extend(node.arguments)
+        elif node_class in STATEMENTS and node.expression is not None:
+            stack.append(node.expression)
+    return symbols
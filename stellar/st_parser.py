@@ -1,214 +1,535 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from typing import Optional, Union
 
 import errors
-from st_lexer import Token
-
-variables: dict = {}
+from st_ast import (
+    BODIES,
+    AppendStatement,
+    AssignmentStatement,
+    BinaryOperation,
+    Comparison,
+    ExpressionStatement,
+    ForStatement,
+    FunctionCall,
+    FunctionDeclaration,
+    IfStatement,
+    IndexAssignmentStatement,
+    IndexOperation,
+    LengthOperation,
+    ListLiteral,
+    Literal,
+    Node,
+    PrintStatement,
+    ReturnStatement,
+    Variable,
+    VariableDeclaration,
+    WhileStatement,
+    list_type,
+)
+from st_lexer import KIND_NAMES, Lexer, Token, TokenBuffer, TokenKind
+from st_symbols import FunctionSymbol, SymbolTable
+
+COMPARISON_OPERATORS = (
+    TokenKind.EQUAL,
+    TokenKind.NOT_EQUAL,
+    TokenKind.LESS,
+    TokenKind.LESS_EQUAL,
+    TokenKind.GREATER,
+    TokenKind.GREATER_EQUAL,
+)
+# Types of the type keywords
+TYPE_NAMES = {
+    TokenKind.TYPE_INT: "INT",
+    TokenKind.TYPE_FLOAT: "FLOAT",
+    TokenKind.TYPE_STR: "STR",
+    TokenKind.TYPE_LIST: "LIST",
+    TokenKind.TYPE_DICT: "DICT",
+    TokenKind.TYPE_BOOL: "BOOL",
+}
+# Element types a `list[...]` annotation accepts
+ELEMENT_TYPE_TOKENS = (TokenKind.TYPE_INT, TokenKind.TYPE_FLOAT, TokenKind.TYPE_STR)
+
+
+class TokenStream:
+    """Cursor over the tokens shared by the parser and all its sub-parsers.
+
+    Tokens are addressed by a position index into the columns of a
+    TokenBuffer and the parser decides on their kinds alone. Lexemes are
+    only sliced out of the source for the names and literals it keeps. A
+    Lexer is scanned on demand and the consumed prefix of its buffer is
+    dropped by `release` between statements.
+    """
+
+    def __init__(self, tokens: Union[TokenBuffer, Lexer]) -> None:
+        if isinstance(tokens, Lexer):
+            self._source: Optional[Iterator[int]] = tokens.scan()
+            self.buffer = tokens.tokens
+        else:
+            self._source = None
+            self.buffer = tokens
+        self._lazy = self._source is not None
+        self._kinds = self.buffer.kinds
+        self.position = 0
+
+    def _fill(self, index: int) -> bool:
+        while index >= len(self._kinds):
+            if self._source is None:
+                return False
+            if next(self._source, None) is None:
+                self._source = None
+                return False
+        return True
+
+    def __bool__(self) -> bool:
+        return self.kind() is not None
+
+    def kind(self, offset: int = 0) -> Optional[int]:
+        """Kind of the token `offset` tokens ahead, None past the end."""
+        index = self.position + offset
+        if index < len(self._kinds) or self._fill(index):
+            return self._kinds[index]
+        return None
+
+    def check(self, *kinds: int) -> bool:
+        return self.kind() in kinds
+
+    def advance(self) -> int:
+        """Move past the current token and return its index."""
+        index = self.position
+        if index >= len(self._kinds) and not self._fill(index):
+            raise errors.UnexpectedTokenError(None)
+        self.position = index + 1
+        return index
+
+    def expect(self, kind: int) -> int:
+        if self.kind() != kind:
+            raise errors.UnexpectedTokenError(self.token(), KIND_NAMES[kind])
+        return self.advance()
+
+    def lexeme(self, index: int) -> str:
+        return self.buffer.lexeme(index)
+
+    def token(self, offset: int = 0) -> Optional[Token]:
+        """The token `offset` tokens ahead as a Token, for error messages."""
+        if self.kind(offset) is None:
+            return None
+        return self.buffer.token(self.position + offset)
+
+    def release(self) -> None:
+        if self._lazy and self.position:
+            self.buffer.discard(self.position)
+            self.position = 0
 
 
 class BaseParser(ABC):
-    def __init__(self, tokens: list[Token]) -> None:
-        self.tokens: list[Token] = tokens
-        self.ast: list[dict] = []
+    def __init__(self, tokens: TokenStream, symbols: SymbolTable) -> None:
+        self.tokens: TokenStream = tokens
+        # Shared by all sub-parsers, resolves names as they are parsed
+        self.symbols = symbols
+        self.ast: list[Node] = []
 
     @abstractmethod
     def parse(self):
         ...
 
+    def variable(self, name: str) -> Variable:
+        """A use of the variable `name`, which must have a value by now."""
+        symbol = self.symbols.lookup(name)
+        if symbol is None:
+            raise ValueError(f"{name} variable is not declared!")
+        if type(symbol) is FunctionSymbol:
+            raise ValueError(f"{name} is a function!")
+        if not symbol.initialized:
+            raise ValueError(f"{name} is delcared by no value assigned!")
+        return Variable(symbol.name, symbol)
+
+    def call(self, symbol: FunctionSymbol) -> FunctionCall:
+        """Parse the `(arguments)` of a call to `symbol`."""
+        self.tokens.expect(TokenKind.LPAREN)
+        arguments = []
+        while not self.tokens.check(TokenKind.RPAREN):
+            arguments.append(ExpressionParser(self.tokens, self.symbols).parse())
+            if not self.tokens.check(TokenKind.COMMA):
+                break
+            self.tokens.advance()
+        self.tokens.expect(TokenKind.RPAREN)
+        return FunctionCall(symbol.name, arguments, symbol)
+
+    def type_annotation(self) -> str:
+        """Parse a type like `int` or `list[int]`, a plain `list` is "LIST"."""
+        variable_type = TYPE_NAMES.get(self.tokens.kind())  # type: ignore
+        if variable_type is None:
+            raise errors.UnexpectedTokenError(self.tokens.token(), "type")
+        self.tokens.advance()
+        if variable_type == "LIST" and self.tokens.check(TokenKind.LBRACKET):
+            self.tokens.advance()
+            if not self.tokens.check(*ELEMENT_TYPE_TOKENS):
+                raise errors.UnexpectedTokenError(
+                    self.tokens.token(), "int, float or str"
+                )
+            variable_type = list_type(TYPE_NAMES[self.tokens.kind()])  # type: ignore
+            self.tokens.advance()
+            self.tokens.expect(TokenKind.RBRACKET)
+        return variable_type
+
+    def parenthesized(self, parser_class: type["BaseParser"]) -> Node:
+        """Parse `( ... )` with `parser_class` and return what is inside."""
+        self.tokens.expect(TokenKind.LPAREN)
+        node = parser_class(self.tokens, self.symbols).parse()
+        self.tokens.expect(TokenKind.RPAREN)
+        return node
+
+    def block(self) -> list[Node]:
+        """
+        Parse `{ statements }` in a new scope. The closing brace is left for
+        the caller to consume, like the `;` after a simple statement.
+        """
+        self.tokens.expect(TokenKind.LBRACE)
+        self.symbols.enter_scope()
+        body = []
+        while not self.tokens.check(TokenKind.RBRACE):
+            kind = self.tokens.kind()
+            if kind is None:
+                raise errors.UnexpectedTokenError(None, "'}'")
+            if kind == TokenKind.SEMICOLON:
+                self.tokens.advance()
+                continue
+            parser_class = STATEMENT_PARSERS.get(kind)
+            if parser_class is None:
+                raise errors.UnexpectedTokenError(self.tokens.token(), "statement")
+            body.append(
+                self.end_statement(parser_class(self.tokens, self.symbols).parse())
+            )
+        self.symbols.exit_scope()
+        return body
+
+    def end_statement(self, statement: Node) -> Node:
+        """Consume the `;` after a simple statement or the `}` of a block."""
+        self.tokens.expect(
+            TokenKind.RBRACE if type(statement) in BODIES else TokenKind.SEMICOLON
+        )
+        return statement
+
+    def index(self) -> Node:
+        """Parse `[expression]` and return the expression."""
+        self.tokens.expect(TokenKind.LBRACKET)
+        index = ExpressionParser(self.tokens, self.symbols).parse()
+        self.tokens.expect(TokenKind.RBRACKET)
+        return index
+
 
 class Parser(BaseParser):
-    def __init__(self, tokens: list[Token]) -> None:
-        super().__init__(tokens)
-        self.parsers = {
-            "IDENTIFIER": AssignmentStatementParser,
-            "PRINT": PrintParser,
-        }
+    def __init__(
+        self,
+        tokens: Union[TokenBuffer, Lexer],
+        symbols: Optional[SymbolTable] = None,
+    ) -> None:
+        super().__init__(TokenStream(tokens), symbols or SymbolTable())
+        self.parsers = TOP_LEVEL_PARSERS
 
     def parse(self):
+        self.ast.extend(self.statements())
+        return self.ast
+
+    def statements(self) -> Iterator[Node]:
+        """Yield top-level statements as soon as each one is parsed."""
         while self.tokens:
-            token_type = self.tokens[0].token_type
-            if token_type in self.parsers:
-                parser = self.parsers[token_type](self.tokens)
-                self.ast.append(parser.parse())
-                self.tokens.pop(0)
+            kind = self.tokens.kind()
+            if kind in self.parsers:
+                parser = self.parsers[kind](self.tokens, self.symbols)
+                statement = self.end_statement(parser.parse())
+                self.tokens.release()
+                yield statement
             else:
                 # TODO
-                parser = ParseNothing(self.tokens)
-                self.tokens.pop(0)
-
-        return self.ast
+                parser = ParseNothing(self.tokens, self.symbols)
+                self.tokens.advance()
 
 
 class AssignmentStatementParser(BaseParser):
     def parse(self):
-        variable_name = self.tokens[0].pattern
-        self.tokens.pop(0)
-
-        if self.tokens[0].token_type == "EQUALS":
-            self.tokens.pop(0)
-            expression_parser = ExpressionParser(self.tokens)
+        variable_name = self.tokens.lexeme(self.tokens.advance())
+
+        if self.tokens.check(TokenKind.EQUALS):
+            self.tokens.advance()
+            symbol = self.symbols.lookup(variable_name)
+            if symbol is None:
+                raise ValueError(f"{variable_name} variable is not declared!")
+            if type(symbol) is FunctionSymbol:
+                raise ValueError(f"{variable_name} is a function!")
+            expression_parser = ExpressionParser(self.tokens, self.symbols)
             expression = expression_parser.parse()
-            variables[variable_name]["expression"] = expression
-            return {
-                "node_type": "assignment_statement",
-                "variable_name": variable_name,
-                "expression": expression,
-            }
-        elif self.tokens[0].token_type == "COLON":
-            self.tokens.pop(0)  # skip COLON
-            variable_type_token = self.tokens.pop(0)
+            symbol.initialized = True
+            return AssignmentStatement(symbol.name, expression, symbol)
+        elif self.tokens.check(TokenKind.COLON):
+            self.tokens.advance()  # skip COLON
+            variable_type = self.type_annotation()
             expression = None
-            if "TYPE_" in variable_type_token.token_type:
-                variable_type = variable_type_token.token_type[5:]
-            else:
-                # TODO
-                raise RuntimeError()
 
-            if self.tokens[0].token_type == "EQUALS":
-                self.tokens.pop(0)
-                expression = ExpressionParser(self.tokens).parse()
-            elif self.tokens[0].token_type != "SEMICOLON":
+            if self.tokens.check(TokenKind.EQUALS):
+                self.tokens.advance()
+                expression = ExpressionParser(self.tokens, self.symbols).parse()
+            elif not self.tokens.check(TokenKind.SEMICOLON):
                 # TODO
                 raise RuntimeError()
 
-            variables[variable_name] = {
-                "variable_type": variable_type,
-                "expression": expression,
-            }
-            return {
-                "node_type": "variable_declaration",
-                "variable_name": variable_name,
-                "variable_type": variable_type,
-                "expression": expression,
-            }
+            # Declared after its expression, which still sees the old symbol
+            symbol = self.symbols.declare(
+                variable_name, variable_type, initialized=expression is not None
+            )
+            return VariableDeclaration(symbol.name, variable_type, expression, symbol)
+        elif self.tokens.check(TokenKind.LBRACKET):
+            target = self.variable(variable_name)
+            index = self.index()
+            self.tokens.expect(TokenKind.EQUALS)
+            expression = ExpressionParser(self.tokens, self.symbols).parse()
+            return IndexAssignmentStatement(target, index, expression)
+        elif self.tokens.check(TokenKind.DOT):
+            target = self.variable(variable_name)
+            self.tokens.advance()
+            if self.tokens.lexeme(self.tokens.expect(TokenKind.IDENTIFIER)) != "append":
+                raise errors.UnexpectedTokenError(self.tokens.token(-1), "append")
+            expression = self.parenthesized(ExpressionParser)
+            return AppendStatement(target, expression)
+        elif self.tokens.check(TokenKind.LPAREN):
+            symbol = self.symbols.lookup(variable_name)
+            if type(symbol) is not FunctionSymbol:
+                raise ValueError(f"{variable_name} is not a function!")
+            return ExpressionStatement(self.call(symbol))
         else:
-            return []
+            raise errors.UnexpectedTokenError(
+                self.tokens.token(), "'=', ':', '[', '.' or '('"
+            )
 
 
 class ListParser(BaseParser):
     def parse(self):
-        self.tokens.pop(0)
+        self.tokens.advance()
         elements = []
-        while self.tokens[0].token_type != "RBRACKET":
-            element = ExpressionParser(self.tokens).parse()
+        while not self.tokens.check(TokenKind.RBRACKET):
+            element = ExpressionParser(self.tokens, self.symbols).parse()
             elements.append(element)
 
-            if self.tokens[0].token_type == "COMMA":
-                self.tokens.pop(0)
+            if self.tokens.check(TokenKind.COMMA):
+                self.tokens.advance()
 
-        self.tokens.pop(0)
-        return {
-            "node_type": "LIST",
-            "expression": elements,
-        }
+        self.tokens.expect(TokenKind.RBRACKET)
+        return ListLiteral(elements)
 
 
 class ExpressionParser(BaseParser):
     """Precedence climbing method."""
 
     def parse(self):
-        if self.tokens[0].token_type == "LBRACKET":
-            left_operand = ListParser(self.tokens).parse()
-        else:
-            left_parser = TermParser(self.tokens)
-            left_operand = left_parser.parse()
-
-            while (
-                self.tokens
-                and self.tokens[0].token_type in ["PLUS", "MINUS"]
-                and self.tokens[0].token_type != "SEMICOLON"
-                and self.tokens[0].token_type != "RPAREN"
-            ):
-                operator = self.tokens.pop(0).token_type
-                right_parser = TermParser(self.tokens)
-                right_operand = right_parser.parse()
-                left_operand = {
-                    "node_type": "binary_operation",
-                    "operator": operator,
-                    "left_operand": left_operand,
-                    "right_operand": right_operand,
-                }
+        if self.tokens.check(TokenKind.LBRACKET):
+            return ListParser(self.tokens, self.symbols).parse()
+
+        left_operand = self.sum()
+        # Comparisons bind loosest and do not chain
+        if self.tokens.check(*COMPARISON_OPERATORS):
+            operator = KIND_NAMES[self.tokens.kind()]  # type: ignore
+            self.tokens.advance()
+            left_operand = Comparison(operator, left_operand, self.sum())
+        return left_operand
+
+    def sum(self) -> Node:
+        left_parser = TermParser(self.tokens, self.symbols)
+        left_operand = left_parser.parse()
+
+        while self.tokens.check(TokenKind.PLUS, TokenKind.MINUS):
+            operator = KIND_NAMES[self.tokens.kind()]  # type: ignore
+            self.tokens.advance()
+            right_parser = TermParser(self.tokens, self.symbols)
+            right_operand = right_parser.parse()
+            left_operand = BinaryOperation(operator, left_operand, right_operand)
         return left_operand
 
 
 class TermParser(ExpressionParser):
     def parse(self):
-        left_factor = FactorParser(self.tokens)
+        left_factor = FactorParser(self.tokens, self.symbols)
         left_operand = left_factor.parse()
 
-        while (
-            self.tokens
-            and self.tokens[0].token_type in ["MULTIPLY", "DIVIDE"]
-            and self.tokens[0].token_type != "SEMICOLON"
-            and self.tokens[0].token_type != "RPAREN"
-        ):
-            operator = self.tokens.pop(0).token_type
-            right_parser = FactorParser(self.tokens)
+        while self.tokens.check(TokenKind.MULTIPLY, TokenKind.DIVIDE):
+            operator = KIND_NAMES[self.tokens.kind()]  # type: ignore
+            self.tokens.advance()
+            right_parser = FactorParser(self.tokens, self.symbols)
             right_operand = right_parser.parse()
-            left_operand = {
-                "node_type": "binary_operation",
-                "operator": operator,
-                "left_operand": left_operand,
-                "right_operand": right_operand,
-            }
+            left_operand = BinaryOperation(operator, left_operand, right_operand)
 
         return left_operand
 
 
 class FactorParser(ExpressionParser):
     def parse(self):
-        if self.tokens[0].token_type == "LPAREN":
-            self.tokens.pop(0)
-            parser = ExpressionParser(self.tokens)
+        if self.tokens.check(TokenKind.LPAREN):
+            self.tokens.advance()
+            parser = ExpressionParser(self.tokens, self.symbols)
             expression = parser.parse()
-            self.tokens.pop(0)
+            self.tokens.expect(TokenKind.RPAREN)
             return expression
         else:
-            parser = PrimaryParser(self.tokens)
+            parser = PrimaryParser(self.tokens, self.symbols)
             return parser.parse()
 
 
 class PrimaryParser(BaseParser):
     def parse(self):
-        if self.tokens[0].token_type == "INTEGER":
-            value = self.tokens.pop(0).pattern
-            return {"node_type": "INT", "value": value}
-
-        if self.tokens[0].token_type == "FLOAT":
-            value = self.tokens.pop(0).pattern
-            return {"node_type": "FLOAT", "value": value}
-
-        if self.tokens[0].token_type == "STR":
-            value = self.tokens.pop(0).pattern
-            return {"node_type": "STR", "value": value[1:-1]}
-
-        if self.tokens[0].token_type == "IDENTIFIER":
-            name = self.tokens.pop(0).pattern
-            if name in variables:
-                if variables[name]["expression"]:
-                    return {"node_type": "variable", "name": name}
-                else:
-                    raise ValueError(f"{name} is delcared by no value assigned!")
-            else:
-                raise ValueError(f"{name} variable is not declared!")
+        kind = self.tokens.kind()
+        if kind == TokenKind.INTEGER:
+            value = self.tokens.lexeme(self.tokens.advance())
+            return Literal("INT", value)
 
-        raise errors.SyntaxError(
-            code="",
-            position=self.tokens[0].position,
-            line_number=self.tokens[0].line_number,
-        )
+        if kind == TokenKind.FLOAT:
+            value = self.tokens.lexeme(self.tokens.advance())
+            return Literal("FLOAT", value)
+
+        if kind == TokenKind.STR:
+            value = self.tokens.lexeme(self.tokens.advance())
+            return Literal("STR", value[1:-1])
+
+        if kind == TokenKind.IDENTIFIER:
+            name = self.tokens.lexeme(self.tokens.advance())
+            symbol = self.symbols.lookup(name)
+            if type(symbol) is FunctionSymbol and self.tokens.check(TokenKind.LPAREN):
+                return self.call(symbol)
+            if name == "len" and self.tokens.check(TokenKind.LPAREN):
+                return LengthOperation(self.parenthesized(ExpressionParser))
+
+            node: Node = self.variable(name)
+            while self.tokens.check(TokenKind.LBRACKET):
+                node = IndexOperation(node, self.index())
+            return node
+
+        raise errors.UnexpectedTokenError(self.tokens.token(), "expression")
 
 
 class PrintParser(BaseParser):
     def parse(self):
-        self.tokens.pop(0)  # pop print
-        if self.tokens[0].token_type != "LPAREN":
+        self.tokens.advance()  # pop print
+        if not self.tokens.check(TokenKind.LPAREN):
             raise RuntimeError()
-        expression_parser = ExpressionParser(self.tokens)
+        expression_parser = ExpressionParser(self.tokens, self.symbols)
         expression = expression_parser.parse()
-        return {"node_type": "print_statement", "expression": expression}
+        return PrintStatement(expression)
+
+
+class IfParser(BaseParser):
+    def parse(self):
+        self.tokens.advance()  # pop if
+        condition = ExpressionParser(self.tokens, self.symbols).parse()
+        body = self.block()
+        orelse: list[Node] = []
+
+        if self.tokens.kind(1) == TokenKind.ELSE:
+            self.tokens.advance()  # pop }
+            self.tokens.advance()  # pop else
+            if self.tokens.check(TokenKind.IF):
+                orelse = [IfParser(self.tokens, self.symbols).parse()]
+            else:
+                orelse = self.block()
+        return IfStatement(condition, body, orelse)
+
+
+class WhileParser(BaseParser):
+    def parse(self):
+        self.tokens.advance()  # pop while
+        condition = ExpressionParser(self.tokens, self.symbols).parse()
+        return WhileStatement(condition, self.block())
+
+
+class ForParser(BaseParser):
+    """`for i in range(stop) { ... }` or `for i in range(start, stop) { ... }`"""
+
+    def parse(self):
+        self.tokens.advance()  # pop for
+        variable_name = self.tokens.lexeme(self.tokens.expect(TokenKind.IDENTIFIER))
+        self.tokens.expect(TokenKind.IN)
+        if self.tokens.lexeme(self.tokens.expect(TokenKind.IDENTIFIER)) != "range":
+            raise errors.UnexpectedTokenError(self.tokens.token(-1), "range")
+
+        self.tokens.expect(TokenKind.LPAREN)
+        start = ExpressionParser(self.tokens, self.symbols).parse()
+        if self.tokens.check(TokenKind.COMMA):
+            self.tokens.advance()
+            stop = ExpressionParser(self.tokens, self.symbols).parse()
+        else:
+            start, stop = Literal("INT", "0"), start
+        self.tokens.expect(TokenKind.RPAREN)
+
+        # The loop variable is only visible in the loop
+        self.symbols.enter_scope()
+        symbol = self.symbols.declare(variable_name, "INT", initialized=True)
+        body = self.block()
+        self.symbols.exit_scope()
+        return ForStatement(symbol.name, start, stop, body, symbol)
+
+
+class FunctionParser(BaseParser):
+    """
+    `def name(a: int, b: float) -> int { ... }`. Without `-> type` the
+    function returns nothing.
+    """
+
+    def parse(self):
+        self.tokens.advance()  # pop def
+        name = self.tokens.lexeme(self.tokens.expect(TokenKind.IDENTIFIER))
+        self.tokens.expect(TokenKind.LPAREN)
+        parameters = []
+        while not self.tokens.check(TokenKind.RPAREN):
+            parameter = self.tokens.lexeme(self.tokens.expect(TokenKind.IDENTIFIER))
+            self.tokens.expect(TokenKind.COLON)
+            parameter_type = self.type_annotation()
+            if parameter_type == "LIST":
+                raise errors.UnexpectedTokenError(self.tokens.token(), "'['")
+            parameters.append((parameter, parameter_type))
+            if not self.tokens.check(TokenKind.COMMA):
+                break
+            self.tokens.advance()
+        self.tokens.expect(TokenKind.RPAREN)
+
+        return_type = "VOID"
+        if self.tokens.check(TokenKind.ARROW):
+            self.tokens.advance()
+            return_type = self.type_annotation()
+
+        # Declared before the body, so the function can call itself
+        symbol = self.symbols.declare_function(
+            name, [parameter_type for _, parameter_type in parameters], return_type
+        )
+        self.symbols.enter_scope(function=True)
+        parameter_symbols = [
+            self.symbols.declare(parameter_name, parameter_type, initialized=True)
+            for parameter_name, parameter_type in parameters
+        ]
+        body = self.block()
+        self.symbols.exit_scope()
+        return FunctionDeclaration(
+            symbol.name, parameter_symbols, return_type, body, symbol
+        )
+
+
+class ReturnParser(BaseParser):
+    def parse(self):
+        self.tokens.advance()  # pop return
+        if self.tokens.check(TokenKind.SEMICOLON, TokenKind.RBRACE):
+            return ReturnStatement(None)
+        return ReturnStatement(ExpressionParser(self.tokens, self.symbols).parse())
 
 
 class ParseNothing(BaseParser):
     def parse(self):
         return []
+
+
+STATEMENT_PARSERS: dict[int, type[BaseParser]] = {
+    TokenKind.IDENTIFIER: AssignmentStatementParser,
+    TokenKind.PRINT: PrintParser,
+    TokenKind.IF: IfParser,
+    TokenKind.WHILE: WhileParser,
+    TokenKind.FOR: ForParser,
+    TokenKind.RETURN: ReturnParser,
+}
+# Functions are declared at the top level only
+TOP_LEVEL_PARSERS = {**STATEMENT_PARSERS, TokenKind.DEF: FunctionParser}
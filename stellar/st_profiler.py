@@ -0,0 +1,90 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    source: Optional[str] = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    # Peak memory allocated above the level the phase started at, in bytes
+    peak_memory: int = 0
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+class Profiler:
+    """
+    Records wall time, CPU time, peak traced memory and item counts
+    (tokens, AST nodes, IR instructions, ...) for each compiler phase.
+
+    A disabled profiler hands out throwaway stats and measures nothing, so
+    the pipeline can be instrumented unconditionally.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases: list[PhaseStats] = []
+        self.source: Optional[str] = None
+
+    def start(self) -> None:
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        stats = PhaseStats(name, self.source)
+        if not self.enabled:
+            yield stats
+            return
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall_time = time.perf_counter() - start_wall
+            stats.cpu_time = time.process_time() - start_cpu
+            if tracing:
+                stats.peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+            self.phases.append(stats)
+
+    def to_dict(self) -> dict:
+        return {"phases": [asdict(stats) for stats in self.phases]}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def report(self) -> str:
+        lines = [
+            f"{'phase':<12} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}  counts"
+        ]
+        source = None
+        for stats in self.phases:
+            if stats.source != source:
+                source = stats.source
+                lines.append(f"{source}:")
+            counts = ", ".join(
+                f"{name}={value}" for name, value in stats.counts.items()
+            )
+            lines.append(
+                f"{stats.name:<12} {stats.wall_time * 1000:>10.2f} "
+                f"{stats.cpu_time * 1000:>10.2f} {stats.peak_memory / 1024:>10.1f}  "
+                f"{counts}".rstrip()
+            )
+        return "\n".join(lines)
+
+
+NULL_PROFILER = Profiler(enabled=False)
@@ -1,4 +1,59 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from st_ast import (
+    CHILDREN,
+    AppendStatement,
+    AssignmentStatement,
+    BinaryOperation,
+    Comparison,
+    ExpressionStatement,
+    ForStatement,
+    FunctionCall,
+    FunctionDeclaration,
+    IfStatement,
+    IndexAssignmentStatement,
+    IndexOperation,
+    LengthOperation,
+    ListLiteral,
+    Node,
+    PrintStatement,
+    ReturnStatement,
+    Variable,
+    VariableDeclaration,
+    WhileStatement,
+    element_type,
+    list_type,
+)
+from st_symbols import Symbol
+
+NUMERIC_TYPES = ("INT", "FLOAT")
+# Types lists can hold, stored unboxed
+ELEMENT_TYPES = ("INT", "FLOAT", "STR")
+
+
+class DefUseChains:
+    """
+    The definitions and uses of each variable: the statements giving it a
+    value and the innermost statements reading it, in program order.
+
+    Symbols do not hash, so both are keyed by `id(symbol)`. The symbols
+    stay alive on the AST nodes for as long as the chains are used.
+    """
+
+    __slots__ = ("definitions", "uses")
+
+    def __init__(self) -> None:
+        self.definitions: dict[int, list[Node]] = {}
+        self.uses: dict[int, list[Node]] = {}
+
+    def define(self, symbol: Symbol, statement: Node) -> None:
+        self.definitions.setdefault(id(symbol), []).append(statement)
+
+    def use(self, symbol: Symbol, statement: Node) -> None:
+        uses = self.uses.setdefault(id(symbol), [])
+        if not uses or uses[-1] is not statement:
+            uses.append(statement)
 
 
 class Analyzer(ABC):
@@ -8,91 +63,266 @@ class Analyzer(ABC):
 
 
 class SemanticAnalyzer(Analyzer):
+    """
+    Type checks the statements. Names were resolved by the parser, so the
+    types come straight from the symbols on the nodes.
+
+    Every expression node gets its resolved type in `value_type`, which the
+    code generator uses to pick integer or floating point instructions.
+
+    `analyze` also records the def-use chains of the whole program in
+    `def_use`. Streamed statements are checked without them, so they can
+    be released once generated.
+    """
+
     def __init__(self, ast) -> None:
         self.ast = ast
-        self.var_scope_table: dict = {}
+        self.statement_analyzers = {
+            VariableDeclaration: self.analyze_variable_declaration,
+            AssignmentStatement: self.analyze_assignment,
+            IndexAssignmentStatement: self.analyze_index_assignment,
+            AppendStatement: self.analyze_append,
+            IfStatement: self.analyze_if,
+            WhileStatement: self.analyze_while,
+            ForStatement: self.analyze_for,
+            PrintStatement: self.analyze_print,
+            FunctionDeclaration: self.analyze_function,
+            ReturnStatement: self.analyze_return,
+            ExpressionStatement: self.analyze_expression_statement,
+        }
+        # Return types of the functions being analyzed, innermost last
+        self.return_types: list[str] = []
+        self.def_use: Optional[DefUseChains] = None
+        # The statement being analyzed, which the variables read belong to
+        self.statement: Optional[Node] = None
 
     def analyze(self):
+        self.def_use = DefUseChains()
         self.traverse(self.ast)
 
+    def analyze_stream(self):
+        """Check statements one by one, yielding each once it is valid."""
+        for node in self.ast:
+            self.traverse(node)
+            yield node
+
     def traverse(self, node):
-        if isinstance(node, dict):
-            node_type = node["node_type"]
-
-            if node_type == "variable_declaration":
-                self.analyze_variable_declaration(node)
-            elif node_type == "assignment_statement":
-                self.analyze_assignment(node)
-            #
-            # if "expression" in node.keys():
-            #     self.traverse(node["expression"])
-
-        elif isinstance(node, list):
+        if isinstance(node, list):
             for el in node:
                 self.traverse(el)
+            return
+
+        analyzer = self.statement_analyzers.get(type(node))
+        if analyzer:
+            self.statement = node
+            analyzer(node)
 
-    def analyze_variable_declaration(self, node):
-        variable_name = node["variable_name"]
-        variable_type = node["variable_type"]
-        self.var_scope_table[variable_name] = {"type": variable_type}
-        # TODO better solution
-        # Very complicated and not really readable
-        if "expression" in node.keys():
-            if node["expression"]:
-                self.analyze_expression(node["expression"], variable_type)
-        elif "left_operand" in node.keys():
-            self.analyze_expression(node["left_operand"], variable_type)
-            self.analyze_expression(node["right_operand"], variable_type)
-
-    def analyze_assignment(self, node):
-        variable_name = node["variable_name"]
-
-        # If var is assigned however nor inialized before
+    def analyze_variable_declaration(self, node: VariableDeclaration):
+        if node.variable_type == "LIST":
+            # A plain `list` takes the element type of its value
+            if node.expression is None:
+                raise RuntimeError(
+                    f"{node.variable_name} needs an element type, e.g. list[int]"
+                )
+            expression_type = self.infer_types(node.expression)
+            if element_type(expression_type) is None:
+                raise RuntimeError(
+                    f"Cannot infer the element type of {node.variable_name}, "
+                    "declare it like list[int]"
+                )
+            node.variable_type = node.symbol.variable_type = expression_type
+        elif node.expression:
+            self.analyze_expression(node.expression, node.variable_type)
+        if self.def_use is not None:
+            self.def_use.define(node.symbol, node)
+
+    def analyze_assignment(self, node: AssignmentStatement):
+        # If var is assigned however nor declared before
         # raise error
-        if variable_name not in self.var_scope_table.keys():
+        if node.symbol is None:
             # TODO
             raise RuntimeError()
-        variable_type = self.var_scope_table[variable_name]["type"]
-        if "expression" in node.keys():
-            self.analyze_expression(node["expression"], variable_type)
-        elif "left_operand" in node.keys():
-            self.analyze_expression(node["left_operand"], variable_type)
-            self.analyze_expression(node["right_operand"], variable_type)
+        self.analyze_expression(node.expression, node.symbol.variable_type)
+        if self.def_use is not None:
+            self.def_use.define(node.symbol, node)
+
+    def analyze_index_assignment(self, node: IndexAssignmentStatement):
+        target_element_type = self.list_element_type(node.target)
+        self.analyze_expression(node.index, "INT")
+        self.analyze_expression(node.expression, target_element_type)
+
+    def analyze_append(self, node: AppendStatement):
+        target_element_type = self.list_element_type(node.target)
+        self.analyze_expression(node.expression, target_element_type)
+
+    def analyze_if(self, node: IfStatement):
+        self.analyze_expression(node.condition, "BOOL")
+        self.traverse(node.body)
+        self.traverse(node.orelse)
+
+    def analyze_while(self, node: WhileStatement):
+        self.analyze_expression(node.condition, "BOOL")
+        self.traverse(node.body)
+
+    def analyze_for(self, node: ForStatement):
+        self.analyze_expression(node.start, "INT")
+        self.analyze_expression(node.stop, "INT")
+        if self.def_use is not None:
+            self.def_use.define(node.symbol, node)
+        self.traverse(node.body)
+
+    def analyze_print(self, node: PrintStatement):
+        if node.expression:
+            if self.analyze_expression(node.expression) == "VOID":
+                raise RuntimeError("Cannot print the result of a function without one")
+
+    def analyze_function(self, node: FunctionDeclaration):
+        self.return_types.append(node.return_type)
+        self.traverse(node.body)
+        self.return_types.pop()
+        if node.return_type != "VOID" and not always_returns(node.body):
+            raise RuntimeError(f"{node.name} does not return a value on every path")
+
+    def analyze_return(self, node: ReturnStatement):
+        if not self.return_types:
+            raise RuntimeError("return outside of a function")
+        return_type = self.return_types[-1]
+        if node.expression is None:
+            if return_type != "VOID":
+                raise RuntimeError(f"Expected a return value of type {return_type}")
+        elif return_type == "VOID":
+            raise RuntimeError("Cannot return a value from a function without one")
+        else:
+            self.analyze_expression(node.expression, return_type)
+
+    def analyze_expression_statement(self, node: ExpressionStatement):
+        self.analyze_expression(node.expression)
 
     def analyze_expression(self, node, check_type=None):
-        node_type = node["node_type"]
-        # For variables
-        if node_type == "variable":
-            if node["name"] not in self.var_scope_table.keys():
-                # TODO
-                raise RuntimeError()
-            if check_type:
-                if self.var_scope_table[node["name"]]["type"] != check_type:
+        expression_type = self.infer_types(node)
+        # `[]` is a list of whatever it is assigned to
+        if expression_type == "LIST" and element_type(check_type):
+            node.value_type = expression_type = check_type
+        if check_type and expression_type != check_type:
+            raise RuntimeError(
+                f"Expected a value of type {check_type}, got {expression_type}"
+            )
+        return expression_type
+
+    def list_element_type(self, node) -> str:
+        target_element_type = element_type(self.infer_types(node))
+        if target_element_type is None:
+            raise RuntimeError(f"Expected a list, got {node.value_type}")
+        return target_element_type
+
+    def infer_types(self, root) -> str:
+        """
+        Annotate `root` and all of its subexpressions with their types and
+        return the type of `root`.
+
+        Operands are visited from an explicit stack instead of by recursion,
+        so the depth of an expression is not limited by the Python stack.
+        """
+        # (node, whether its operands were already annotated)
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            node_class = type(node)
+            if node_class in CHILDREN and not operands_done:
+                stack.append((node, True))
+                for field in reversed(CHILDREN[node_class]):
+                    stack.append((getattr(node, field), False))
+                continue
+
+            if node_class is BinaryOperation:
+                left_type = node.left_operand.value_type
+                right_type = node.right_operand.value_type
+                if left_type != right_type:
+                    raise RuntimeError(
+                        f"Operands of {node.operator} have different types: "
+                        f"{left_type} and {right_type}"
+                    )
+                if left_type not in NUMERIC_TYPES:
+                    raise RuntimeError(
+                        f"Operands of {node.operator} must be numbers, got {left_type}"
+                    )
+                node.value_type = left_type
+            elif node_class is Comparison:
+                left_type = node.left_operand.value_type
+                right_type = node.right_operand.value_type
+                if left_type != right_type or left_type not in NUMERIC_TYPES:
+                    raise RuntimeError(
+                        f"Cannot compare {left_type} and {right_type} with "
+                        f"{node.operator}"
+                    )
+                node.value_type = "BOOL"
+            elif node_class is IndexOperation:
+                target_element_type = element_type(node.target.value_type)
+                if target_element_type is None:
+                    raise RuntimeError(
+                        f"Only lists can be indexed, got {node.target.value_type}"
+                    )
+                if node.index.value_type != "INT":
+                    raise RuntimeError(
+                        f"List indices must be INT, got {node.index.value_type}"
+                    )
+                node.value_type = target_element_type
+            elif node_class is LengthOperation:
+                if element_type(node.target.value_type) is None:
+                    raise RuntimeError(
+                        f"len() expects a list, got {node.target.value_type}"
+                    )
+                node.value_type = "INT"
+            # For variables
+            elif node_class is Variable:
+                if node.symbol is None:
                     # TODO
                     raise RuntimeError()
-        # For literals like (3, "a", 4.5)
-        elif "value" in node.keys():
-            if node_type != check_type:
-                # TODO
-                raise RuntimeError()
-        elif node_type == "LIST":
-            self.analyze_list(node["expression"])
-            # TODO im not sure return here would travest all possible scenarios
-            # for ast tree in expression
-            return
+                node.value_type = node.symbol.variable_type
+                if self.def_use is not None:
+                    self.def_use.use(node.symbol, self.statement)
+            elif node_class is ListLiteral:
+                node.value_type = self.analyze_list(node.elements)
+            elif node_class is FunctionCall:
+                self.analyze_arguments(node)
+                node.value_type = node.symbol.return_type
+            # Literals like (3, "a", 4.5) are typed by the lexer
+        return root.value_type
+
+    def analyze_arguments(self, node: FunctionCall):
+        parameter_types = node.symbol.parameter_types
+        if len(node.arguments) != len(parameter_types):
+            raise RuntimeError(
+                f"{node.name} takes {len(parameter_types)} arguments, "
+                f"got {len(node.arguments)}"
+            )
+        for argument, parameter_type in zip(node.arguments, parameter_types):
+            self.analyze_expression(argument, parameter_type)
 
-        # Continue parsing if expression tree is not empty
-        if "expression" in node.keys():
-            self.analyze_expression(node["expression"], check_type)
-        elif "left_operand" in node.keys():
-            self.analyze_expression(node["left_operand"], check_type)
-            self.analyze_expression(node["right_operand"], check_type)
-
-    def analyze_list(self, node):
-        types = []
-        for el in node:
-            if not types:
-                types.append(el["node_type"])
-            if el["node_type"] not in types:
+    def analyze_list(self, elements) -> str:
+        """Check the elements of a list literal and return the list's type."""
+        types = set()
+        for el in elements:
+            el_type = self.infer_types(el)
+            if types and el_type not in types:
                 # TODO
                 raise RuntimeError()
+            types.add(el_type)
+        if not types:
+            # Empty, typed by the variable it is assigned to
+            return "LIST"
+        (el_type,) = types
+        if el_type not in ELEMENT_TYPES:
+            raise RuntimeError(f"Lists of {el_type} are not supported")
+        return list_type(el_type)
+
+
+def always_returns(body) -> bool:
+    """Whether every path through the statements `body` ends in a return."""
+    for node in body:
+        if type(node) is ReturnStatement:
+            return True
+        if type(node) is IfStatement and node.orelse:
+            if always_returns(node.body) and always_returns(node.orelse):
+                return True
+    return False
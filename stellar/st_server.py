@@ -0,0 +1,298 @@
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable, Optional
+
+import st_compiler
+import st_frontend
+from st_client import MAX_MESSAGE_SIZE, default_socket_path, unsafe_directory
+
+SERVE = "serve"
+
+# Compiled and run once by every session, so LLVM has seen each kind of code
+# before the first request. It prints nothing.
+WARM_UP_SOURCE = """\
+def square(n: int) -> int {
+    return n * n;
+}
+
+total: float = 0.5;
+values: list[int] = [];
+for i in range(3) {
+    values.append(square(i));
+    total = total * 2.0;
+}
+if len(values) > 3 {
+    print(values);
+}
+"""
+
+# Seconds a client has to send its request once connected
+REQUEST_TIMEOUT = 5.0
+
+
+class PendingRequest:
+    """
+    A connection whose request is still being read: a JSON line with the
+    client's stdin, stdout and stderr attached.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+        self.deadline = time.monotonic() + REQUEST_TIMEOUT
+        self.message = b""
+        self.fds: list[int] = []
+
+    def read(self) -> Optional[dict]:
+        """Read what arrived, return the request once it is complete."""
+        try:
+            chunk, fds, _, _ = socket.recv_fds(self.connection, MAX_MESSAGE_SIZE, 3)
+        except BlockingIOError:
+            return None
+        self.fds += fds
+        if not chunk:
+            raise ValueError("incomplete request")
+        self.message += chunk
+        if not self.message.endswith(b"\n"):
+            return None
+        if len(self.fds) != 3:
+            raise ValueError("expected the client's stdin, stdout and stderr")
+        return json.loads(self.message)
+
+    def close(self) -> None:
+        for fd in self.fds:
+            os.close(fd)
+        self.connection.close()
+
+
+class CompileServer:
+    """
+    Runs stellar commands sent by `st_client` over a Unix socket.
+
+    The server imports the compiler and sets up LLVM once. Each request
+    runs in a process forked from it. That process gets the client's
+    stdin, stdout, stderr, working directory and environment, so the
+    program's output goes straight to the client. Nothing a request does,
+    not even a crash, reaches the server or the next request.
+
+    `handle` runs the command line of one request in that process. Once
+    the process exits, its status is sent back. A client that disconnects
+    first stops its request. Requests are read without blocking, so a slow
+    client holds up no other request.
+    """
+
+    def __init__(
+        self, handle: Callable[[list[str]], None], socket_path: Optional[str] = None
+    ) -> None:
+        self.handle = handle
+        self.socket_path = socket_path or default_socket_path()
+        self.selector = selectors.DefaultSelector()
+        # Connections of the running requests, by the pid of their process
+        self.requests: dict[int, Optional[socket.socket]] = {}
+
+    def serve_forever(self) -> None:
+        listener = self.listen()
+        # A SIGCHLD handler and a wakeup fd make finished requests
+        # another event of the select loop
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+        self.selector.register(listener, selectors.EVENT_READ)
+        self.selector.register(wakeup_read, selectors.EVENT_READ)
+        print(f"stellar: serving on {self.socket_path}", file=sys.stderr)
+        try:
+            while True:
+                for key, _ in self.selector.select(self.next_timeout()):
+                    if key.fileobj is listener:
+                        self.accept(listener)
+                    elif key.fileobj == wakeup_read:
+                        drain(wakeup_read)
+                        self.reap()
+                    elif type(key.data) is PendingRequest:
+                        self.read_request(key.data)
+                    else:
+                        self.disconnected(key.fileobj, key.data)
+                self.expire_requests()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for pid in self.requests:
+                stop(pid)
+            listener.close()
+            os.unlink(self.socket_path)
+
+    def listen(self) -> socket.socket:
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Clients refuse the socket otherwise
+        reason = unsafe_directory(self.socket_path)
+        if reason is not None:
+            raise RuntimeError(f"Cannot serve on {self.socket_path}: {reason}")
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except ConnectionRefusedError:
+                # Left behind by a server that was killed
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"A server is running on {self.socket_path}")
+            finally:
+                probe.close()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Requests run code as this user, so only this user may connect
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        listener.listen()
+        return listener
+
+    def accept(self, listener: socket.socket) -> None:
+        connection, _ = listener.accept()
+        connection.setblocking(False)
+        request = PendingRequest(connection)
+        self.selector.register(connection, selectors.EVENT_READ, request)
+
+    def read_request(self, request: PendingRequest) -> None:
+        """Read what arrived of `request`, run it once it is complete."""
+        try:
+            message = request.read()
+        except (OSError, ValueError) as error:
+            self.reject(request, str(error))
+            return
+        if message is None:
+            return
+
+        connection = request.connection
+        self.selector.unregister(connection)
+        pid = os.fork()
+        if pid == 0:
+            self.run_request(message, request.fds)
+        for fd in request.fds:
+            os.close(fd)
+        connection.setblocking(True)
+        self.requests[pid] = connection
+        self.selector.register(connection, selectors.EVENT_READ, pid)
+
+    def reject(self, request: PendingRequest, reason: str) -> None:
+        print(f"stellar: bad request: {reason}", file=sys.stderr)
+        self.selector.unregister(request.connection)
+        request.close()
+
+    def pending_requests(self) -> list[PendingRequest]:
+        return [
+            key.data
+            for key in self.selector.get_map().values()
+            if type(key.data) is PendingRequest
+        ]
+
+    def next_timeout(self) -> Optional[float]:
+        """Seconds until the first pending request times out, if any."""
+        deadlines = [request.deadline for request in self.pending_requests()]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def expire_requests(self) -> None:
+        now = time.monotonic()
+        for request in self.pending_requests():
+            if request.deadline <= now:
+                self.reject(request, "timed out")
+
+    def run_request(self, request: dict, fds: list[int]) -> None:
+        """Run one request in the forked process and exit with its status."""
+        status = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            # The listener and the connections of other requests
+            for key in list(self.selector.get_map().values()):
+                os.close(key.fd)
+            self.selector.close()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["environ"])
+
+            self.handle(request["argv"])
+            status = 0
+        except SystemExit as exit:
+            if exit.code is None or isinstance(exit.code, int):
+                status = exit.code or 0
+            else:
+                print(exit.code, file=sys.stderr)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # No cleanup of the server's state, it belongs to the server
+            os._exit(status)
+
+    def reap(self) -> None:
+        """Send the exit status of every finished request to its client."""
+        while self.requests:
+            pid, wait_status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            connection = self.requests.pop(pid, None)
+            if connection is None:
+                continue
+            status = os.waitstatus_to_exitcode(wait_status)
+            if status < 0:
+                # Killed by a signal, reported the way shells do
+                status = 128 - status
+            self.selector.unregister(connection)
+            try:
+                connection.sendall(json.dumps({"status": status}).encode() + b"\n")
+            except OSError:
+                pass
+            connection.close()
+
+    def disconnected(self, connection: socket.socket, pid: int) -> None:
+        """The client sends nothing after its request, so it went away."""
+        self.selector.unregister(connection)
+        connection.close()
+        self.requests[pid] = None
+        stop(pid)
+
+
+def stop(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        # Exited already, not reaped yet
+        pass
+
+
+def drain(fd: int) -> None:
+    """Read everything waiting on the non-blocking `fd`."""
+    try:
+        while os.read(fd, 1024):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def warm_sessions() -> dict[int, st_compiler.JitSession]:
+    """A JIT session for each optimization level, each run once already."""
+    sessions = {}
+    for opt_level in st_compiler.OPT_LEVELS:
+        session = st_compiler.JitSession(opt_level)
+        session.run(st_frontend.generate_module(WARM_UP_SOURCE))
+        sessions[opt_level] = session
+    return sessions
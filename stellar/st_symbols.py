@@ -0,0 +1,138 @@
+import sys
+from typing import Optional
+
+
+class Symbol:
+    """
+    A declared variable. The parser resolves every use of a name to its
+    Symbol once, so later phases never look names up again.
+    """
+
+    __slots__ = ("name", "variable_type", "initialized", "depth", "value")
+
+    def __init__(
+        self,
+        name: str,
+        variable_type: str,
+        initialized: bool = False,
+        depth: int = 0,
+    ) -> None:
+        self.name = name
+        self.variable_type = variable_type
+        # Whether a value was assigned by the point the parser has reached
+        self.initialized = initialized
+        # Nesting of the declaring scope, 0 for the global scope
+        self.depth = depth
+        # Storage in the generated code, set by the code generator
+        self.value = None
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.name == other.name and self.variable_type == other.variable_type
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"Symbol({self.name!r}, {self.variable_type!r})"
+
+
+class FunctionSymbol(Symbol):
+    """
+    A declared function. Its variable_type spells out the signature, so a
+    changed signature reads as a changed type to everything comparing them.
+    """
+
+    __slots__ = ("parameter_types", "return_type")
+
+    def __init__(
+        self, name: str, parameter_types: list[str], return_type: str, depth: int = 0
+    ) -> None:
+        signature = f"FUNCTION({','.join(parameter_types)})->{return_type}"
+        super().__init__(name, signature, True, depth)
+        self.parameter_types = parameter_types
+        self.return_type = return_type
+
+    def __repr__(self) -> str:
+        return f"FunctionSymbol({self.name!r}, {self.variable_type!r})"
+
+
+class Scope:
+    """
+    Symbols declared in one scope, with a link to the enclosing scope.
+
+    The scope of a function body hides the variables declared outside of
+    it, functions have no globals. Functions stay visible.
+    """
+
+    __slots__ = ("symbols", "parent", "depth", "function")
+
+    def __init__(
+        self, parent: Optional["Scope"] = None, function: bool = False
+    ) -> None:
+        self.symbols: dict[str, Symbol] = {}
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.function = function
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        scope: Optional[Scope] = self
+        variables = True
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None and (variables or type(symbol) is FunctionSymbol):
+                return symbol
+            if scope.function:
+                variables = False
+            scope = scope.parent
+        return None
+
+
+class SymbolTable:
+    """
+    The scopes of one compilation, innermost last.
+
+    Each parser owns its table, so compilations share no state and can run
+    side by side in threads. Names are interned, which makes the scope
+    lookups mostly identity comparisons.
+    """
+
+    def __init__(self) -> None:
+        self.global_scope = Scope()
+        self.scope = self.global_scope
+
+    def enter_scope(self, function: bool = False) -> Scope:
+        self.scope = Scope(self.scope, function)
+        return self.scope
+
+    def exit_scope(self) -> None:
+        if self.scope.parent is None:
+            raise RuntimeError("Cannot exit the global scope")
+        self.scope = self.scope.parent
+
+    def declare(
+        self, name: str, variable_type: str, initialized: bool = False
+    ) -> Symbol:
+        """Declare `name` in the current scope, shadowing earlier declarations."""
+        symbol = Symbol(sys.intern(name), variable_type, initialized, self.scope.depth)
+        self.scope.symbols[symbol.name] = symbol
+        return symbol
+
+    def declare_function(
+        self, name: str, parameter_types: list[str], return_type: str
+    ) -> FunctionSymbol:
+        """Declare the function `name`, which must be new to the current scope."""
+        if name in self.scope.symbols:
+            raise ValueError(f"{name} is already declared!")
+        symbol = FunctionSymbol(
+            sys.intern(name), parameter_types, return_type, self.scope.depth
+        )
+        self.scope.symbols[symbol.name] = symbol
+        return symbol
+
+    def define(self, symbol: Symbol) -> None:
+        """Make an existing symbol visible in the current scope again."""
+        self.scope.symbols[symbol.name] = symbol
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        return self.scope.lookup(name)